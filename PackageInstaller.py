@@ -3,6 +3,7 @@ import sys
 import threading
 import subprocess
 import importlib.util
+from . import libraries
 
 
 # -------------------------------------------------------------
@@ -21,16 +22,20 @@ def install_packages():
         subprocess.check_call([sys.executable,"-m","pip","install","mediapipe==0.10.14","opencv-python==4.11.0.86","cvzone==1.6.1"])
     except subprocess.CalledProcessError as e:
         print(f"Error installing packages: {e}")
+    finally:
+        libraries.refresh()
 
 def uninstall_packages():
     try:
         subprocess.check_call([sys.executable,"-m","pip","uninstall","-y","mediapipe","opencv-python", "opencv-contrib-python", "opencv-python-headless", "cvzone"])
     except subprocess.CalledProcessError as e:
         print(f"Error uninstalling packages: {e}")
+    finally:
+        libraries.refresh()
 
 
 def check_required_packages():
-    """Return a list of missing required packages."""
+    """Return a list of missing required packages. Cached (it runs on every redraw of the preferences)."""
     required = {
         "mediapipe": "mediapipe==0.10.14",
         "cv2": "opencv-python==4.11.0.86",
@@ -39,7 +44,7 @@ def check_required_packages():
 
     missing = []
     for module_name, package_name in required.items():
-        if not is_installed(module_name):
+        if not libraries.installed(module_name):
             missing.append(package_name)
     return missing
 
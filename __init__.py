@@ -11,15 +11,25 @@ bl_info = {
 
 
 import bpy
-from . import PackageInstaller, operators, panels
+from . import PackageInstaller, operators, panels, tracking, utils
 
 classes = PackageInstaller.classes + operators.classes + panels.classes
 
 
 
+def warm_up_detectors():
+    """Starts the background detector warm-up if enabled in the preferences (run from a timer after registration)."""
+    addon = bpy.context.preferences.addons.get(__package__)
+    if addon is not None and addon.preferences.warm_up_detectors and not PackageInstaller.check_required_packages():
+        tracking.DetectorPool.warm_up()
+    return None
+
+
+
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
+    bpy.app.timers.register(warm_up_detectors, first_interval=1.0)
     bpy.types.Scene.num_hands = bpy.props.IntProperty(
         name="Number of Hands",
         description="Set number of hands to track (1 or 2)",
@@ -45,10 +55,221 @@ def register():
     bpy.types.Scene.bake_only_selected = bpy.props.BoolProperty(name="Only Selected Bones", default=False)
     bpy.types.Scene.multi_view_tracking = bpy.props.BoolProperty(name="Multi View Tracking", default=False)
     bpy.types.Scene.realtime_tracking = bpy.props.BoolProperty(name="Realtime Tracking", default=False)
+    bpy.types.Scene.keyframe_tolerance = bpy.props.FloatProperty(
+        name="Keyframe Tolerance",
+        description="Maximum error allowed when reducing keyframes on Animate. 0 keeps a keyframe on every frame",
+        default=0.0,
+        min=0.0,
+        precision=4,
+        step=0.1
+    )
+    bpy.types.Scene.gap_fill_method = bpy.props.EnumProperty(
+        name="Gap Filling",
+        description="How frames with missing or low-visibility landmarks are filled on Animate",
+        items=[
+            ('NONE', "None", "Leave missing landmarks without keyframes"),
+            ('LINEAR', "Linear", "Straight line between the frames around the gap"),
+            ('CUBIC', "Cubic", "Smooth curve that follows the motion around the gap"),
+        ],
+        default='LINEAR'
+    )
+    bpy.types.Scene.max_gap = bpy.props.IntProperty(
+        name="Max Gap",
+        description="Longest gap (in frames) that is filled. Longer gaps are left without keyframes",
+        default=15,
+        min=1
+    )
+    bpy.types.Scene.job_queue_path = bpy.props.StringProperty(
+        name="Job Queue",
+        description="JSON file holding the tracking job queue",
+        default="//mocap_jobs.json",
+        subtype='FILE_PATH'
+    )
+    bpy.types.Scene.job_workers = bpy.props.IntProperty(
+        name="Workers",
+        description="Number of videos tracked at the same time by the job queue",
+        default=2,
+        min=1,
+        max=16
+    )
+    bpy.types.Scene.visibility_threshold = bpy.props.FloatProperty(
+        name="Min Visibility",
+        description="Landmarks tracked with a lower visibility are treated as missing",
+        default=0.5,
+        min=0.0,
+        max=1.0
+    )
+    bpy.types.Scene.auto_scale = bpy.props.BoolProperty(
+        name="Auto Scale",
+        description="Scale the capture on Animate so the performer has the target height, "
+                    "and fit the depth scale to keep the bone lengths constant",
+        default=False
+    )
+    bpy.types.Scene.target_height = bpy.props.FloatProperty(
+        name="Target Height",
+        description="Height of the performer used by Auto Scale (hands are scaled in proportion)",
+        default=1.75,
+        min=0.1,
+        subtype='DISTANCE'
+    )
+    bpy.types.Scene.constant_bone_lengths = bpy.props.BoolProperty(
+        name="Constant Bone Lengths",
+        description="Keep every bone at its median length over the capture on Animate, so limbs do not stretch",
+        default=False
+    )
+    bpy.types.Scene.bone_length_iterations = bpy.props.IntProperty(
+        name="Iterations",
+        description="Number of solver passes over all bones. More passes fit the lengths more exactly",
+        default=10,
+        min=1,
+        max=100
+    )
+    bpy.types.Scene.foot_locking = bpy.props.BoolProperty(
+        name="Foot Locking",
+        description="Detect when heels and toes are planted on Animate, then stop them sliding and keep them on the ground",
+        default=False
+    )
+    bpy.types.Scene.stream_keyframes = bpy.props.BoolProperty(
+        name="Animate While Tracking",
+        description="Create the pose rig when front view tracking starts and key it in batches as frames are tracked",
+        default=False
+    )
+    bpy.types.Scene.stream_batch = bpy.props.IntProperty(
+        name="Batch Size",
+        description="Number of tracked frames keyed at once while tracking",
+        default=256,
+        min=1
+    )
+    bpy.types.Scene.animate_use_range = bpy.props.BoolProperty(
+        name="Frame Range",
+        description="Only animate a range of the tracked frames. Keys outside the range are kept",
+        default=False
+    )
+    bpy.types.Scene.animate_frame_start = bpy.props.IntProperty(name="Range Start", default=1, min=1)
+    bpy.types.Scene.animate_frame_end = bpy.props.IntProperty(name="Range End", default=250, min=1)
+    bpy.types.Scene.proxy_step = bpy.props.IntProperty(
+        name="Proxy Step",
+        description="Key every n-th frame only, for a light proxy of long takes. Upgrade Range keys every frame",
+        default=1,
+        min=1,
+        max=100
+    )
+    bpy.types.Scene.retrack_frame_start = bpy.props.IntProperty(name="Re-track Start", default=1, min=1)
+    bpy.types.Scene.retrack_frame_end = bpy.props.IntProperty(name="Re-track End", default=100, min=1)
+    bpy.types.Scene.retrack_confidence = bpy.props.FloatProperty(
+        name="Detection Confidence",
+        description="Minimum detection confidence used when re-tracking. Lower finds more, higher rejects wrong detections",
+        default=0.5,
+        min=0.05,
+        max=1.0
+    )
+    bpy.types.Scene.retrack_use_roi = bpy.props.BoolProperty(
+        name="Region of Interest",
+        description="Only detect within a region of the frame when re-tracking",
+        default=False
+    )
+    bpy.types.Scene.retrack_roi = bpy.props.FloatVectorProperty(
+        name="Region",
+        description="Region of the frame to detect in: min x, min y, max x, max y as fractions of the frame (y down)",
+        size=4,
+        default=(0.0, 0.0, 1.0, 1.0),
+        min=0.0,
+        max=1.0
+    )
+    bpy.types.Scene.camera_rig_path = bpy.props.StringProperty(
+        name="Camera Rig",
+        description="JSON file with the calibrated cameras used by Triangulate Views (see calibration.py)",
+        default="//cameras.json",
+        subtype='FILE_PATH'
+    )
+    bpy.types.Scene.undistort_landmarks = bpy.props.BoolProperty(
+        name="Lens Undistortion",
+        description="Remove lens distortion from the tracked landmarks with the cameras of the camera rig file",
+        default=False
+    )
+    bpy.types.Scene.num_actors = bpy.props.IntProperty(
+        name="Number of Actors",
+        description="Number of people tracked in the front video. Each actor gets its own skeleton",
+        default=1,
+        min=1,
+        max=6
+    )
+    bpy.types.Scene.pose_model_path = bpy.props.StringProperty(
+        name="Pose Model",
+        description="MediaPipe pose landmarker model (.task file), needed to track more than one actor",
+        default="",
+        subtype='FILE_PATH'
+    )
+    bpy.types.Scene.video_decoder = bpy.props.EnumProperty(
+        name="Video Decoder",
+        description="How video files are decoded for tracking",
+        items=[
+            ('OPENCV', "OpenCV", "Decode with OpenCV in Blender's process"),
+            ('FFMPEG', "FFmpeg", "Decode with an ffmpeg process on all cores (needs ffmpeg and ffprobe on the PATH)"),
+        ],
+        default='OPENCV'
+    )
+    bpy.types.Scene.tracking_subprocess = bpy.props.BoolProperty(
+        name="Track in Subprocess",
+        description="Decode and track the video in a separate process and share frames and landmarks through shared memory, so Blender stays responsive",
+        default=False
+    )
+    bpy.types.Scene.network_output = bpy.props.BoolProperty(
+        name="Network Output",
+        description="Send the landmarks of every tracked front view or realtime frame over UDP to other tools",
+        default=False
+    )
+    bpy.types.Scene.network_protocol = bpy.props.EnumProperty(
+        name="Protocol",
+        description="Packet format of the network output",
+        items=[
+            ('UDP', "Binary UDP", "Compact binary packets (see streaming.py)"),
+            ('OSC', "OSC", "Open Sound Control messages"),
+        ],
+        default='UDP'
+    )
+    bpy.types.Scene.network_host = bpy.props.StringProperty(
+        name="Host",
+        description="Address of the receiving tool",
+        default="127.0.0.1"
+    )
+    bpy.types.Scene.network_bind_address = bpy.props.StringProperty(
+        name="Listen On",
+        description="Address Network Tracking receives on. 0.0.0.0 accepts a tracking server on another machine",
+        default="127.0.0.1"
+    )
+    bpy.types.Scene.network_port = bpy.props.IntProperty(
+        name="Port",
+        description="UDP port of the receiving tool (Network Output) or of this Blender (Network Tracking)",
+        default=9763,
+        min=1,
+        max=65535
+    )
+    bpy.types.Scene.export_format = bpy.props.EnumProperty(
+        name="Export Format",
+        description="File format of Export Motion",
+        items=[
+            ('BVH', "BVH", "Skeleton and joint rotations, for other DCCs and game engines"),
+            ('CSV', "CSV", "One row per frame with the root position and joint rotations"),
+            ('BINARY', "Binary (.npy)", "Compact float32 array of the CSV columns"),
+        ],
+        default='BVH'
+    )
+    bpy.types.Scene.export_scale = bpy.props.FloatProperty(
+        name="Export Scale",
+        description="Factor for positions and bone lengths of Export Motion (e.g. 100 for centimeters)",
+        default=1.0,
+        min=0.001
+    )
 
 
 
 def unregister():
+    if bpy.app.timers.is_registered(warm_up_detectors):
+        bpy.app.timers.unregister(warm_up_detectors)
+    tracking.DetectorPool.clear()
+    # The frame change handler would outlive the add-on's modules
+    utils.PreviewScrubber.stop()
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
     del bpy.types.Scene.num_hands
@@ -59,6 +280,41 @@ def unregister():
     del bpy.types.Scene.bake_only_selected
     del bpy.types.Scene.multi_view_tracking
     del bpy.types.Scene.realtime_tracking
+    del bpy.types.Scene.keyframe_tolerance
+    del bpy.types.Scene.gap_fill_method
+    del bpy.types.Scene.max_gap
+    del bpy.types.Scene.visibility_threshold
+    del bpy.types.Scene.job_queue_path
+    del bpy.types.Scene.job_workers
+    del bpy.types.Scene.auto_scale
+    del bpy.types.Scene.target_height
+    del bpy.types.Scene.constant_bone_lengths
+    del bpy.types.Scene.bone_length_iterations
+    del bpy.types.Scene.foot_locking
+    del bpy.types.Scene.stream_keyframes
+    del bpy.types.Scene.stream_batch
+    del bpy.types.Scene.animate_use_range
+    del bpy.types.Scene.animate_frame_start
+    del bpy.types.Scene.animate_frame_end
+    del bpy.types.Scene.proxy_step
+    del bpy.types.Scene.retrack_frame_start
+    del bpy.types.Scene.retrack_frame_end
+    del bpy.types.Scene.retrack_confidence
+    del bpy.types.Scene.retrack_use_roi
+    del bpy.types.Scene.retrack_roi
+    del bpy.types.Scene.camera_rig_path
+    del bpy.types.Scene.undistort_landmarks
+    del bpy.types.Scene.num_actors
+    del bpy.types.Scene.pose_model_path
+    del bpy.types.Scene.video_decoder
+    del bpy.types.Scene.tracking_subprocess
+    del bpy.types.Scene.network_output
+    del bpy.types.Scene.network_protocol
+    del bpy.types.Scene.network_host
+    del bpy.types.Scene.network_bind_address
+    del bpy.types.Scene.network_port
+    del bpy.types.Scene.export_format
+    del bpy.types.Scene.export_scale
 
 
 
@@ -0,0 +1,316 @@
+"""
+    Camera calibration for multi-camera tracking (see processing.Triangulation).
+    A camera rig is a JSON file:
+        {"cameras": [{"name": "front", "size": [width, height], "K": 3x3, "dist": [k1, k2, p1, p2, k3],
+                      "R": 3x3, "t": [x, y, z], "landmarks": optional .npz file tracked with this camera}, ...]}
+    R and t map world points into the camera (x_camera = R x_world + t), as in OpenCV.
+    The world should follow OpenCV's camera convention (x right, y down, z away from the camera), so that
+    the triangulated points can be animated like the tracked ones: use the first camera as the world
+    (the default) or a checkerboard held upright facing it.
+
+    Usage (plain Python or Blender's Python, with OpenCV installed):
+        python calibration.py intrinsics rig.json front board_front.mp4 --pattern 9x6 --square 0.025
+        python calibration.py extrinsics rig.json side board_side.png --pattern 9x6 --square 0.025
+        python calibration.py landmarks rig.json side front.npz side.npz --baseline 2.0
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+
+try:
+    from . import tracking
+    from . import processing
+    from . import libraries
+except ImportError:
+    # Run as a script outside of the add-on package
+    import tracking
+    import processing
+    import libraries
+
+cv2 = libraries.cv2 #imported on first use
+
+
+
+# -------------------------------------------------------------
+# CAMERA RIG FILES
+# -------------------------------------------------------------
+class CameraRig:
+    @staticmethod
+    def default_camera(name, size, fov=60.0):
+        """
+            :param name: Camera name.
+            :param size: (width, height) of the camera's video.
+            :param fov: Horizontal field of view (degrees) used to guess the focal length.
+            :return: Camera dict placed at the world origin, without lens distortion.
+        """
+        width, height = size
+        focal = width / (2 * np.tan(np.radians(fov) / 2))
+        return {
+            "name": name,
+            "size": [int(width), int(height)],
+            "K": np.array([[focal, 0, width / 2], [0, focal, height / 2], [0, 0, 1]]),
+            "dist": np.zeros(5),
+            "R": np.eye(3),
+            "t": np.zeros(3),
+        }
+
+    @staticmethod
+    def load(path):
+        """
+            :param path: Camera rig JSON file.
+            :return: List of camera dicts with NumPy arrays.
+        """
+        with open(path) as rig_file:
+            cameras = json.load(rig_file)["cameras"]
+        for camera in cameras:
+            for key in ("K", "dist", "R", "t"):
+                camera[key] = np.asarray(camera[key], dtype=np.float64)
+        return cameras
+
+    @staticmethod
+    def save(path, cameras):
+        """
+            :param path: Camera rig JSON file.
+            :param cameras: List of camera dicts.
+        """
+        rig = {"cameras": [
+            {key: value.tolist() if isinstance(value, np.ndarray) else value for key, value in camera.items()}
+            for camera in cameras
+        ]}
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as rig_file:
+            json.dump(rig, rig_file, indent=2)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def update(path, camera):
+        """
+            Adds a camera to a rig file, replacing the camera with the same name.
+            :param path: Camera rig JSON file (created if missing).
+            :param camera: Camera dict.
+        """
+        cameras = CameraRig.load(path) if os.path.exists(path) else []
+        cameras = [other for other in cameras if other["name"] != camera["name"]] + [camera]
+        CameraRig.save(path, cameras)
+
+    @staticmethod
+    def find(path, name):
+        """:return: The camera with this name in a rig file, or None."""
+        if not os.path.exists(path):
+            return None
+        return next((camera for camera in CameraRig.load(path) if camera["name"] == name), None)
+
+
+
+# -------------------------------------------------------------
+# CHECKERBOARD CALIBRATION
+# -------------------------------------------------------------
+class Checkerboard:
+    @staticmethod
+    def object_points(pattern, square):
+        """
+            :param pattern: (columns, rows) of inner corners.
+            :param square: Size of a square, in world units (e.g. meters).
+            :return: Array (corners, 3) of the corners on the board plane (z = 0).
+        """
+        columns, rows = pattern
+        grid = np.mgrid[0:columns, 0:rows].T.reshape(-1, 2)
+        return np.hstack([grid * square, np.zeros((len(grid), 1))]).astype(np.float32)
+
+    @staticmethod
+    def find_corners(img, pattern):
+        """:return: Array (corners, 1, 2) of sub-pixel corners, or None if the board was not found."""
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        found, corners = cv2.findChessboardCorners(gray, pattern)
+        if not found:
+            return None
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+        return cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
+
+    @staticmethod
+    def intrinsics(video_path, pattern, square, max_views=40):
+        """
+            Calibrates focal length, principal point and lens distortion from a video of a moving checkerboard.
+            :param video_path: Video (or image sequence pattern) filmed with the camera to calibrate.
+            :param max_views: Number of frames, spread over the video, used for the calibration.
+            :return: (K, dist, (width, height), RMS reprojection error in pixels)
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise RuntimeError(f"Failed to open video: {video_path}")
+        frames_total = max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 1)
+        step = max(frames_total // max_views, 1)
+
+        board = Checkerboard.object_points(pattern, square)
+        object_points, image_points = [], []
+        size = None
+        frame_index = 0
+        while len(image_points) < max_views:
+            success, img = cap.read()
+            if not success:
+                break
+            if frame_index % step == 0:
+                size = (img.shape[1], img.shape[0])
+                corners = Checkerboard.find_corners(img, pattern)
+                if corners is not None:
+                    object_points.append(board)
+                    image_points.append(corners)
+            frame_index += 1
+        cap.release()
+
+        if len(image_points) < 3:
+            raise RuntimeError(f"Checkerboard found on {len(image_points)} frames, at least 3 are needed.")
+        rms, K, dist, _, _ = cv2.calibrateCamera(object_points, image_points, size, None, None)
+        return K, dist.ravel(), size, rms
+
+    @staticmethod
+    def extrinsics(image_path, camera, pattern, square):
+        """
+            Places a calibrated camera in the world defined by a checkerboard seen by all cameras.
+            :param image_path: Image (or video, first frame) of the checkerboard from this camera.
+            :param camera: Camera dict with "K" and "dist".
+            :return: (R, t) mapping board coordinates into the camera.
+        """
+        cap = cv2.VideoCapture(image_path)
+        success, img = cap.read()
+        cap.release()
+        if not success:
+            raise RuntimeError(f"Failed to read image: {image_path}")
+        corners = Checkerboard.find_corners(img, pattern)
+        if corners is None:
+            raise RuntimeError(f"Checkerboard not found in {image_path}")
+        _, rvec, tvec = cv2.solvePnP(Checkerboard.object_points(pattern, square), corners, camera["K"], camera["dist"])
+        return cv2.Rodrigues(rvec)[0], tvec.ravel()
+
+
+
+# -------------------------------------------------------------
+# CALIBRATION FROM THE TRACKED LANDMARKS
+# -------------------------------------------------------------
+class LandmarkCalibration:
+    @staticmethod
+    def matches(reference_file, camera_file, reference, camera, threshold=0.8):
+        """
+            :param reference_file: Landmark file (processing.LandmarkFile) of the reference camera.
+            :param camera_file: Landmark file of the camera to place, tracked on the same (synchronized) take.
+            :param reference: Camera dict of the reference camera (its "size" is needed).
+            :param camera: Camera dict of the camera to place.
+            :param threshold: Landmarks below this visibility in either view are not used.
+            :return: (array (M, 2) of reference pixels, array (M, 2) of matching camera pixels)
+        """
+        pixels, visibility = [], []
+        for path, cam in ((reference_file, reference), (camera_file, camera)):
+            data, _ = processing.LandmarkFile.load(path)
+            for kind, num_points in (("pose", 40), ("Right", 21), ("Left", 21)):
+                position_list, visibility_list = tracking.LandmarkStore.find(data, kind)
+                if position_list:
+                    break
+            else:
+                raise RuntimeError(f"No motion data in {path}")
+            points = processing.LandmarkArray.from_position_list(position_list, num_points)
+            pixels.append(processing.LandmarkArray.to_pixels(points, cam["size"]))
+            visibility.append(processing.LandmarkArray.from_visibility_list(visibility_list, num_points, len(points)))
+
+        num_frames = min(len(pixels[0]), len(pixels[1]))
+        usable = np.ones(pixels[0][:num_frames].shape[:2], dtype=bool)
+        for view_pixels, view_visibility in zip(pixels, visibility):
+            usable &= (view_visibility[:num_frames] >= threshold) & ~np.isnan(view_pixels[:num_frames]).any(axis=-1)
+        return pixels[0][:num_frames][usable], pixels[1][:num_frames][usable]
+
+    @staticmethod
+    def relative_pose(reference_pixels, camera_pixels, reference, camera, baseline=1.0):
+        """
+            Places a camera relative to the reference camera from matched landmarks (essential matrix),
+            for when no checkerboard was filmed. The scale can not be recovered from the images alone,
+            so the distance between the two cameras is given instead.
+            :param baseline: Distance between the two cameras, in world units.
+            :return: (R, t) of the camera in the reference camera's world.
+        """
+        if len(reference_pixels) < 8:
+            raise RuntimeError(f"{len(reference_pixels)} matching landmarks found, at least 8 are needed.")
+        points_a = cv2.undistortPoints(reference_pixels.reshape(-1, 1, 2), reference["K"], reference["dist"])
+        points_b = cv2.undistortPoints(camera_pixels.reshape(-1, 1, 2), camera["K"], camera["dist"])
+        essential, mask = cv2.findEssentialMat(points_a, points_b, np.eye(3), method=cv2.RANSAC, threshold=1e-3)
+        _, R, t, _ = cv2.recoverPose(essential, points_a, points_b, np.eye(3), mask=mask)
+
+        # Chain onto the reference camera's own pose
+        R_ref, t_ref = reference["R"], reference["t"]
+        return R @ R_ref, (R @ t_ref + t.ravel() * baseline)
+
+
+
+# -------------------------------------------------------------
+# COMMAND LINE
+# -------------------------------------------------------------
+def camera_or_default(path, name, size=None):
+    """:return: The named camera of the rig, or a default one if it is not calibrated yet."""
+    camera = CameraRig.find(path, name)
+    if camera is not None:
+        return camera
+    if size is None:
+        raise RuntimeError(f"Camera '{name}' is not in {path}; calibrate its intrinsics or give --size.")
+    return CameraRig.default_camera(name, size)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="calibration.py", description="Open Mocap camera calibration.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for command, help_text in (("intrinsics", "Lens calibration from a checkerboard video."),
+                               ("extrinsics", "Camera placement from a checkerboard seen by all cameras.")):
+        sub = commands.add_parser(command, help=help_text)
+        sub.add_argument("rig", help="Camera rig JSON file (created if missing).")
+        sub.add_argument("camera", help="Camera name, e.g. front or side.")
+        sub.add_argument("media", help="Checkerboard video or image.")
+        sub.add_argument("--pattern", default="9x6", help="Inner corners, columns x rows.")
+        sub.add_argument("--square", type=float, default=0.025, help="Square size in meters.")
+
+    landmarks = commands.add_parser("landmarks", help="Camera placement from landmarks tracked by two cameras.")
+    landmarks.add_argument("rig")
+    landmarks.add_argument("camera", help="Camera to place, relative to the first camera of the rig.")
+    landmarks.add_argument("reference_landmarks", help="Landmark file (.npz) of the first camera.")
+    landmarks.add_argument("camera_landmarks", help="Landmark file (.npz) of the camera to place.")
+    landmarks.add_argument("--baseline", type=float, default=1.0, help="Distance between the two cameras in meters.")
+    landmarks.add_argument("--size", help="Video size WIDTHxHEIGHT, for cameras without intrinsics.")
+
+    args = parser.parse_args(argv)
+    if libraries.missing("cv2"):
+        raise RuntimeError("OpenCV (cv2) is not installed!")
+
+    if args.command == "landmarks":
+        size = tuple(int(v) for v in args.size.split("x")) if args.size else None
+        reference = CameraRig.load(args.rig)[0] if os.path.exists(args.rig) else None
+        if reference is None:
+            raise RuntimeError(f"{args.rig} has no reference camera; add one with intrinsics first.")
+        camera = camera_or_default(args.rig, args.camera, size)
+        reference_pixels, camera_pixels = LandmarkCalibration.matches(
+            args.reference_landmarks, args.camera_landmarks, reference, camera
+        )
+        camera["R"], camera["t"] = LandmarkCalibration.relative_pose(
+            reference_pixels, camera_pixels, reference, camera, args.baseline
+        )
+        camera["landmarks"] = os.path.abspath(args.camera_landmarks)
+        CameraRig.update(args.rig, camera)
+        print(f"[Open Mocap] Placed camera '{args.camera}' from {len(reference_pixels)} landmark matches.")
+        return
+
+    pattern = tuple(int(v) for v in args.pattern.split("x"))
+    if args.command == "intrinsics":
+        K, dist, size, rms = Checkerboard.intrinsics(args.media, pattern, args.square)
+        camera = CameraRig.find(args.rig, args.camera) or CameraRig.default_camera(args.camera, size)
+        camera.update({"size": list(size), "K": K, "dist": dist})
+        CameraRig.update(args.rig, camera)
+        print(f"[Open Mocap] Calibrated camera '{args.camera}' (RMS reprojection error {rms:.3f} px).")
+    else:
+        camera = camera_or_default(args.rig, args.camera)
+        camera["R"], camera["t"] = Checkerboard.extrinsics(args.media, camera, pattern, args.square)
+        CameraRig.update(args.rig, camera)
+        print(f"[Open Mocap] Placed camera '{args.camera}' from the checkerboard.")
+
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,187 @@
+"""
+    Command line batch processing for Open Mocap, no user interface needed.
+
+    Tracking only (plain Python with OpenCV, MediaPipe and cvzone installed, no Blender):
+        python cli.py --front take01_front.mp4 --side take01_side.mp4 --kind pose --output-dir out
+
+    Full pipeline: tracking, combine, animate, bake and save a .blend (Blender in background mode):
+        blender -b --factory-startup --python cli.py -- --front take01_front.mp4 --kind pose --output-dir out
+                --template rig.blend --rig Armature
+
+    Many takes at once with a JSON manifest (a list of {"front": ..., "side": ..., "name": ...}):
+        python cli.py --manifest takes.json --kind hand --output-dir out
+
+    Every take writes <output-dir>/<name>.npz (motion data, see processing.LandmarkFile)
+    and, when run inside Blender, <output-dir>/<name>.blend.
+"""
+
+import os
+import sys
+import json
+import argparse
+import importlib
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+
+# -------------------------------------------------------------
+# ARGUMENTS
+# -------------------------------------------------------------
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="cli.py", description="Open Mocap batch processing.")
+    parser.add_argument("--front", action="append", default=[], help="Front view video. Repeat for several takes.")
+    parser.add_argument("--side", action="append", default=[], help="Side view video, matched with --front in order.")
+    parser.add_argument("--manifest", help='JSON list of takes: [{"front": ..., "side": ..., "name": ...}, ...]')
+    parser.add_argument("--kind", choices=["pose", "hand"], default="pose", help="Track full-body pose or hands.")
+    parser.add_argument("--num-hands", type=int, choices=[1, 2], default=2, help="Number of hands to track.")
+    parser.add_argument("--output-dir", required=True, help="Directory for the .npz and .blend files.")
+    parser.add_argument("--reuse-landmarks", action="store_true",
+                        help="Load existing .npz files from the output directory instead of tracking again.")
+    parser.add_argument("--template", help="Blender only: .blend file opened for every take (e.g. a rig constrained to the empties).")
+    parser.add_argument("--rig", help="Blender only: name of the armature to bake after animating.")
+    parser.add_argument("--keyframe-tolerance", type=float, default=0.0, help="Blender only: keyframe reduction tolerance.")
+    parser.add_argument("--decoder", choices=["opencv", "ffmpeg"], default="opencv",
+                        help="Video decoder. ffmpeg decodes on all cores in a separate process (needs ffmpeg on the PATH).")
+    parser.add_argument("--cameras", help="Camera rig JSON (see calibration.py). Removes lens distortion from the "
+                                          "landmarks and, in Blender, triangulates the views instead of combining them.")
+    return parser.parse_args(argv)
+
+
+def collect_takes(args):
+    """:return: List of takes, each a dict with "front", "side" (or None) and "name"."""
+    takes = []
+    if args.manifest:
+        with open(args.manifest) as manifest:
+            takes.extend(json.load(manifest))
+    for i, front in enumerate(args.front):
+        takes.append({"front": front, "side": args.side[i] if i < len(args.side) else None})
+
+    for take in takes:
+        take.setdefault("side", None)
+        take.setdefault("name", os.path.splitext(os.path.basename(take["front"]))[0])
+    return takes
+
+
+
+# -------------------------------------------------------------
+# TRACKING STAGE (PLAIN PYTHON)
+# -------------------------------------------------------------
+def track_take(tracking, processing, calibration, take, args):
+    """
+        Tracks the videos of one take and saves the motion data next to the other outputs.
+        :param tracking: The tracking module (standalone or from the add-on package).
+        :param processing: The processing module (standalone or from the add-on package).
+        :param calibration: The calibration module (standalone or from the add-on package).
+        :return: (dict of motion data lists named as in globalVariables, fps)
+    """
+    path = os.path.join(args.output_dir, f"{take['name']}.npz")
+    if args.reuse_landmarks and os.path.exists(path):
+        print(f"[Open Mocap] Loading {path}")
+        return processing.LandmarkFile.load(path)
+
+    data = {}
+    fps = 30.0
+    for view in ("front", "side"):
+        if not take[view]:
+            continue
+
+        def progress(frames, view=view):
+            if frames % 100 == 0:
+                print(f"[Open Mocap] {take['name']} ({view} view): {frames} frames tracked")
+
+        # Landmarks are undistorted with the camera of the same name, if calibrated
+        camera = calibration.CameraRig.find(args.cameras, view) if args.cameras else None
+        tracker = tracking.OfflineTracker(take[view], args.kind, view, args.num_hands, camera, args.decoder)
+        data.update(tracker.run(progress))
+        if view == "front":
+            fps = tracker.fps
+
+    processing.LandmarkFile.save(path, data, fps)
+    print(f"[Open Mocap] Saved {path}")
+    return data, fps
+
+
+
+# -------------------------------------------------------------
+# FULL PIPELINE (BLENDER IN BACKGROUND MODE)
+# -------------------------------------------------------------
+def run_in_blender(args, takes):
+    import bpy
+
+    # --- Import and register the add-on from this folder ---
+    sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    addon = importlib.import_module(os.path.basename(ADDON_DIR))
+    addon.register()
+    gvar = addon.globalVariables
+
+    for take in takes:
+        if args.template:
+            bpy.ops.wm.open_mainfile(filepath=os.path.abspath(args.template))
+        else:
+            bpy.ops.wm.read_homefile(use_empty=True)
+        scene = bpy.context.scene
+        scene.keyframe_tolerance = args.keyframe_tolerance
+
+        data, fps = track_take(addon.tracking, addon.processing, addon.calibration, take, args)
+        bpy.ops.object.clear_mocap_cache(cache=args.kind)
+        for name, values in data.items():
+            setattr(gvar, name, values)
+        gvar.fps = fps
+
+        if args.cameras:
+            scene.camera_rig_path = os.path.abspath(args.cameras)
+            bpy.ops.object.triangulate_views(mode=args.kind)
+        elif take["side"]:
+            bpy.ops.object.combine_data(mode=args.kind)
+        if args.kind == "pose":
+            bpy.ops.object.animate_obj(reuse_rig=True)
+        else:
+            bpy.ops.object.animatehand(mode="offline")
+
+        if args.rig:
+            rig = bpy.data.objects.get(args.rig)
+            if rig is None or rig.type != 'ARMATURE':
+                print(f"[Open Mocap] Armature '{args.rig}' not found, skipping bake.")
+            else:
+                bpy.context.view_layer.objects.active = rig
+                bpy.ops.object.bake_motion(
+                    target_rig=rig.name,
+                    frame_start=scene.frame_start,
+                    frame_end=scene.frame_end,
+                    only_selected_bones=False
+                )
+                bpy.ops.object.mode_set(mode='OBJECT')
+
+        path = os.path.abspath(os.path.join(args.output_dir, f"{take['name']}.blend"))
+        bpy.ops.wm.save_as_mainfile(filepath=path)
+        print(f"[Open Mocap] Saved {path}")
+
+
+
+def main(argv):
+    args = parse_args(argv)
+    os.makedirs(args.output_dir, exist_ok=True)
+    takes = collect_takes(args)
+
+    try:
+        import bpy
+    except ModuleNotFoundError:
+        bpy = None
+
+    if bpy is None:
+        # Plain Python: only the Blender independent modules are needed
+        sys.path.insert(0, ADDON_DIR)
+        import tracking
+        import processing
+        import calibration
+        for take in takes:
+            track_take(tracking, processing, calibration, take, args)
+    else:
+        run_in_blender(args, takes)
+
+
+
+if __name__ == "__main__":
+    # Blender passes the script's own arguments after "--"
+    main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:])
@@ -0,0 +1,331 @@
+"""
+    Motion export straight from the landmark arrays: BVH, CSV or a compact binary .npy file,
+    for other DCCs and game engines. Nothing in here depends on Blender, no scene objects are needed.
+
+    The landmarks drive a fixed skeleton (MotionExport.POSE_JOINTS / HAND_JOINTS). Every joint's rotation is found
+    from the landmarks around it: the hips, chest and wrist get a full orientation from two directions
+    (e.g. right hip -> left hip and hips -> chest), every other joint the shortest rotation that aims it at its child,
+    which keeps the chains free of twist that the landmarks cannot show.
+    Rotations are written as ZXY Euler angles in degrees, Y up, the character facing +Z. Bone lengths are the median
+    lengths of the capture. Frames are converted and written in chunks, so long captures stream to disk.
+
+    Usage outside of Blender, on a landmark file written by cli.py or the job queue:
+        python export.py take01.npz take01.bvh --kind pose --scale 100
+"""
+
+import os
+import sys
+import argparse
+import numpy as np
+
+try:
+    from . import tracking
+    from . import processing
+except ImportError:
+    # Run as a script outside of the add-on package
+    import tracking
+    import processing
+
+
+
+# -------------------------------------------------------------
+# SKELETON AND JOINT ROTATIONS
+# -------------------------------------------------------------
+class MotionExport:
+    # (joint, landmark, parent, rest direction from the parent), parents first. Joints without children are end sites.
+    # The first child of a joint with several children defines its y axis, so its rest direction is (0, 1, 0).
+    POSE_JOINTS = [
+        ("Hips", 33, None, (0, 0, 0)),
+        ("Chest", 34, "Hips", (0, 1, 0)),
+        ("Head", 37, "Chest", (0, 1, 0)),
+        ("HeadEnd", 39, "Head", (0, 0, 1)),
+        ("LeftArm", 11, "Chest", (1, 0, 0)),
+        ("LeftForeArm", 13, "LeftArm", (1, 0, 0)),
+        ("LeftHand", 15, "LeftForeArm", (1, 0, 0)),
+        ("LeftHandEnd", 36, "LeftHand", (1, 0, 0)),
+        ("RightArm", 12, "Chest", (-1, 0, 0)),
+        ("RightForeArm", 14, "RightArm", (-1, 0, 0)),
+        ("RightHand", 16, "RightForeArm", (-1, 0, 0)),
+        ("RightHandEnd", 35, "RightHand", (-1, 0, 0)),
+        ("LeftUpLeg", 23, "Hips", (1, 0, 0)),
+        ("LeftLeg", 25, "LeftUpLeg", (0, -1, 0)),
+        ("LeftFoot", 27, "LeftLeg", (0, -1, 0)),
+        ("LeftToe", 31, "LeftFoot", (0, 0, 1)),
+        ("RightUpLeg", 24, "Hips", (-1, 0, 0)),
+        ("RightLeg", 26, "RightUpLeg", (0, -1, 0)),
+        ("RightFoot", 28, "RightLeg", (0, -1, 0)),
+        ("RightToe", 32, "RightFoot", (0, 0, 1)),
+    ]
+    HAND_JOINTS = [("Wrist", 0, None, (0, 0, 0))] + [
+        joint
+        for finger, base, direction in [
+            ("Middle", 9, (0, 1, 0)), ("Index", 5, (0.35, 0.94, 0)), ("Ring", 13, (-0.3, 0.95, 0)),
+            ("Pinky", 17, (-0.6, 0.8, 0)), ("Thumb", 1, (0.6, 0.8, 0)),
+        ]
+        for joint in [
+            (f"{finger}1", base, "Wrist", direction),
+            (f"{finger}2", base + 1, f"{finger}1", direction),
+            (f"{finger}3", base + 2, f"{finger}2", direction),
+            (f"{finger}End", base + 3, f"{finger}3", direction),
+        ]
+    ]
+    # Joints with several children: landmarks (a, b) of their x axis, a -> b
+    POSE_FRAMES = {"Hips": (24, 23), "Chest": (12, 11)}
+    HAND_FRAMES = {"Wrist": (17, 5)}
+    FORMATS = {"BVH": ".bvh", "CSV": ".csv", "BINARY": ".npy"}
+
+    def __init__(self, kind):
+        """
+            :param kind: "pose" or "hand".
+        """
+        self.joints = MotionExport.POSE_JOINTS if kind == "pose" else MotionExport.HAND_JOINTS
+        self.frames = MotionExport.POSE_FRAMES if kind == "pose" else MotionExport.HAND_FRAMES
+        names = [joint[0] for joint in self.joints]
+        self.parents = [names.index(parent) if parent else -1 for _, _, parent, _ in self.joints]
+        self.children = [[j for j, parent in enumerate(self.parents) if parent == i] for i in range(len(self.joints))]
+        self.rest = np.array([direction for *_, direction in self.joints], dtype=np.float64)
+        norm = np.linalg.norm(self.rest, axis=1, keepdims=True)
+        self.rest = np.divide(self.rest, norm, out=np.zeros_like(self.rest), where=norm > 0)
+        # Joints with channels, in the order of the BVH hierarchy (depth first)
+        self.order = []
+        stack = [0]
+        while stack:
+            joint = stack.pop()
+            if self.children[joint]:
+                self.order.append(joint)
+                stack.extend(reversed(self.children[joint]))
+
+    @staticmethod
+    def y_up(points):
+        """
+            :param points: Array (..., 3) as per Blender's convention (Z up, see processing.LandmarkArray.cv2blender).
+            :return: Array (..., 3) as per the BVH convention (Y up, facing +Z).
+        """
+        return np.stack([points[..., 0], points[..., 2], -points[..., 1]], axis=-1)
+
+    @staticmethod
+    def hold(points):
+        """
+            Replaces missing landmarks (NaN) by their last valid position, or the first one at the start of the capture.
+            Landmarks that were never detected are set to 0 and their joints keep the rest pose.
+            :param points: Array (frames, landmarks, 3).
+            :return: Array (frames, landmarks, 3) without NaN.
+        """
+        num_frames = len(points)
+        valid = ~np.isnan(points).any(axis=2)
+        frame_index = np.arange(num_frames)[:, None]
+        prev_valid = np.maximum.accumulate(np.where(valid, frame_index, -1), axis=0)
+        first_valid = np.argmax(valid, axis=0)[None, :]
+        source = np.where(prev_valid >= 0, prev_valid, first_valid)
+        held = points[source, np.arange(points.shape[1])[None, :]]
+        return np.nan_to_num(held)
+
+    @staticmethod
+    def normalize(vectors, fallback):
+        """
+            :param vectors: Array (..., 3).
+            :param fallback: Array broadcastable to vectors, used where a vector has no length.
+            :return: Unit vectors.
+        """
+        norm = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return np.where(norm > 1e-9, vectors / np.maximum(norm, 1e-12), fallback)
+
+    @staticmethod
+    def arc(u, v):
+        """
+            :param u: Unit vector (3,) of the rest direction.
+            :param v: Unit vectors (frames, 3).
+            :return: Rotation matrices (frames, 3, 3) of the shortest rotation from u to every v.
+        """
+        axis = np.cross(u, v)
+        c = v @ u
+        k = np.zeros(v.shape[:-1] + (3, 3))
+        k[..., 0, 1], k[..., 0, 2], k[..., 1, 2] = -axis[..., 2], axis[..., 1], -axis[..., 0]
+        k[..., 1, 0], k[..., 2, 0], k[..., 2, 1] = axis[..., 2], -axis[..., 1], axis[..., 0]
+        rotation = np.eye(3) + k + (k @ k) / np.maximum(1 + c, 1e-9)[..., None, None]
+
+        # Opposite directions: half turn around an axis perpendicular to u
+        opposite = 1 + c < 1e-6
+        if opposite.any():
+            n = np.cross(u, [1.0, 0.0, 0.0] if abs(u[0]) < 0.9 else [0.0, 1.0, 0.0])
+            n /= np.linalg.norm(n)
+            rotation[opposite] = 2 * np.outer(n, n) - np.eye(3)
+        return rotation
+
+    @staticmethod
+    def euler_zxy(rotation):
+        """
+            :param rotation: Rotation matrices (..., 3, 3) = Rz @ Rx @ Ry.
+            :return: Array (..., 3) of (Z, X, Y) angles in degrees, the order of the BVH channels.
+        """
+        x = np.arcsin(np.clip(rotation[..., 2, 1], -1.0, 1.0))
+        z = np.arctan2(-rotation[..., 0, 1], rotation[..., 1, 1])
+        y = np.arctan2(-rotation[..., 2, 0], rotation[..., 2, 2])
+        return np.degrees(np.stack([z, x, y], axis=-1))
+
+    def offsets(self, points):
+        """
+            :param points: Array (frames, landmarks, 3), Y up.
+            :return: Array (joints, 3) of rest offsets from the parent: rest direction x median bone length.
+        """
+        landmarks = np.array([landmark for _, landmark, _, _ in self.joints])
+        parents = np.maximum(self.parents, 0)
+        lengths = np.linalg.norm(points[:, landmarks] - points[:, landmarks[parents]], axis=2)
+        with np.errstate(all="ignore"):
+            length = np.nanmedian(lengths, axis=0) if len(points) else np.full(len(self.joints), np.nan)
+        length = np.where(np.isfinite(length), length, 0.1)
+        return self.rest * length[:, None]
+
+    def channels(self, points):
+        """
+            :param points: Array (frames, landmarks, 3) without NaN, Y up (see hold).
+            :return: Array (frames, channels) of the BVH motion rows: root position, then the ZXY angles of every joint.
+        """
+        num_frames = len(points)
+        world = [None] * len(self.joints)
+        local = [None] * len(self.joints)
+        for joint in range(len(self.joints)):
+            children = self.children[joint]
+            if not children:
+                continue
+            landmark, parent = self.joints[joint][1], self.parents[joint]
+            parent_world = world[parent] if parent >= 0 else np.broadcast_to(np.eye(3), (num_frames, 3, 3))
+            first_child = self.joints[children[0]][1]
+            y = points[:, first_child] - points[:, landmark]
+
+            if parent < 0 or len(children) > 1:
+                # --- Full orientation: y towards the first child, x along the side landmarks ---
+                a, b = self.frames[self.joints[joint][0]]
+                x = points[:, b] - points[:, a]
+                z = np.cross(x, y)
+                degenerate = ((np.linalg.norm(z, axis=1) < 1e-9) | (np.linalg.norm(y, axis=1) < 1e-9))[:, None, None]
+                y = MotionExport.normalize(y, np.array([0.0, 1.0, 0.0]))
+                z = MotionExport.normalize(z, np.array([0.0, 0.0, 1.0]))
+                rotation = np.stack([np.cross(y, z), y, z], axis=2)
+                world[joint] = np.where(degenerate, np.eye(3), rotation)
+                local[joint] = np.swapaxes(parent_world, 1, 2) @ world[joint]
+            else:
+                # --- Aim at the only child ---
+                rest = self.rest[children[0]]
+                direction = np.einsum("fji,fj->fi", parent_world, y)
+                local[joint] = MotionExport.arc(rest, MotionExport.normalize(direction, rest))
+                world[joint] = parent_world @ local[joint]
+
+        rows = [points[:, self.joints[0][1]]]
+        rows += [MotionExport.euler_zxy(local[joint]) for joint in self.order]
+        return np.concatenate(rows, axis=1)
+
+    def channel_names(self):
+        """:return: Names of the columns of channels(), e.g. "Hips.Xposition"."""
+        root = self.joints[0][0]
+        names = [f"{root}.{axis}position" for axis in "XYZ"]
+        return names + [f"{self.joints[joint][0]}.{axis}rotation" for joint in self.order for axis in "ZXY"]
+
+    def hierarchy(self, offsets):
+        """
+            :param offsets: Rest offsets (see offsets), already scaled.
+            :return: Text of the BVH HIERARCHY section.
+        """
+        lines = ["HIERARCHY"]
+
+        def write(joint, depth):
+            indent = "\t" * depth
+            children = self.children[joint]
+            if not children:
+                lines.append(f"{indent}End Site")
+            elif depth == 0:
+                lines.append(f"ROOT {self.joints[joint][0]}")
+            else:
+                lines.append(f"{indent}JOINT {self.joints[joint][0]}")
+            lines.append(f"{indent}{{")
+            lines.append(f"{indent}\tOFFSET {offsets[joint][0]:.6f} {offsets[joint][1]:.6f} {offsets[joint][2]:.6f}")
+            if depth == 0:
+                lines.append(f"{indent}\tCHANNELS 6 Xposition Yposition Zposition Zrotation Xrotation Yrotation")
+            elif children:
+                lines.append(f"{indent}\tCHANNELS 3 Zrotation Xrotation Yrotation")
+            for child in children:
+                write(child, depth + 1)
+            lines.append(f"{indent}}}")
+
+        write(0, 0)
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, points, fps, file_format="BVH", scale=1.0, chunk=4096):
+        """
+            Converts and writes the motion chunk by chunk, so only one chunk of rows is held in memory.
+            :param path: Output file path.
+            :param points: Array (frames, landmarks, 3) as per Blender's convention. NaN marks a missing landmark.
+            :param fps: Frame rate of the capture.
+            :param file_format: "BVH", "CSV" (one row per frame, named columns) or "BINARY"
+                                (.npy float32 array (frames, channels), columns as in channel_names).
+            :param scale: Factor for positions and bone lengths (e.g. 100 for centimeters).
+            :param chunk: Number of frames converted at once.
+            :return: Number of frames written.
+        """
+        points = MotionExport.hold(MotionExport.y_up(np.asarray(points, dtype=np.float64)))
+        num_frames = len(points)
+        num_channels = 3 + 3 * len(self.order)
+        # Write next to the target and rename, so an interrupted export never leaves a broken file
+        temp_path = f"{path}.tmp"
+
+        if file_format == "BINARY":
+            rows = np.lib.format.open_memmap(temp_path, mode="w+", dtype=np.float32, shape=(num_frames, num_channels))
+            for start in range(0, num_frames, chunk):
+                motion = self.channels(points[start:start + chunk])
+                motion[:, :3] *= scale
+                rows[start:start + chunk] = motion
+            rows.flush()
+            del rows
+        else:
+            with open(temp_path, "w", newline="\n") as motion_file:
+                if file_format == "CSV":
+                    motion_file.write("frame," + ",".join(self.channel_names()) + "\n")
+                else:
+                    motion_file.write(self.hierarchy(self.offsets(points) * scale))
+                    motion_file.write(f"MOTION\nFrames: {num_frames}\nFrame Time: {1.0 / fps:.6f}\n")
+                for start in range(0, num_frames, chunk):
+                    motion = self.channels(points[start:start + chunk])
+                    motion[:, :3] *= scale
+                    if file_format == "CSV":
+                        frames = np.arange(start + 1, start + len(motion) + 1)[:, None]
+                        np.savetxt(motion_file, np.hstack([frames, motion]), fmt=["%d"] + ["%.6f"] * num_channels, delimiter=",")
+                    else:
+                        np.savetxt(motion_file, motion, fmt="%.6f", delimiter=" ")
+        os.replace(temp_path, path)
+        return num_frames
+
+
+
+# -------------------------------------------------------------
+# COMMAND LINE
+# -------------------------------------------------------------
+def main(argv):
+    parser = argparse.ArgumentParser(prog="export.py", description="Export a landmark file as BVH, CSV or binary motion.")
+    parser.add_argument("landmarks", help="Landmark file (.npz) written by cli.py or the job queue.")
+    parser.add_argument("output", help="Output file. For hands, _Right and _Left are added to the name.")
+    parser.add_argument("--kind", choices=["pose", "hand"], default="pose")
+    parser.add_argument("--format", choices=list(MotionExport.FORMATS), default="BVH")
+    parser.add_argument("--scale", type=float, default=1.0, help="Factor for positions and bone lengths.")
+    parser.add_argument("--gap-fill", choices=["NONE", "LINEAR", "CUBIC"], default="LINEAR")
+    parser.add_argument("--max-gap", type=int, default=15, help="Longest gap (in frames) that is filled.")
+    parser.add_argument("--visibility-threshold", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    data, fps = processing.LandmarkFile.load(args.landmarks)
+    kinds, num_points = (["pose"], 40) if args.kind == "pose" else (["Right", "Left"], 21)
+    base, ext = os.path.splitext(args.output)
+    for kind in kinds:
+        positions, visibility = tracking.LandmarkStore.find(data, kind)
+        if not positions:
+            continue
+        points = processing.LandmarkArray.from_position_list(positions, num_points)
+        visibility = processing.LandmarkArray.from_visibility_list(visibility, num_points, len(points))
+        points, _ = processing.GapFilling.fill(points, visibility, args.visibility_threshold, args.gap_fill, args.max_gap)
+        path = args.output if kind == "pose" else f"{base}_{kind}{ext}"
+        frames = MotionExport(args.kind).write(path, processing.LandmarkArray.cv2blender(points), fps, args.format, args.scale)
+        print(f"[Open Mocap] {frames} frames written to {path}")
+
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,5 +1,9 @@
 fps = 24 
 delay = 0
+job_process = None #background process running the tracking job queue (see jobs.py)
+network_tracker = None #utils.NetworkTracking applying the landmarks of a tracking server
+merged_views = {} #"pose", "Right", "Left" -> "combined" or "triangulated" once the front view lists no longer hold single-view tracking
+quality_reports = {} #"pose", "Right", "Left" -> capture quality report (see processing.QualityReport)
 
 
 # -------------------------------------------------------------
@@ -7,12 +11,16 @@ delay = 0
 # -------------------------------------------------------------
 front_video_path = "" 
 side_video_path = "" 
-positionList = [] #each element of this list = list of [x,y,z] positions of 40 body landmarks in a given frame (front view)
+positionList = [] #each element of this list = list of [x,y,z] positions of 40 body landmarks in a given frame (front view). NaN if not detected
+visibilityList = [] #each element of this list = list of visibility (0 to 1) of 40 body landmarks in a given frame (front view). 0 if not detected
 object_list = [] #list of 40 empty objects corresponding to 40 pose landmarks
 zlist = [] #each element of this list = list of [x,y,z] positions of 40 body landmarks in a given frame (side view)
+zvisibilityList = [] #each element of this list = list of visibility (0 to 1) of 40 body landmarks in a given frame (side view)
+contactList = [] #each element of this list = foot contact (1 = planted) of left heel, left toe, right heel, right toe in a given frame. Filled on Animate
 bones_list = [] #list of bone objects
 root = None #root empty to which the skeleton rig is parented
 pose_tracker = None
+actors = {} #multi-actor tracking: actor number (1, 2, ...) -> {"positionList", "visibilityList", "contactList", "object_list", "bones_list", "root"}. Actor 0 uses the lists above
 
 
 
@@ -25,9 +33,11 @@ hand_side_video_path = ""
 hand_tracker = None
 
 # RIGHT HAND
-R_hand_positionList = [] #each element of this list = list of [x,y,z] positions of 21 right hand landmarks in a given frame (front view)
+R_hand_positionList = [] #each element of this list = list of [x,y,z] positions of 21 right hand landmarks in a given frame (front view). NaN if not detected
+R_hand_visibilityList = [] #each element of this list = list of visibility (1 = detected, 0 = not detected) of 21 right hand landmarks in a given frame (front view)
 R_hand_object_list = [] #list of 21 empty objects corresponding to 21 right hand landmarks
 R_hand_zlist = [] #each element of this list = list of [x,y,z] positions of 21 right hand landmarks in a given frame (side view)
+R_hand_zvisibilityList = [] #each element of this list = list of visibility of 21 right hand landmarks in a given frame (side view)
 R_hand_bones_list = [] #list of bone objects
 R_hand_root = None #root empty to which the right hand skeleton rig is parented
 rt_hand_lmlist_R = [] #List to hold 21 landmarks' coordinates in a given frame for realtime hand tracking
@@ -35,8 +45,10 @@ rt_hand_lmlist_R = [] #List to hold 21 landmarks' coordinates in a given frame f
 
 # LEFT HAND
 L_hand_positionList = [] 
+L_hand_visibilityList = []
 L_hand_object_list = [] 
 L_hand_zlist = []
+L_hand_zvisibilityList = []
 L_hand_bones_list = []
 L_hand_root = None
 rt_hand_lmlist_L = []
\ No newline at end of file
@@ -0,0 +1,279 @@
+"""
+    Job queue for tracking many videos, without Blender.
+    The queue is a JSON sidecar file; every job is one video + mode (kind and view).
+    A pool of worker processes runs the jobs, failed jobs are retried, and every worker saves a
+    checkpoint every few hundred frames, so an interrupted job resumes from its last completed
+    frame instead of from zero.
+
+    Usage (plain Python or Blender's Python):
+        python jobs.py add queue.json take01.mp4 --kind pose --view front
+        python jobs.py run queue.json --workers 4
+"""
+
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    from . import tracking
+    from . import processing
+    from . import calibration
+except ImportError:
+    # Run as a script or worker process outside of the add-on package
+    import tracking
+    import processing
+    import calibration
+
+
+
+# -------------------------------------------------------------
+# JOB QUEUE
+# -------------------------------------------------------------
+class JobQueue:
+    """
+        :param path: Path of the queue's JSON file.
+        :param jobs: List of job dicts with "id", "video", "kind", "view", "num_hands", "output", "cameras", "decoder",
+                    "status" (pending, running, done or failed), "attempts", "frames_done", "frames_total" and "error".
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.jobs = []
+        if os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path) as queue_file:
+            self.jobs = json.load(queue_file)["jobs"]
+
+    def save(self):
+        # Write next to the queue file and rename, so readers never see a half written file
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as queue_file:
+            json.dump({"jobs": self.jobs}, queue_file, indent=2)
+        os.replace(temp_path, self.path)
+
+    def add(self, video, kind="pose", view="front", num_hands=2, output=None, cameras=None, decoder="opencv"):
+        """
+            :param video: Path of the video to track.
+            :param kind: "pose" or "hand".
+            :param view: "front" or "side".
+            :param num_hands: Numbers of hands to track (1 or 2), hand tracking only.
+            :param output: Path of the resulting landmark file. Defaults to <video name>_<view>_<kind>.npz next to the queue.
+            :param cameras: Optional camera rig JSON; the camera named like the view removes lens distortion from the landmarks.
+            :param decoder: "opencv" or "ffmpeg" (see videoio.open_video).
+            :return: The new job.
+        """
+        if output is None:
+            name = os.path.splitext(os.path.basename(video))[0]
+            output = os.path.join(os.path.dirname(os.path.abspath(self.path)), f"{name}_{view}_{kind}.npz")
+        job = {
+            "id": max((job["id"] for job in self.jobs), default=0) + 1,
+            "video": os.path.abspath(video),
+            "kind": kind,
+            "view": view,
+            "num_hands": num_hands,
+            "output": output,
+            "cameras": os.path.abspath(cameras) if cameras else None,
+            "decoder": decoder,
+            "status": "pending",
+            "attempts": 0,
+            "frames_done": 0,
+            "frames_total": 0,
+            "error": "",
+        }
+        self.jobs.append(job)
+        self.save()
+        return job
+
+    def runnable(self, max_attempts):
+        """
+            :return: Jobs to run: pending ones, ones left "running" by an interrupted run,
+                    and failed ones that still have attempts left.
+        """
+        return [
+            job for job in self.jobs
+            if job["status"] in ("pending", "running")
+            or (job["status"] == "failed" and job["attempts"] < max_attempts)
+        ]
+
+
+
+# -------------------------------------------------------------
+# WORKERS
+# -------------------------------------------------------------
+def checkpoint_path(job):
+    return f"{job['output']}.part"
+
+
+def run_job(job, checkpoint_every, messages):
+    """
+        Tracks the video of one job, resuming from its checkpoint if there is one. Runs in a worker process.
+        :param job: The job dict.
+        :param checkpoint_every: Number of frames between two checkpoints.
+        :param messages: Queue receiving ("started", job id, 0, 0) once the worker starts the job,
+                        then ("progress", job id, frames done, frames total) messages.
+    """
+    messages.put(("started", job["id"], 0, 0))
+    camera = calibration.CameraRig.find(job["cameras"], job["view"]) if job.get("cameras") else None
+    tracker = tracking.OfflineTracker(job["video"], job["kind"], job["view"], job["num_hands"], camera,
+                                      job.get("decoder", "opencv"))
+
+    # --- Resume: the motion data lists are indexed by frame, so their length is the next frame to track ---
+    start_frame = 0
+    checkpoint = checkpoint_path(job)
+    if os.path.exists(checkpoint):
+        tracker.data, _ = processing.LandmarkFile.load(checkpoint)
+        start_frame = max((len(values) for values in tracker.data.values()), default=0)
+
+    def progress(frames):
+        if frames % checkpoint_every == 0:
+            processing.LandmarkFile.save(checkpoint, tracker.data, tracker.fps)
+            messages.put(("progress", job["id"], frames, tracker.frames_total))
+
+    data = tracker.run(progress, start_frame)
+    processing.LandmarkFile.save(job["output"], data, tracker.fps)
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    messages.put(("progress", job["id"], max((len(values) for values in data.values()), default=0), tracker.frames_total))
+
+
+def run_queue(path, workers=1, max_attempts=3, checkpoint_every=250):
+    """
+        Runs all runnable jobs of a queue with a pool of worker processes, updating the JSON file as they progress.
+        An attempt is only charged to a job once a worker started it. A worker that dies (e.g. a crash in MediaPipe)
+        breaks the whole pool: the jobs that had not started yet are run again for free, and if several jobs were
+        running, they are run again one at a time, so the next crash is charged to the job that causes it.
+        :param path: Path of the queue's JSON file.
+        :param workers: Number of worker processes.
+        :param max_attempts: Number of times a job is tried before it is marked failed.
+        :param checkpoint_every: Number of frames between two checkpoints.
+    """
+    queue = JobQueue(path)
+    jobs = {job["id"]: job for job in queue.runnable(max_attempts)}
+
+    with multiprocessing.Manager() as manager:
+        messages = manager.Queue()
+        futures = {}
+        started = set() #ids of the submitted jobs a worker has started
+        waiting = list(jobs.values()) #jobs for the next full width pool
+        pool = None
+
+        def submit(job):
+            job["status"] = "running"
+            started.discard(job["id"])
+            futures[pool.submit(run_job, dict(job), checkpoint_every, messages)] = job
+
+        try:
+            while futures or waiting:
+                if not futures:
+                    if pool is not None:
+                        pool.shutdown()
+                    pool = ProcessPoolExecutor(max_workers=workers)
+                    for job in waiting:
+                        submit(job)
+                    waiting = []
+                    queue.save()
+
+                done, _ = wait(futures, timeout=1.0, return_when=FIRST_COMPLETED)
+                broken = any(isinstance(future.exception(), BrokenProcessPool) for future in done)
+                if broken:
+                    # Every job of a broken pool fails: collect them all before deciding which one to charge
+                    done, _ = wait(futures)
+
+                # --- Job starts and per-job progress ---
+                while not messages.empty():
+                    event, job_id, frames_done, frames_total = messages.get()
+                    if event == "started":
+                        started.add(job_id)
+                        jobs[job_id]["attempts"] += 1
+                    else:
+                        jobs[job_id]["frames_done"] = frames_done
+                        jobs[job_id]["frames_total"] = frames_total
+
+                # --- A crash that started before any job did is charged to every job of the pool ---
+                if broken and not any(futures[future]["id"] in started for future in done):
+                    for future in done:
+                        started.add(futures[future]["id"])
+                        futures[future]["attempts"] += 1
+
+                # --- Finished jobs, with retries (which resume from the checkpoint) ---
+                retries = []
+                crashed = []
+                for future in done:
+                    job = futures.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        job["status"] = "done"
+                        job["error"] = ""
+                        continue
+                    if isinstance(error, BrokenProcessPool):
+                        if job["id"] not in started:
+                            retries.append(job) #the pool broke before this job started
+                            continue
+                        crashed.append(job)
+                    job["error"] = str(error) or type(error).__name__
+                    print(f"[Open Mocap] Job {job['id']} failed (attempt {job['attempts']}): {job['error']}")
+                    if job["attempts"] < max_attempts:
+                        retries.append(job)
+                    else:
+                        job["status"] = "failed"
+
+                if broken:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = None
+                    suspects = [job for job in crashed if job in retries] if len(crashed) > 1 else []
+                    waiting += [job for job in retries if job not in suspects]
+                    if suspects:
+                        # Which of the running jobs crashed is not known: they run again one at a time
+                        pool = ProcessPoolExecutor(max_workers=1)
+                        retries = suspects
+                    else:
+                        retries = []
+                for job in retries:
+                    submit(job)
+                queue.save()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+
+
+# -------------------------------------------------------------
+# COMMAND LINE
+# -------------------------------------------------------------
+def main(argv):
+    parser = argparse.ArgumentParser(prog="jobs.py", description="Open Mocap tracking job queue.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Add videos to the queue.")
+    add.add_argument("queue", help="Queue JSON file (created if missing).")
+    add.add_argument("videos", nargs="+")
+    add.add_argument("--kind", choices=["pose", "hand"], default="pose")
+    add.add_argument("--view", choices=["front", "side"], default="front")
+    add.add_argument("--num-hands", type=int, choices=[1, 2], default=2)
+    add.add_argument("--cameras", help="Camera rig JSON (see calibration.py) for lens undistortion.")
+    add.add_argument("--decoder", choices=["opencv", "ffmpeg"], default="opencv")
+
+    run = commands.add_parser("run", help="Run the queue until every job is done or failed.")
+    run.add_argument("queue")
+    run.add_argument("--workers", type=int, default=1)
+    run.add_argument("--max-attempts", type=int, default=3)
+    run.add_argument("--checkpoint-every", type=int, default=250, help="Frames between two checkpoints.")
+
+    args = parser.parse_args(argv)
+    if args.command == "add":
+        queue = JobQueue(args.queue)
+        for video in args.videos:
+            queue.add(video, args.kind, args.view, args.num_hands, cameras=args.cameras, decoder=args.decoder)
+    else:
+        run_queue(args.queue, args.workers, args.max_attempts, args.checkpoint_every)
+
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
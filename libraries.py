@@ -0,0 +1,89 @@
+"""
+    Deferred imports of the heavy external libraries. Nothing in here depends on Blender.
+
+    OpenCV, MediaPipe (with its TensorFlow Lite runtime) and cvzone take about a second to import (far more from a
+    cold disk cache), most of it MediaPipe: measured outside Blender with the versions PackageInstaller installs
+    (mediapipe 0.10.14, opencv-python 4.11.0.86, cvzone 1.6.1) on Python 3.11. The modules keep their
+    usual names (cv2, mp, PoseDetector, HandDetector) as LazyModule stand-ins, which import the real library the first
+    time they are used: starting Blender and registering the add-on import none of them.
+    Whether a library is installed is checked without importing it (see missing).
+"""
+
+import importlib
+import importlib.util
+
+
+
+# -------------------------------------------------------------
+# LAZY MODULES
+# -------------------------------------------------------------
+class LazyModule:
+    """
+        Stands in for a module (or an attribute of a module, e.g. a class) until it is first used.
+        Attribute access and calls go to the real object, imported once and then cached.
+    """
+
+    def __init__(self, name, attribute=None):
+        """
+            :param name: Module name (e.g. "cv2", "cvzone.PoseModule").
+            :param attribute: Optional name of the object in the module (e.g. "PoseDetector").
+        """
+        self.__dict__["_name"] = name
+        self.__dict__["_attribute"] = attribute
+        self.__dict__["_target"] = None
+
+    def _load(self):
+        target = self.__dict__["_target"]
+        if target is None:
+            target = importlib.import_module(self._name)
+            if self._attribute is not None:
+                target = getattr(target, self._attribute)
+            self.__dict__["_target"] = target
+        return target
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<lazy {self._name}{'.' + self._attribute if self._attribute else ''}>"
+
+
+
+# -------------------------------------------------------------
+# AVAILABILITY
+# -------------------------------------------------------------
+_installed = {} #module name -> installed (cached: the check runs in panel draw code)
+
+
+def installed(name):
+    """
+        :param name: Top level module name (e.g. "cv2").
+        :return: True if the module can be imported. Checked without importing it.
+    """
+    if name not in _installed:
+        try:
+            _installed[name] = importlib.util.find_spec(name) is not None
+        except (ImportError, ValueError):
+            _installed[name] = False
+    return _installed[name]
+
+
+def missing(*names):
+    """:return: True if any of the modules is not installed."""
+    return not all(installed(name) for name in names)
+
+
+def refresh():
+    """Forgets the cached availability, after packages were installed or removed."""
+    _installed.clear()
+    importlib.invalidate_caches()
+
+
+
+cv2 = LazyModule("cv2")
+mp = LazyModule("mediapipe")
+PoseDetector = LazyModule("cvzone.PoseModule", "PoseDetector")
+HandDetector = LazyModule("cvzone.HandTrackingModule", "HandDetector")
@@ -2,14 +2,30 @@
     All the necessary operators for the addon are here.
     The operators in order are as follows:
     1) Main operators:
-    StartTracking, StopTracking, CombineMotionData, AnimatePose, AnimateHand, BakeMotion
+    StartTracking, StopTracking, StartNetworkTracking, CombineMotionData, TriangulateViews, AnimatePose, AnimateHand, RetrackRange, BakeMotion,
+    ExportMotion
     2) Helper operators:
     ClearMoCapCache, VideoSelect,  ClearVideoPath, ToggleCopyRotationConstraints, HideSkeleton
+    3) Video preview operators:
+    ScrubPreview
+    4) Capture quality report operators:
+    CaptureReport, ExportCaptureReport
+    5) Job queue operators:
+    AddTrackingJobs, RunJobQueue, LoadJobResult
 """
 
+import os
+import sys
 import bpy
-import math
+import time
+import subprocess
+import numpy as np
+from . import jobs
+from . import export
 from . import utils
+from . import tracking
+from . import processing
+from . import calibration
 from mathutils import Vector
 from . import globalVariables as gvar
 
@@ -27,10 +43,90 @@ class StartTracking(bpy.types.Operator):
         :param track: Helps in deciding whether tracking pose or hand, 
                         whether tracking offline or realtime 
                         and whether tracking from front view or from side view
+        Offline tracking keeps the operator running (modal) while the tracker works in the background
+        (timers or the tracker subprocess), with progress, fps, ETA and missed detections in the status bar.
+        Esc cancels and keeps the frames tracked so far.
     """
 
+    def invoke(self, context, event):
+        return self.execute(context)
 
     def execute(self, context):
+        result = self.start(context)
+        tracker = gvar.pose_tracker if self.track.endswith("pose") else gvar.hand_tracker
+        if result != {'FINISHED'} or self.track.startswith("rt") or tracker is None or not tracker.running:
+            return result
+        if bpy.app.background or context.window is None:
+            return result
+
+        # --- Follow the tracker until it finishes or is cancelled ---
+        self.tracker = tracker
+        self.start_time = time.perf_counter()
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(0.25, window=context.window)
+        wm.progress_begin(0, max(tracker.frames_total, 1))
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            self.tracker.stop()
+            if gvar.pose_tracker is self.tracker:
+                gvar.pose_tracker = None
+            elif gvar.hand_tracker is self.tracker:
+                gvar.hand_tracker = None
+            self.finish(context)
+            self.report({'WARNING'}, f"Tracking cancelled. Kept {self.tracker.frame_index} tracked frames.")
+            return {'CANCELLED'}
+
+        if event.type == 'TIMER':
+            if not self.tracker.running:
+                self.finish(context)
+                if getattr(self.tracker, "error", ""):
+                    self.report({'ERROR'}, f"{self.tracker.error} Kept {self.tracker.frame_index} tracked frames.")
+                    return {'CANCELLED'}
+                self.report({'INFO'}, f"Tracking finished: {self.tracker.frame_index} frames, "
+                                      f"{self.tracker.missed} without detection.")
+                return {'FINISHED'}
+            self.update_progress(context)
+        return {'PASS_THROUGH'}
+
+    def update_progress(self, context):
+        """Shows frames tracked, fps, ETA and missed detections in the status bar."""
+        done, total = self.tracker.frame_index, self.tracker.frames_total
+        fps = done / max(time.perf_counter() - self.start_time, 1e-6)
+        text = f"Tracking {self.track}: frame {done}"
+        if total:
+            context.window_manager.progress_update(min(done, total))
+            eta = (total - done) / fps if fps > 0 else 0
+            text += f"/{total}, ETA {int(eta // 60)}:{int(eta % 60):02d}"
+        text += f", {fps:.1f} fps, {self.tracker.missed} without detection (Esc to cancel)"
+        context.workspace.status_text_set(text)
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def start(self, context):
+        """Creates the tracker of this mode, which starts tracking right away."""
+        if not self.track.startswith("side"):
+            # The front view lists hold single-view tracking again
+            for kind in (("pose",) if self.track.endswith("pose") else ("Right", "Left")):
+                gvar.merged_views.pop(kind, None)
+        # --- Tracking in a subprocess, results shared through shared memory ---
+        if context.scene.tracking_subprocess:
+            tracker = utils.ProcessTracking(context, self.track)
+            if not tracker.running:
+                self.report({'ERROR'}, "Could not start the tracker process (no video selected or camera unavailable).")
+                return {'CANCELLED'}
+            if self.track.endswith("pose"):
+                gvar.pose_tracker = tracker
+            else:
+                gvar.hand_tracker = tracker
+            return {'FINISHED'}
+
         if self.track == "front_pose":
             gvar.pose_tracker = utils.PoseTracking("front_pose")
 
@@ -88,6 +184,11 @@ class StopTracking(bpy.types.Operator):
             gvar.hand_tracker.stop()
             gvar.hand_tracker = None
 
+        #stop receiving from a tracking server if running
+        elif gvar.network_tracker is not None:
+            gvar.network_tracker.stop()
+            gvar.network_tracker = None
+
         else:
             self.report({'WARNING'}, "No tracking running")
 
@@ -95,6 +196,45 @@ class StopTracking(bpy.types.Operator):
     
 
 
+class StartNetworkTracking(bpy.types.Operator):
+    bl_idname = "object.start_network_tracking"
+    bl_label = "Start Network Tracking"
+    bl_description = "Receives the landmarks of a tracking server (server.py) and applies them to the empties."
+
+    kind: bpy.props.StringProperty(default="pose")
+    """
+        Detection runs out of Blender's process: server.py (or a second Blender with Network Output)
+        sends the landmarks, Blender stores them and moves the empties as they arrive.
+        :param kind: "pose" or "hand": the rig that is created (or reused) for the received landmarks.
+    """
+
+    def execute(self, context):
+        if gvar.network_tracker is not None:
+            self.report({'WARNING'}, "Network tracking is already running")
+            return {'CANCELLED'}
+
+        # --- Empties to drive ---
+        if self.kind == "pose":
+            utils.PoseRig.get(context, 0, reuse=True)
+        else:
+            for prefix in ("R", "L"):
+                if not AnimateHand.hand_exists(self, prefix):
+                    AnimateHand.create_hand(self, context, prefix)
+                else:
+                    AnimateHand.load_hand(self, prefix)
+
+        try:
+            gvar.network_tracker = utils.NetworkTracking(context)
+        except OSError as error:
+            self.report({'ERROR'}, f"Cannot listen on port {context.scene.network_port}: {error}")
+            return {'CANCELLED'}
+
+        if not context.screen.is_animation_playing:
+            bpy.ops.screen.animation_play()
+        return {'FINISHED'}
+
+
+
 class CombineMotionData(bpy.types.Operator):
     bl_idname = "object.combine_data"
     bl_label = "Combine Motion Data"
@@ -129,20 +269,39 @@ class CombineMotionData(bpy.types.Operator):
             combined.append(frame_front)
 
         return combined
+
+    def combine_visibility(self, front_visibility, side_visibility):
+        """
+            A combined landmark is only as reliable as the less visible of its two views.
+            :param front_visibility: Visibility data from front view.
+            :param side_visibility: Visibility data from side view.
+            :return: The combined visibility data.
+        """
+        min_frames = min(len(front_visibility), len(side_visibility))
+        return [
+            [min(front, side) for front, side in zip(front_visibility[f], side_visibility[f])]
+            for f in range(min_frames)
+        ]
     
     def execute(self, context):
 
         if self.mode == "pose":
             gvar.positionList = self.combine_lists(gvar.positionList, gvar.zlist, 40)
+            gvar.visibilityList = self.combine_visibility(gvar.visibilityList, gvar.zvisibilityList)
+            gvar.merged_views["pose"] = "combined"
 
         elif self.mode == "hand":
             # Right hand
             if gvar.R_hand_positionList and gvar.R_hand_zlist:
                 gvar.R_hand_positionList = self.combine_lists(gvar.R_hand_positionList, gvar.R_hand_zlist, 21)
+                gvar.R_hand_visibilityList = self.combine_visibility(gvar.R_hand_visibilityList, gvar.R_hand_zvisibilityList)
+                gvar.merged_views["Right"] = "combined"
 
             # Left hand
             if gvar.L_hand_positionList and gvar.L_hand_zlist:
                 gvar.L_hand_positionList = self.combine_lists(gvar.L_hand_positionList, gvar.L_hand_zlist, 21)
+                gvar.L_hand_visibilityList = self.combine_visibility(gvar.L_hand_visibilityList, gvar.L_hand_zvisibilityList)
+                gvar.merged_views["Left"] = "combined"
 
         else:
             self.report({'WARNING'}, f"Unknown mode: {self.mode}")
@@ -151,6 +310,88 @@ class CombineMotionData(bpy.types.Operator):
 
 
 
+class TriangulateViews(bpy.types.Operator):
+    bl_idname = "object.triangulate_views"
+    bl_label = "Triangulate Views"
+    bl_description = "Reconstructs metric 3D motion data from any number of calibrated camera views."
+
+    mode: bpy.props.StringProperty()
+    """
+        Unlike CombineMotionData (two orthogonal views, side x copied into front z), it triangulates every
+        landmark from all the cameras of the camera rig file (see calibration.py) and stores the result
+        as the front view motion data, ready for Animate.
+        Cameras with a "landmarks" file use it (e.g. from the job queue), cameras named "front" and "side"
+        without one use the motion data tracked in Blender.
+        :param mode: Tells whether pose data is triangulated or hand tracking data is triangulated.
+    """
+
+    def camera_data(self, camera, kind):
+        """
+            :param camera: Camera dict from calibration.CameraRig.
+            :param kind: "pose", "Right" or "Left".
+            :return: (positions list, visibility list) tracked by this camera.
+        """
+        if camera.get("landmarks"):
+            data, _ = processing.LandmarkFile.load(bpy.path.abspath(camera["landmarks"]))
+            return tracking.LandmarkStore.find(data, kind)
+        if camera["name"] in ("front", "side"):
+            positions, visibility = tracking.LandmarkStore.names(kind, camera["name"])
+            return getattr(gvar, positions), getattr(gvar, visibility)
+        return [], []
+
+    def triangulate(self, context, cameras, kind, num_points):
+        """
+            :return: (positions list, visibility list) of the triangulated landmarks, number of cameras used,
+                    or None if fewer than two cameras have motion data.
+        """
+        views = []
+        for camera in cameras:
+            position_list, visibility_list = self.camera_data(camera, kind)
+            if position_list:
+                views.append((camera, position_list, visibility_list))
+        if len(views) < 2:
+            return None
+
+        num_frames = min(len(position_list) for _, position_list, _ in views)
+        pixels, visibility, projections = [], [], []
+        for camera, position_list, visibility_list in views:
+            points = processing.LandmarkArray.from_position_list(position_list[:num_frames], num_points)
+            pixels.append(processing.LandmarkArray.to_pixels(points, camera["size"]))
+            visibility.append(processing.LandmarkArray.from_visibility_list(visibility_list, num_points, num_frames))
+            projections.append(processing.Triangulation.projection_matrix(camera))
+
+        points, points_visibility = processing.Triangulation.dlt(
+            pixels, visibility, projections, context.scene.visibility_threshold
+        )
+        return points.reshape(num_frames, -1).tolist(), points_visibility.tolist(), len(views)
+
+    def execute(self, context):
+        path = bpy.path.abspath(context.scene.camera_rig_path)
+        if not os.path.exists(path):
+            self.report({'ERROR'}, f"Camera rig file not found: {path}")
+            return {'CANCELLED'}
+        cameras = calibration.CameraRig.load(path)
+
+        kinds = [("pose", 40)] if self.mode == "pose" else [("Right", 21), ("Left", 21)]
+        triangulated = []
+        for kind, num_points in kinds:
+            result = self.triangulate(context, cameras, kind, num_points)
+            if result is None:
+                continue
+            positions, visibility = tracking.LandmarkStore.names(kind, "front")
+            setattr(gvar, positions, result[0])
+            setattr(gvar, visibility, result[1])
+            gvar.merged_views[kind] = "triangulated"
+            triangulated.append(f"{kind} from {result[2]}")
+
+        if not triangulated:
+            self.report({'WARNING'}, "At least two cameras with motion data are needed.")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Triangulated {', '.join(triangulated)} of {len(cameras)} camera(s).")
+        return {'FINISHED'}
+
+
+
 class AnimatePose(bpy.types.Operator):
     bl_idname = "object.animate_obj"
     bl_label = "Animate Pose"
@@ -161,76 +402,93 @@ class AnimatePose(bpy.types.Operator):
         Creates a root empty and parent all 40 empties to this.
         Creates a skeleton with these 40 empties and adds keyframes for 40 empties with the motion data.
         This animates the skeleton automatically.
+        With multi-actor tracking, every actor gets its own root, empties and skeleton
+        (RigRoot_A1, A1_0 ... A1_39, and so on; actor 0 keeps the single-actor names).
     """
 
-    def execute(self, context):
-        gvar.bones_list.clear()
-        gvar.object_list.clear()
-        # --- Get or create collection ---
-        pose_empties_collection = utils.BlenderUtility.create_collection(context,"PoseEmpties")
-        root_collection = utils.BlenderUtility.create_collection(context,"RootEmpties")
-
-        # --- Create root empty ---
-        root = bpy.data.objects.new("RigRoot", None)
-        root.empty_display_type = 'SPHERE'
-        root.empty_display_size = 1
-        root_collection.objects.link(root)
-        gvar.root = root
-
-        # --- Create empties ---
-        for i in range(40):
-            empty = bpy.data.objects.new(name=str(i), object_data=None)
-            empty.empty_display_size = 0.1
-            empty.empty_display_type = 'SPHERE'
-            pose_empties_collection.objects.link(empty)
-            empty.parent = gvar.root
-            gvar.object_list.append(empty)
-
-        # --- Define bone pairs ---
-        bone_pairs = [
-            (7,8), (11,12), (23,24), (16,35), (15,36),
-            (11,13), (13,15), (33,34), (38,39),
-            (12,14), (14,16), (34,37),
-            (24,26), (26,28), (28,32),
-            (23,25), (25,27), (27,31)
-        ]
+    reuse_rig: bpy.props.BoolProperty(default=False)
+    upgrade: bpy.props.BoolProperty(default=False)
+    range_start: bpy.props.IntProperty(default=0)
+    range_end: bpy.props.IntProperty(default=0)
+    """
+        :param reuse_rig: Key the pose empties already in the scene (e.g. from a template .blend with a rig
+                            constrained to them) instead of creating a new skeleton.
+        :param upgrade: Re-key the scene's animation range at full rate on the existing rig, keeping the keys
+                        outside of it (e.g. after animating a proxy of a long take).
+        :param range_start: First scene frame to animate, used instead of the Frame Range setting if range_end is set.
+        :param range_end: Last scene frame to animate (0 = use the Frame Range setting).
+    """
 
-        # --- Create skeleton (with default Y tracking) ---
-        bones_created = utils.Skeleton.create_skeleton(context, bone_pairs, "pose")
-        # --- Apply configuration-specific adjustments ---
-        # --- These adjustments help in smooth motion retargeting for specific bones---
-        track_x_pairs = {(7,8), (11,12), (23,24)}
-        rotate_y_pairs = {(12,14),(11,13),(13,15),(14,16), (16,35), (15,36),}
-        for a, b, obj in bones_created:
-            #Adjust tracking axis for specific pairs
-            if (a, b) in track_x_pairs:
-                for constraint in obj.constraints:
-                    if constraint.type == 'DAMPED_TRACK':
-                        constraint.track_axis = 'TRACK_NEGATIVE_X'
-                        break
-            # Rotate if needed
-            if (a, b) in rotate_y_pairs:
-                obj.rotation_euler.rotate_axis('Y', math.radians(180))
+    def sample_frames(self, context, num_frames):
+        """
+            :param num_frames: Number of tracked frames.
+            :return: (source frame indices to key, whether they only cover part of the capture)
+        """
+        scene = context.scene
+        first, last = 0, num_frames
+        if self.range_end > 0:
+            first = min(max(self.range_start - 1, 0), num_frames)
+            last = min(max(self.range_end, first), num_frames)
+        elif scene.animate_use_range:
+            first = min(max(scene.animate_frame_start - 1, 0), num_frames)
+            last = min(max(scene.animate_frame_end, first), num_frames)
+        step = 1 if self.upgrade else scene.proxy_step
+        return np.arange(first, last, step), (first, last) != (0, num_frames)
 
-        # --- Keyframe insertion ---
+    def execute(self, context):
         num_frames = len(gvar.positionList)
         context.scene.frame_start = 1
         context.scene.frame_end = num_frames
         context.scene.render.fps = int(gvar.fps)
 
-        for frame_index, frame in enumerate(gvar.positionList, start=1):
-            context.scene.frame_set(frame_index)
+        indices, partial = self.sample_frames(context, num_frames)
+        written, total = 0, 0
+        for actor in [0] + sorted(gvar.actors):
+            actor_written, actor_total = self.animate_actor(context, actor, indices, partial)
+            written += actor_written
+            total += actor_total
+        self.report({'INFO'}, processing.KeyframeReduction.summary(written, total))
 
-            for i in range(40):
-                location = utils.MathUtility.cv2blender_coordinates([frame[0 + (i * 3)],frame[1 + (i * 3)],frame[2 + (i * 3)]])
-                obj = gvar.object_list[i]
-                local_pos = Vector(location) - gvar.root.location
-                obj.location = local_pos
-                obj.keyframe_insert(data_path="location", frame=frame_index)
-
-        bpy.ops.screen.animation_play()
+        if not bpy.app.background:
+            bpy.ops.screen.animation_play()
         return {'FINISHED'}
 
+    def animate_actor(self, context, actor, indices, partial):
+        """
+            Creates (or reuses) the rig of one actor and keys its empties with its motion data.
+            :param actor: Actor number (0 for single-actor tracking).
+            :param indices: Source frame indices to key (a range, possibly decimated for a proxy).
+            :param partial: The indices only cover part of the capture: keep the rig's keys outside of them.
+            :return: (keyframes written, keyframes without reduction)
+        """
+        scene = context.scene
+        root, object_list = utils.PoseRig.get(context, actor, self.reuse_rig or self.upgrade or partial)
+        store = utils.PoseRig.actor_lists(actor)
+        indices = indices[indices < len(store["positionList"])]
+        if len(indices) == 0:
+            return 0, 0
+
+        # --- Only the frames around the range are processed, unless a setting needs the whole capture ---
+        whole_capture = scene.auto_scale or scene.constant_bone_lengths or scene.foot_locking
+        if whole_capture:
+            start, end = 0, len(store["positionList"])
+        else:
+            start = max(indices[0] - scene.max_gap - 2, 0)
+            end = min(indices[-1] + scene.max_gap + 3, len(store["positionList"]))
+        locations = utils.BlenderUtility.capture_locations(
+            context, store["positionList"][start:end], store["visibilityList"][start:end], 40
+        )
+        if scene.foot_locking:
+            contact, ground = processing.FootContact.detect(locations, gvar.fps)
+            locations = processing.FootContact.lock(locations, contact, ground)
+            store["contactList"][:] = contact.astype(np.float64).tolist()
+
+        # --- Keyframe insertion ---
+        locations = locations[indices - start] - np.array(root.location)
+        return utils.BlenderUtility.keyframe_locations(
+            object_list, locations, indices + 1, scene.keyframe_tolerance, splice=partial or self.upgrade
+        )
+
 
 
 class AnimateHand(bpy.types.Operator):
@@ -238,7 +496,13 @@ class AnimateHand(bpy.types.Operator):
     bl_label = "Animate Hand"
     bl_description = "Animates a skeleton with the tracked hand motion data."
     mode: bpy.props.StringProperty()
-    """ Creates left/right hand(s) and animates them (realtime/offline)"""
+    range_start: bpy.props.IntProperty(default=0)
+    range_end: bpy.props.IntProperty(default=0)
+    """
+        Creates left/right hand(s) and animates them (realtime/offline)
+        :param range_start: Offline only: first scene frame to re-key, keeping the keys outside the range.
+        :param range_end: Offline only: last scene frame to re-key (0 = key the whole capture).
+    """
 
     def create_hand(self, context, prefix):
         """
@@ -262,16 +526,6 @@ class AnimateHand(bpy.types.Operator):
         root_collection = utils.BlenderUtility.create_collection(context,"RootEmpties")
         hand_empties_collection = utils.BlenderUtility.create_collection(context, f"{hand_name}HandEmpties")
 
-        bone_pairs = [
-            (0,1),(1,2),(2,3),(3,4),
-            (5,6),(6,7),(7,8),
-            (9,10),(10,11),(11,12),
-            (13,14),(14,15),(15,16),
-            (17,18),(18,19),(19,20),
-            (0,5),(0,9),(0,13),(0,17),
-            (5,9),(9,13),(13,17),(1,5)
-        ]
-
         # ---------------Create Empty Root------------------
         root = bpy.data.objects.new(f"{hand_name}HandRoot", None)
         root.empty_display_type = 'SPHERE'
@@ -292,9 +546,9 @@ class AnimateHand(bpy.types.Operator):
             object_list.append(empty)
 
         if prefix == "R":
-            utils.Skeleton.create_skeleton(context, bone_pairs, "R_hand")
+            utils.Skeleton.create_skeleton(context, processing.HAND_BONE_PAIRS, "R_hand")
         else:
-            utils.Skeleton.create_skeleton(context, bone_pairs, "L_hand")
+            utils.Skeleton.create_skeleton(context, processing.HAND_BONE_PAIRS, "L_hand")
 
 
     def hand_exists(self, prefix):
@@ -319,6 +573,22 @@ class AnimateHand(bpy.types.Operator):
         return True
 
 
+    def load_hand(self, prefix):
+        """
+            Picks up an existing hand (e.g. from a reopened .blend file) whose empties are not in globalVariables yet.
+            :param prefix: R for right hand and L for left hand
+        """
+        hand_name = "Right" if prefix == "R" else "Left"
+        root = bpy.data.objects[f"{hand_name}HandRoot"]
+        empties = [bpy.data.objects[f"{prefix}_h{i}"] for i in range(21)]
+        if prefix == "R":
+            gvar.R_hand_root = root
+            gvar.R_hand_object_list = empties
+        else:
+            gvar.L_hand_root = root
+            gvar.L_hand_object_list = empties
+
+
     def execute(self, context):
         if self.mode == "realtime":
             num_hands = context.scene.num_hands
@@ -339,10 +609,14 @@ class AnimateHand(bpy.types.Operator):
             # --- Create Right Hand ---
             if not self.hand_exists("R"):
                 self.create_hand(context, "R")
+            elif not gvar.R_hand_object_list:
+                self.load_hand("R")
 
             # --- Create Left Hand ---
             if not self.hand_exists("L"):
                 self.create_hand(bpy.context, "L")
+            elif not gvar.L_hand_object_list:
+                self.load_hand("L")
 
             # --- Determine total frame range ---
             num_frames_R = len(gvar.R_hand_positionList)
@@ -352,35 +626,42 @@ class AnimateHand(bpy.types.Operator):
             context.scene.frame_end = total_frames
             context.scene.render.fps = int(gvar.fps)
 
-            # --- Animate Right Hand ---
-            if gvar.R_hand_object_list and num_frames_R > 0:
-                for frame_index, frame in enumerate(gvar.R_hand_positionList, start=1):
-                    context.scene.frame_set(frame_index)
-                    for i in range(21):
-                        loc = utils.MathUtility.cv2blender_coordinates([
-                            frame[i*3], frame[i*3+1], frame[i*3+2]
-                        ])
-                        obj = gvar.R_hand_object_list[i]
-                        obj.location = Vector(loc) - gvar.R_hand_root.location
-                        obj.keyframe_insert(data_path="location", frame=frame_index)
-
-            # --- Animate Left Hand ---
-            if gvar.L_hand_object_list and num_frames_L > 0:
-                for frame_index, frame in enumerate(gvar.L_hand_positionList, start=1):
-                    context.scene.frame_set(frame_index)
-                    for i in range(21):
-                        loc = utils.MathUtility.cv2blender_coordinates([
-                            frame[i*3], frame[i*3+1], frame[i*3+2]
-                        ])
-                        obj = gvar.L_hand_object_list[i]
-                        obj.location = Vector(loc) - gvar.L_hand_root.location
-                        obj.keyframe_insert(data_path="location", frame=frame_index)
+            # --- Source frames to key (a range is spliced into the existing keys) ---
+            indices = np.arange(total_frames)
+            if self.range_end > 0:
+                first = min(max(self.range_start - 1, 0), total_frames)
+                indices = np.arange(first, min(max(self.range_end, first), total_frames))
+
+            # --- Animate both hands in one pass on the shared (source frame) timeline ---
+            hands = [
+                (gvar.R_hand_object_list, gvar.R_hand_positionList, gvar.R_hand_visibilityList, gvar.R_hand_root),
+                (gvar.L_hand_object_list, gvar.L_hand_positionList, gvar.L_hand_visibilityList, gvar.L_hand_root),
+            ]
+            objects = []
+            locations = []
+            for object_list, position_list, visibility_list, root in hands:
+                if not object_list or not position_list:
+                    continue
+                hand_locations = np.full((total_frames, 21, 3), np.nan)
+                tracked = utils.BlenderUtility.capture_locations(context, position_list, visibility_list, 21)
+                hand_locations[:len(tracked)] = tracked - np.array(root.location)
+                objects.extend(object_list)
+                locations.append(hand_locations)
+
+            written, total = 0, 0
+            if objects and len(indices):
+                written, total = utils.BlenderUtility.keyframe_locations(
+                    objects, np.concatenate(locations, axis=1)[indices], indices + 1,
+                    context.scene.keyframe_tolerance, splice=self.range_end > 0
+                )
 
             # --- Playback ---
-            tracked_R = bool(gvar.R_hand_positionList)
-            tracked_L = bool(gvar.L_hand_positionList)
-            self.report({'INFO'}, f"Hand animation complete. (Right: {tracked_R}, Left: {tracked_L})")
-            bpy.ops.screen.animation_play()
+            tracked_R = any(any(frame) for frame in gvar.R_hand_visibilityList)
+            tracked_L = any(any(frame) for frame in gvar.L_hand_visibilityList)
+            self.report({'INFO'}, f"Hand animation complete. (Right: {tracked_R}, Left: {tracked_L}) "
+                                  + processing.KeyframeReduction.summary(written, total))
+            if not bpy.app.background:
+                bpy.ops.screen.animation_play()
         return {'FINISHED'}
     
     def animate_realtime(self):
@@ -399,20 +680,121 @@ class AnimateHand(bpy.types.Operator):
         # --- Animate Right Hand ---
         if gvar.R_hand_object_list and len(gvar.rt_hand_lmlist_R) > 0:
             for i, point in enumerate(gvar.rt_hand_lmlist_R):
-                loc = utils.MathUtility.cv2blender_coordinates(point)
+                loc = tracking.MathUtility.cv2blender_coordinates(point)
                 obj = gvar.R_hand_object_list[i]
                 obj.location = Vector(loc) - gvar.R_hand_root.location
 
         # --- Animate Left Hand ---
         if gvar.L_hand_object_list and len(gvar.rt_hand_lmlist_L) > 0:
             for i, point in enumerate(gvar.rt_hand_lmlist_L):
-                loc = utils.MathUtility.cv2blender_coordinates(point)
+                loc = tracking.MathUtility.cv2blender_coordinates(point)
                 obj = gvar.L_hand_object_list[i]
                 obj.location = Vector(loc) - gvar.L_hand_root.location
         utils.VideoPlaneManager.update_frame(img)
         return gvar.delay
 
 
+class RetrackRange(bpy.types.Operator):
+    bl_idname = "object.retrack_range"
+    bl_label = "Re-track Range"
+    bl_description = "Tracks a frame range of the video again and replaces that range of the capture and of the animation."
+
+    kind: bpy.props.StringProperty(default="pose")
+    view: bpy.props.StringProperty(default="front")
+    """
+        Runs detection again on the Re-track range only, optionally with another detection confidence
+        and within a region of the frame, and splices the result into the capture cache.
+        If the views were combined (Combine Data), the range is combined again, so the depth stays from the side view.
+        Triangulated captures are refused: their single-view data is gone, the views have to be tracked and triangulated again.
+        If the rig is animated, only the keys of the range are replaced.
+        :param kind: "pose" or "hand".
+        :param view: "front" or "side".
+    """
+
+    def execute(self, context):
+        scene = context.scene
+        if self.kind == "pose":
+            path = gvar.front_video_path if self.view == "front" else gvar.side_video_path
+        else:
+            path = gvar.hand_front_video_path if self.view == "front" else gvar.hand_side_video_path
+        if not path or not os.path.exists(path):
+            self.report({'WARNING'}, "Select the video first.")
+            return {'CANCELLED'}
+        kinds = ("pose",) if self.kind == "pose" else ("Right", "Left")
+        if any(gvar.merged_views.get(kind) == "triangulated" for kind in kinds):
+            self.report({'ERROR'}, "This capture was triangulated: track the views again and press Triangulate Views.")
+            return {'CANCELLED'}
+
+        # --- Scene frame n is source frame n - 1 ---
+        start = max(scene.retrack_frame_start - 1, 0)
+        end = max(scene.retrack_frame_end, start + 1)
+        camera = None
+        if scene.undistort_landmarks:
+            camera = calibration.CameraRig.find(bpy.path.abspath(scene.camera_rig_path), self.view)
+        tracker = tracking.OfflineTracker(
+            path, self.kind, self.view, scene.num_hands, camera, scene.video_decoder.lower(),
+            roi=tuple(scene.retrack_roi) if scene.retrack_use_roi else None,
+            detection_confidence=scene.retrack_confidence
+        )
+
+        wm = context.window_manager
+        wm.progress_begin(start, end)
+        try:
+            data = tracker.run(wm.progress_update, start_frame=start, end_frame=end)
+        except RuntimeError as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+        finally:
+            wm.progress_end()
+
+        # --- Splice the re-tracked frames into the capture cache ---
+        empty, hidden = tracking.LandmarkStore.empty(self.kind)
+        tracked = 0
+        for kind in kinds:
+            for name, default in zip(tracking.LandmarkStore.names(kind, self.view), (empty, hidden)):
+                values = data.get(name, [])
+                for frame_index in range(start, len(values)):
+                    tracking.LandmarkStore.put(getattr(gvar, name), frame_index, values[frame_index], default)
+                tracked = max(tracked, len(values) - start)
+        if tracked == 0:
+            self.report({'WARNING'}, "The range is outside of the video.")
+            return {'CANCELLED'}
+
+        # --- Combined views: combine the range again, the depth comes from the side view ---
+        combined = [kind for kind in kinds if gvar.merged_views.get(kind) == "combined"]
+        for kind in combined:
+            self.recombine(kind, start, start + tracked)
+
+        # --- Replace the keys of the range only (the front view drives the rig) ---
+        if self.view == "side" and not combined:
+            self.report({'INFO'}, f"Re-tracked side frames {start + 1} to {start + tracked}. Combine Data to use them.")
+            return {'FINISHED'}
+        if self.kind == "pose" and utils.PoseRig.exists(0):
+            bpy.ops.object.animate_obj(upgrade=True, range_start=start + 1, range_end=start + tracked)
+        elif self.kind == "hand" and AnimateHand.hand_exists(self, "R") and AnimateHand.hand_exists(self, "L"):
+            bpy.ops.object.animatehand(mode="offline", range_start=start + 1, range_end=start + tracked)
+
+        self.report({'INFO'}, f"Re-tracked frames {start + 1} to {start + tracked}.")
+        return {'FINISHED'}
+
+    def recombine(self, kind, start, end):
+        """
+            Combines the frames [start, end) of the front and side view again (see CombineMotionData).
+            :param kind: "pose", "Right" or "Left".
+        """
+        positions, visibility = tracking.LandmarkStore.names(kind, "front")
+        side_positions, side_visibility = tracking.LandmarkStore.names(kind, "side")
+        front, side = getattr(gvar, positions), getattr(gvar, side_positions)
+        end = min(end, len(front), len(side))
+        if end <= start:
+            return
+        front[start:end] = CombineMotionData.combine_lists(self, front[start:end], side[start:end], 40 if kind == "pose" else 21)
+        front_visibility, side_visibility = getattr(gvar, visibility), getattr(gvar, side_visibility)
+        end = min(end, len(front_visibility), len(side_visibility))
+        front_visibility[start:end] = CombineMotionData.combine_visibility(self, front_visibility[start:end], side_visibility[start:end])
+
+
+
 class BakeMotion(bpy.types.Operator):
     bl_idname = "object.bake_motion"
     bl_label = "Bake Motion"
@@ -480,6 +862,67 @@ class BakeMotion(bpy.types.Operator):
 
 
 
+class ExportMotion(bpy.types.Operator):
+    bl_idname = "object.export_motion"
+    bl_label = "Export Motion"
+    bl_description = "Writes the tracked motion as BVH, CSV or binary joint rotations, without creating any scene objects."
+
+    kind: bpy.props.StringProperty()
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    """
+        The capture cleanup settings (gap filling, auto scale, constant bone lengths, foot locking) are applied
+        as on Animate, then the joint rotations are computed from the landmark arrays (see export.py).
+        :param kind: "pose" or "hand". Hands are written to <name>_Right and <name>_Left,
+                        extra actors of multi-actor tracking to <name>_A1, <name>_A2, ...
+        :param filepath: Output file. The extension follows the Export Format setting.
+    """
+
+    def targets(self):
+        """:return: List of (file name suffix, positions list, visibility list) to export."""
+        if self.kind == "pose":
+            actors = [0] + sorted(gvar.actors)
+            stores = [(actor, utils.PoseRig.actor_lists(actor)) for actor in actors]
+            return [(f"_A{actor}" if actor else "", store["positionList"], store["visibilityList"]) for actor, store in stores]
+        targets = []
+        for kind in ("Right", "Left"):
+            positions, visibility = tracking.LandmarkStore.names(kind, "front")
+            targets.append((f"_{kind}", getattr(gvar, positions), getattr(gvar, visibility)))
+        return targets
+
+    def execute(self, context):
+        scene = context.scene
+        num_points = 40 if self.kind == "pose" else 21
+        base = os.path.splitext(bpy.path.abspath(self.filepath))[0]
+        extension = export.MotionExport.FORMATS[scene.export_format]
+        motion = export.MotionExport(self.kind)
+
+        written = []
+        for suffix, position_list, visibility_list in self.targets():
+            if not position_list:
+                continue
+            locations = utils.BlenderUtility.capture_locations(context, position_list, visibility_list, num_points)
+            if self.kind == "pose" and scene.foot_locking:
+                contact, ground = processing.FootContact.detect(locations, gvar.fps)
+                locations = processing.FootContact.lock(locations, contact, ground)
+            path = f"{base}{suffix}{extension}"
+            frames = motion.write(path, locations, gvar.fps, scene.export_format, scene.export_scale)
+            written.append(path)
+            print(f"[Open Mocap] {frames} frames written to {path}")
+
+        if not written:
+            self.report({'WARNING'}, "No tracked data. Track a video first.")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Motion exported to {', '.join(os.path.basename(path) for path in written)}")
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = "motion" + export.MotionExport.FORMATS[context.scene.export_format]
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+
 # -------------------------------------------------------------
 # HELPER OPERATORS
 # -------------------------------------------------------------
@@ -498,19 +941,33 @@ class ClearMoCapCache(bpy.types.Operator):
     def execute(self,context):
         if self.cache == "pose":
             gvar.positionList.clear()
+            gvar.visibilityList.clear()
             gvar.zlist.clear()
+            gvar.zvisibilityList.clear()
+            gvar.contactList.clear()
             gvar.object_list.clear()
             gvar.bones_list.clear()
+            gvar.actors.clear()
+            gvar.quality_reports.pop("pose", None)
+            gvar.merged_views.pop("pose", None)
             self.report({'INFO'}, "Body Motion Capture data cleared.")
         else:
             gvar.R_hand_positionList.clear()
+            gvar.R_hand_visibilityList.clear()
             gvar.R_hand_zlist.clear()
+            gvar.R_hand_zvisibilityList.clear()
             gvar.R_hand_object_list.clear()
             gvar.R_hand_bones_list.clear()
             gvar.L_hand_positionList.clear()
+            gvar.L_hand_visibilityList.clear()
             gvar.L_hand_zlist.clear()
+            gvar.L_hand_zvisibilityList.clear()
             gvar.L_hand_object_list.clear()
             gvar.L_hand_bones_list.clear()
+            gvar.quality_reports.pop("Right", None)
+            gvar.quality_reports.pop("Left", None)
+            gvar.merged_views.pop("Right", None)
+            gvar.merged_views.pop("Left", None)
             self.report({'INFO'}, "Hand Motion Capture data cleared.")
         return {'FINISHED'}
 
@@ -641,5 +1098,229 @@ class HideSkeleton(bpy.types.Operator):
 
 
 
-classes = [StartTracking, StopTracking, CombineMotionData, AnimatePose, AnimateHand, BakeMotion,
-           ClearMoCapCache, VideoSelect,  ClearVideoPath, ToggleCopyRotationConstraints, HideSkeleton]
\ No newline at end of file
+# -------------------------------------------------------------
+# VIDEO PREVIEW OPERATORS
+# -------------------------------------------------------------
+class ScrubPreview(bpy.types.Operator):
+    bl_idname = "object.scrub_preview"
+    bl_label = "Preview Video on Timeline"
+    bl_description = "Shows the frame of the source video at the current frame on a plane while scrubbing. Press again to hide it."
+
+    video: bpy.props.StringProperty()
+    """
+        :param video: "pose" or "hand": which front video to show.
+    """
+
+    def execute(self, context):
+        if utils.PreviewScrubber.running():
+            utils.PreviewScrubber.stop()
+            return {'FINISHED'}
+
+        path = gvar.front_video_path if self.video == "pose" else gvar.hand_front_video_path
+        if not path or not os.path.exists(path):
+            self.report({'WARNING'}, "Select a video first.")
+            return {'CANCELLED'}
+        if utils.libraries.missing("cv2"):
+            self.report({'ERROR'}, "OpenCV (cv2) is not installed! Install via the Addon Preferences first.")
+            return {'CANCELLED'}
+        # The first preview of a video builds its frame index (cached for later)
+        utils.PreviewScrubber.start(context, path)
+        return {'FINISHED'}
+
+
+
+# -------------------------------------------------------------
+# CAPTURE QUALITY REPORT OPERATORS
+# -------------------------------------------------------------
+class CaptureReport(bpy.types.Operator):
+    bl_idname = "object.capture_report"
+    bl_label = "Capture Quality Report"
+    bl_description = "Computes detection rate, jitter, bone length spread and front/side agreement of the tracked data."
+
+    mode: bpy.props.StringProperty()
+    """
+        Works on the raw tracked data (before gap filling and cleanup), so it shows what the tracker delivered
+        and where to re-track, before animating. The reports are kept in gvar.quality_reports for the panel.
+        :param mode: "pose" or "hand" (one report per hand).
+    """
+
+    def execute(self, context):
+        scene = context.scene
+        if self.mode == "pose":
+            kinds, num_points, bones = ["pose"], 40, processing.POSE_BONE_PAIRS
+        else:
+            kinds, num_points, bones = ["Right", "Left"], 21, processing.HAND_BONE_PAIRS
+
+        for kind in kinds:
+            gvar.quality_reports.pop(kind, None)
+            positions, visibility = tracking.LandmarkStore.names(kind, "front")
+            side_positions, side_visibility = tracking.LandmarkStore.names(kind, "side")
+            position_list = getattr(gvar, positions)
+            if not position_list:
+                continue
+            points = processing.LandmarkArray.from_position_list(position_list, num_points)
+            side_list = getattr(gvar, side_positions)
+            side_points = processing.LandmarkArray.from_position_list(side_list, num_points) if side_list else None
+            gvar.quality_reports[kind] = processing.QualityReport.compute(
+                points,
+                processing.LandmarkArray.from_visibility_list(getattr(gvar, visibility), num_points, len(points)),
+                bones, gvar.fps, scene.visibility_threshold, side_points,
+                processing.LandmarkArray.from_visibility_list(getattr(gvar, side_visibility), num_points, len(side_list)),
+            )
+
+        reports = [kind for kind in kinds if kind in gvar.quality_reports]
+        if not reports:
+            self.report({'WARNING'}, "No tracked data. Track a video first.")
+            return {'CANCELLED'}
+        for kind in reports:
+            print(f"[Open Mocap] {kind}: " + " | ".join(processing.QualityReport.summary(gvar.quality_reports[kind])))
+        self.report({'INFO'}, processing.QualityReport.summary(gvar.quality_reports[reports[0]])[0])
+        return {'FINISHED'}
+
+
+
+class ExportCaptureReport(bpy.types.Operator):
+    bl_idname = "object.export_capture_report"
+    bl_label = "Export Quality Report"
+    bl_description = "Saves the capture quality reports as a JSON file."
+
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+    """
+        :param filepath: Output .json file.
+        :param filter_glob: Shows only JSON files in the file browser.
+    """
+
+    def execute(self, context):
+        if not gvar.quality_reports:
+            self.report({'WARNING'}, "Compute a quality report first.")
+            return {'CANCELLED'}
+        path = bpy.path.ensure_ext(self.filepath, ".json")
+        processing.QualityReport.save(path, gvar.quality_reports)
+        self.report({'INFO'}, f"Quality report saved to {path}")
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = "capture_report.json"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+
+# -------------------------------------------------------------
+# JOB QUEUE OPERATORS
+# -------------------------------------------------------------
+class AddTrackingJobs(bpy.types.Operator):
+    bl_idname = "object.add_tracking_jobs"
+    bl_label = "Add to Job Queue"
+    bl_description = "Adds the selected videos to the tracking job queue."
+
+    kind: bpy.props.StringProperty()
+    """
+        :param kind: "pose" or "hand". Adds a job for the front video and, if selected, the side video.
+    """
+
+    def execute(self, context):
+        if self.kind == "pose":
+            videos = [(gvar.front_video_path, "front"), (gvar.side_video_path, "side")]
+        else:
+            videos = [(gvar.hand_front_video_path, "front"), (gvar.hand_side_video_path, "side")]
+
+        if context.scene.job_queue_path.startswith("//") and not bpy.data.filepath:
+            self.report({'ERROR'}, "Save the .blend file first, or choose an absolute Job Queue path.")
+            return {'CANCELLED'}
+
+        queue = jobs.JobQueue(bpy.path.abspath(context.scene.job_queue_path))
+        cameras = bpy.path.abspath(context.scene.camera_rig_path) if context.scene.undistort_landmarks else None
+        added = 0
+        for path, view in videos:
+            if path:
+                queue.add(path, self.kind, view, context.scene.num_hands, cameras=cameras,
+                          decoder=context.scene.video_decoder.lower())
+                added += 1
+
+        if not added:
+            self.report({'WARNING'}, "Select a video first.")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"{added} job(s) added to {queue.path}")
+        return {'FINISHED'}
+
+
+
+class RunJobQueue(bpy.types.Operator):
+    bl_idname = "object.run_job_queue"
+    bl_label = "Run Job Queue"
+    bl_description = "Tracks all pending jobs of the queue in background worker processes."
+
+    """
+        The queue runs in a separate Python process (jobs.py) with a pool of workers,
+        so Blender stays responsive. Interrupted jobs resume from their last checkpoint.
+    """
+
+    def execute(self, context):
+        if gvar.job_process is not None and gvar.job_process.poll() is None:
+            self.report({'WARNING'}, "The job queue is already running.")
+            return {'CANCELLED'}
+
+        path = bpy.path.abspath(context.scene.job_queue_path)
+        if not os.path.exists(path):
+            self.report({'WARNING'}, "The job queue is empty.")
+            return {'CANCELLED'}
+
+        script = os.path.join(os.path.dirname(__file__), "jobs.py")
+        gvar.job_process = subprocess.Popen(
+            [sys.executable, script, "run", path, "--workers", str(context.scene.job_workers)]
+        )
+        bpy.app.timers.register(RunJobQueue.poll_progress, first_interval=1.0)
+        self.report({'INFO'}, "Job queue started. Check Blender console for progress.")
+        return {'FINISHED'}
+
+    @staticmethod
+    def poll_progress():
+        """Redraws the panels while the queue is running so progress stays up to date."""
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == 'VIEW_3D':
+                    area.tag_redraw()
+        if gvar.job_process is None or gvar.job_process.poll() is not None:
+            gvar.job_process = None
+            return None
+        return 1.0
+
+
+
+class LoadJobResult(bpy.types.Operator):
+    bl_idname = "object.load_job_result"
+    bl_label = "Load Job Result"
+    bl_description = "Loads the motion data of a finished job into the capture cache."
+
+    job_id: bpy.props.IntProperty()
+    """
+        :param job_id: Id of the finished job. Its motion data replaces the cached data of the same kind and view.
+    """
+
+    def execute(self, context):
+        queue = jobs.JobQueue(bpy.path.abspath(context.scene.job_queue_path))
+        job = next((job for job in queue.jobs if job["id"] == self.job_id), None)
+        if job is None or job["status"] != "done":
+            self.report({'ERROR'}, "This job has not finished.")
+            return {'CANCELLED'}
+
+        data, fps = processing.LandmarkFile.load(job["output"])
+        for name, values in data.items():
+            setattr(gvar, name, values)
+        for kind in ("pose", "Right", "Left"):
+            if tracking.LandmarkStore.names(kind, "front")[0] in data:
+                gvar.merged_views.pop(kind, None)
+        gvar.fps = fps
+        self.report({'INFO'}, f"Loaded {os.path.basename(job['video'])} ({job['kind']}, {job['view']} view).")
+        return {'FINISHED'}
+
+
+
+classes = [StartTracking, StopTracking, StartNetworkTracking, CombineMotionData, TriangulateViews, AnimatePose, AnimateHand, RetrackRange, BakeMotion,
+           ExportMotion,
+           ClearMoCapCache, VideoSelect,  ClearVideoPath, ToggleCopyRotationConstraints, HideSkeleton, ScrubPreview,
+           CaptureReport, ExportCaptureReport,
+           AddTrackingJobs, RunJobQueue, LoadJobResult]
\ No newline at end of file
@@ -1,4 +1,7 @@
+import os
 import bpy
+from . import jobs
+from . import processing
 from . import globalVariables as gvar
 from .PackageInstaller import check_required_packages
 
@@ -11,6 +14,12 @@ class OpenMocapAddonPreferences(bpy.types.AddonPreferences):
     bl_idname = __package__
     REQUIRED_PACKAGES = ["mediapipe", "opencv-python", "cvzone"]
 
+    warm_up_detectors: bpy.props.BoolProperty(
+        name="Warm Up Detectors",
+        description="Load the pose and hand models in the background when the add-on is enabled, so the first tracking session starts faster",
+        default=False
+    )
+
     def draw(self, context):
         layout = self.layout
         col = layout.column(align=True)
@@ -23,10 +32,38 @@ class OpenMocapAddonPreferences(bpy.types.AddonPreferences):
             col.operator("addon.install_dependencies", text="Install Dependencies", icon="CONSOLE")
         else:
             col.label(text="All dependencies are installed.", icon="CHECKMARK")
+            col.prop(self, "warm_up_detectors")
             #col.operator("addon.uninstall_dependencies", text="Uninstall Dependencies", icon="TRASH")
 
 
 
+def draw_retrack(layout, scene, kind):
+    """Re-track Range settings and buttons, shared by the pose and hand panels."""
+    layout.label(text="Re-track Range")
+    row = layout.row(align=True)
+    row.prop(scene, "retrack_frame_start", text="Start")
+    row.prop(scene, "retrack_frame_end", text="End")
+    layout.prop(scene, "retrack_confidence")
+    layout.prop(scene, "retrack_use_roi")
+    if scene.retrack_use_roi:
+        layout.prop(scene, "retrack_roi")
+    op = layout.operator("object.retrack_range", text="Re-track Range", icon='FILE_REFRESH')
+    op.kind, op.view = kind, "front"
+    if scene.multi_view_tracking:
+        op = layout.operator("object.retrack_range", text="Re-track Range (Side)", icon='FILE_REFRESH')
+        op.kind, op.view = kind, "side"
+
+
+
+def draw_export(layout, scene, kind):
+    """Motion Export settings and button, shared by the pose and hand panels."""
+    layout.label(text="Motion Export")
+    layout.prop(scene, "export_format")
+    layout.prop(scene, "export_scale")
+    layout.operator("object.export_motion", text="Export Motion", icon='EXPORT').kind = kind
+
+
+
 # -------------------------------------------------------------
 #UI PANEL FOR POSE TRACKING
 # -------------------------------------------------------------
@@ -42,6 +79,14 @@ class PoseTrackingPanel(bpy.types.Panel):
         scene = context.scene
         layout = self.layout
         layout.prop(scene, "multi_view_tracking")
+        layout.prop(scene, "undistort_landmarks")
+        if scene.multi_view_tracking or scene.undistort_landmarks:
+            layout.prop(scene, "camera_rig_path")
+        layout.prop(scene, "video_decoder")
+        layout.prop(scene, "tracking_subprocess")
+        layout.prop(scene, "num_actors")
+        if scene.num_actors > 1:
+            layout.prop(scene, "pose_model_path")
         #layout.label(text="Realtime Pose-tracking")
         #layout.operator("object.start_tracking", text="Start RealTime Pose Tracking", icon='PLAY').track = "rt_pose"
         #layout.operator("object.stop_tracking", text="Stop Pose Tracking", icon='PAUSE').mode = "realtime"
@@ -57,8 +102,12 @@ class PoseTrackingPanel(bpy.types.Panel):
             layout.operator("object.open_mocap_filebrowser", text="Select Front Video", icon='FILEBROWSER').video = "front_video_pose"
         else:
             layout.operator("object.open_mocap_filebrowser", text="Select Video", icon='FILEBROWSER').video = "front_video_pose"
+        layout.prop(scene, "stream_keyframes")
+        if scene.stream_keyframes:
+            layout.prop(scene, "stream_batch")
         layout.operator("object.start_tracking", text="Start Pose Tracking", icon='PLAY').track = "front_pose"
         layout.operator("object.clear_video_path", text="Delete Video", icon='X').video = "front_video_pose"
+        layout.operator("object.scrub_preview", text="Preview Video on Timeline", icon='SEQUENCE').video = "pose"
 
         #Side Video
         if scene.multi_view_tracking:
@@ -76,7 +125,30 @@ class PoseTrackingPanel(bpy.types.Panel):
         layout.operator("object.stop_tracking", text="Stop Pose Tracking", icon='PAUSE')
         if scene.multi_view_tracking:
             layout.operator("object.combine_data", text="Combine Data", icon='PLUS').mode = "pose"
+            layout.operator("object.triangulate_views", text="Triangulate Views", icon='CAMERA_DATA').mode = "pose"
+        layout.prop(scene, "gap_fill_method")
+        layout.prop(scene, "max_gap")
+        layout.prop(scene, "visibility_threshold")
+        layout.prop(scene, "auto_scale")
+        if scene.auto_scale:
+            layout.prop(scene, "target_height")
+        layout.prop(scene, "constant_bone_lengths")
+        if scene.constant_bone_lengths:
+            layout.prop(scene, "bone_length_iterations")
+        layout.prop(scene, "foot_locking")
+        layout.prop(scene, "keyframe_tolerance")
+        layout.prop(scene, "animate_use_range")
+        if scene.animate_use_range:
+            row = layout.row(align=True)
+            row.prop(scene, "animate_frame_start")
+            row.prop(scene, "animate_frame_end")
+        layout.prop(scene, "proxy_step")
         layout.operator("object.animate_obj", text="Animate", icon='RENDER_ANIMATION')
+        if scene.proxy_step > 1:
+            layout.operator("object.animate_obj", text="Upgrade Range to Full Rate", icon='FILE_REFRESH').upgrade = True
+        layout.separator()
+        draw_retrack(layout, scene, "pose")
+        layout.separator()
         layout.operator("object.hide_skeleton", text="Hide/Unhide Empties", icon='HIDE_OFF').collection_name = "PoseEmpties"
         layout.operator("object.hide_skeleton", text="Hide/Unhide Skeleton", icon='HIDE_OFF').collection_name = "PoseSkeleton"
         layout.operator("object.clear_mocap_cache", text="Clear Capture Cache", icon='TRASH').cache = "pose"
@@ -96,6 +168,8 @@ class PoseTrackingPanel(bpy.types.Panel):
         op.frame_start = scene.bake_frame_start
         op.frame_end = scene.bake_frame_end
         op.only_selected_bones = scene.bake_only_selected
+        layout.separator()
+        draw_export(layout, scene, "pose")
 
 
 
@@ -122,7 +196,12 @@ class HandTrackingPanel(bpy.types.Panel):
             layout.operator("object.stop_tracking", text="Stop Hand Tracking", icon='PAUSE').mode = "realtime"
         layout.separator()
         layout.label(text="Offline Hand-tracking")
+        layout.prop(scene, "video_decoder")
+        layout.prop(scene, "tracking_subprocess")
         layout.prop(scene, "multi_view_tracking")
+        layout.prop(scene, "undistort_landmarks")
+        if scene.multi_view_tracking or scene.undistort_landmarks:
+            layout.prop(scene, "camera_rig_path")
 
         #Front Video
         if scene.multi_view_tracking:
@@ -136,6 +215,7 @@ class HandTrackingPanel(bpy.types.Panel):
         
         layout.operator("object.start_tracking", text="Start Hand Tracking", icon='PLAY').track = "front_hand"
         layout.operator("object.clear_video_path", text="Delete Video", icon='X').video = "front_video_hand"
+        layout.operator("object.scrub_preview", text="Preview Video on Timeline", icon='SEQUENCE').video = "hand"
 
         #Side Video
         if scene.multi_view_tracking:
@@ -153,7 +233,20 @@ class HandTrackingPanel(bpy.types.Panel):
         layout.operator("object.stop_tracking", text="Stop Hand Tracking", icon='PAUSE')
         if scene.multi_view_tracking:
             layout.operator("object.combine_data", text="Combine Data", icon='PLUS').mode = "hand"
+            layout.operator("object.triangulate_views", text="Triangulate Views", icon='CAMERA_DATA').mode = "hand"
+        layout.prop(scene, "gap_fill_method")
+        layout.prop(scene, "max_gap")
+        layout.prop(scene, "auto_scale")
+        if scene.auto_scale:
+            layout.prop(scene, "target_height")
+        layout.prop(scene, "constant_bone_lengths")
+        if scene.constant_bone_lengths:
+            layout.prop(scene, "bone_length_iterations")
+        layout.prop(scene, "keyframe_tolerance")
         layout.operator("object.animatehand", text="Animate", icon='RENDER_ANIMATION').mode = "offline"
+        layout.separator()
+        draw_retrack(layout, scene, "hand")
+        layout.separator()
         layout.operator("object.clear_mocap_cache", text="Clear Capture Cache", icon='TRASH').cache = "hand"
         layout.operator("object.hide_skeleton", text="Hide/Unhide R_Empties", icon='HIDE_OFF').collection_name = "RightHandEmpties"
         layout.operator("object.hide_skeleton", text="Hide/Unhide R_Skeleton", icon='HIDE_OFF').collection_name = "RightHandSkeleton"
@@ -177,7 +270,131 @@ class HandTrackingPanel(bpy.types.Panel):
         op.frame_start = scene.bake_frame_start
         op.frame_end = scene.bake_frame_end
         op.only_selected_bones = scene.bake_only_selected
+        layout.separator()
+        draw_export(layout, scene, "hand")
+
+
+
+# -------------------------------------------------------------
+#UI PANEL FOR THE CAPTURE QUALITY REPORT
+# -------------------------------------------------------------
+class QualityReportPanel(bpy.types.Panel):
+    bl_label = "Capture Quality"
+    bl_idname = "Capture_Quality_Panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Open Mocap"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        row = layout.row(align=True)
+        row.operator("object.capture_report", text="Report Pose", icon='INFO').mode = "pose"
+        row.operator("object.capture_report", text="Report Hands", icon='INFO').mode = "hand"
+        if not gvar.quality_reports:
+            return
+        layout.operator("object.export_capture_report", text="Export JSON", icon='EXPORT')
+
+        for kind, report in gvar.quality_reports.items():
+            box = layout.box()
+            box.label(text="Pose" if kind == "pose" else f"{kind} Hand", icon='ARMATURE_DATA')
+            for line in processing.QualityReport.summary(report):
+                box.label(text=line)
+            if report["worst_ranges"]:
+                box.label(text="Worst frame ranges:")
+            for worst in report["worst_ranges"]:
+                box.label(text=f"  {worst['frame_start']}-{worst['frame_end']}: detected {worst['detection_rate']:.0%}", icon='ERROR')
+
+
+
+# -------------------------------------------------------------
+#UI PANEL FOR LIVE NETWORK OUTPUT
+# -------------------------------------------------------------
+class NetworkPanel(bpy.types.Panel):
+    bl_label = "Network Streaming"
+    bl_idname = "Network_Streaming_Panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Open Mocap"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        scene = context.scene
+        layout = self.layout
+        layout.prop(scene, "network_output")
+        if scene.network_output:
+            layout.prop(scene, "network_protocol")
+            row = layout.row(align=True)
+            row.prop(scene, "network_host")
+            row.prop(scene, "network_port")
+        layout.separator()
+        layout.label(text="Network Tracking (server.py)")
+        row = layout.row(align=True)
+        row.prop(scene, "network_bind_address")
+        row.prop(scene, "network_port")
+        layout.operator("object.start_network_tracking", text="Receive Pose", icon='PLAY').kind = "pose"
+        layout.operator("object.start_network_tracking", text="Receive Hands", icon='PLAY').kind = "hand"
+        layout.operator("object.stop_tracking", text="Stop Network Tracking", icon='PAUSE')
+
+
+
+# -------------------------------------------------------------
+#UI PANEL FOR THE TRACKING JOB QUEUE
+# -------------------------------------------------------------
+class JobQueuePanel(bpy.types.Panel):
+    bl_label = "Job Queue"
+    bl_idname = "Job_Queue_Panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Open Mocap"
+    bl_options = {'DEFAULT_CLOSED'}
+    queues = {} #queue file path -> (modification time, job rows or error text), so a redraw does not parse it again
+
+    @staticmethod
+    def job_rows(path):
+        """
+            :param path: Path of the queue's JSON file.
+            :return: List of (label, job id if the job is done else None), or the error text if the file cannot be read.
+        """
+        modified = None #unknown: read again on the next redraw
+        try:
+            modified = os.stat(path).st_mtime_ns
+            cached = JobQueuePanel.queues.get(path)
+            if cached is not None and cached[0] == modified:
+                return cached[1]
+            rows = []
+            for job in jobs.JobQueue(path).jobs:
+                progress = f"{job['frames_done']}/{job['frames_total']}" if job["frames_total"] else ""
+                label = f"{os.path.basename(job['video'])} ({job['kind']}, {job['view']}) {job['status']} {progress}"
+                rows.append((label, job["id"] if job["status"] == "done" else None))
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            rows = f"Cannot read the queue: {type(error).__name__} {error}"
+        JobQueuePanel.queues[path] = (modified, rows)
+        return rows
+
+    def draw(self, context):
+        scene = context.scene
+        layout = self.layout
+        layout.prop(scene, "job_queue_path")
+        layout.prop(scene, "job_workers")
+        layout.operator("object.add_tracking_jobs", text="Add Pose Videos", icon='ADD').kind = "pose"
+        layout.operator("object.add_tracking_jobs", text="Add Hand Videos", icon='ADD').kind = "hand"
+        layout.operator("object.run_job_queue", text="Run Queue", icon='PLAY')
+
+        path = bpy.path.abspath(scene.job_queue_path)
+        if not os.path.exists(path):
+            return
+        layout.separator()
+        rows = JobQueuePanel.job_rows(path)
+        if isinstance(rows, str):
+            layout.label(text=rows, icon='ERROR')
+            return
+        for label, job_id in rows:
+            row = layout.row()
+            row.label(text=label)
+            if job_id is not None:
+                row.operator("object.load_job_result", text="", icon='IMPORT').job_id = job_id
 
 
 
-classes = [OpenMocapAddonPreferences, PoseTrackingPanel, HandTrackingPanel]
\ No newline at end of file
+classes = [OpenMocapAddonPreferences, PoseTrackingPanel, HandTrackingPanel, QualityReportPanel, NetworkPanel, JobQueuePanel]
\ No newline at end of file
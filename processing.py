@@ -0,0 +1,713 @@
+"""
+    Capture-level processing of the tracked motion data.
+    Everything in here works on a whole capture at once with NumPy arrays,
+    so it does not depend on Blender and stays cheap even for long captures.
+"""
+
+import os
+import json
+import warnings
+import numpy as np
+
+
+
+# -------------------------------------------------------------
+# SKELETON TOPOLOGY
+# -------------------------------------------------------------
+# (a, b) landmark index pairs of the bones created by AnimatePose and AnimateHand
+POSE_BONE_PAIRS = [
+    (7,8), (11,12), (23,24), (16,35), (15,36),
+    (11,13), (13,15), (33,34), (38,39),
+    (12,14), (14,16), (34,37),
+    (24,26), (26,28), (28,32),
+    (23,25), (25,27), (27,31)
+]
+HAND_BONE_PAIRS = [
+    (0,1),(1,2),(2,3),(3,4),
+    (5,6),(6,7),(7,8),
+    (9,10),(10,11),(11,12),
+    (13,14),(14,15),(15,16),
+    (17,18),(18,19),(19,20),
+    (0,5),(0,9),(0,13),(0,17),
+    (5,9),(9,13),(13,17),(1,5)
+]
+
+
+
+# -------------------------------------------------------------
+# LANDMARK ARRAY CONVERSION
+# -------------------------------------------------------------
+class LandmarkArray:
+    @staticmethod
+    def from_position_list(position_list, num_points):
+        """
+            :param position_list: List of frames, each a flat [x,y,z,x,y,z,...] list (e.g. gvar.positionList).
+            :param num_points: Number of landmarks per frame (40 for pose, 21 for a hand).
+            :return: Array of shape (frames, num_points, 3).
+        """
+        if not position_list:
+            return np.zeros((0, num_points, 3))
+        return np.asarray(position_list, dtype=np.float64).reshape(len(position_list), num_points, 3)
+
+    @staticmethod
+    def cv2blender(points):
+        """
+            Vectorized version of MathUtility.cv2blender_coordinates.
+            :param points: Array (..., 3) as per OpenCV's convention.
+            :return: Array (..., 3) as per Blender's convention.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        return np.stack([points[..., 0], points[..., 2], -points[..., 1]], axis=-1)
+
+    @staticmethod
+    def from_visibility_list(visibility_list, num_points, num_frames):
+        """
+            :param visibility_list: List of frames, each a list of per-landmark visibility (e.g. gvar.visibilityList).
+            :param num_points: Number of landmarks per frame.
+            :param num_frames: Number of frames of the matching position list.
+            :return: Array of shape (num_frames, num_points). Frames without visibility data count as fully visible.
+        """
+        visibility = np.ones((num_frames, num_points))
+        count = min(len(visibility_list), num_frames)
+        if count:
+            visibility[:count] = np.asarray(visibility_list[:count], dtype=np.float64)
+        return visibility
+
+    @staticmethod
+    def to_pixels(points, frame_size):
+        """
+            Inverse of MathUtility.normalize_coordinates for x and y.
+            :param points: Array (..., 3) of normalized landmarks.
+            :param frame_size: (width, height) of the video the landmarks were tracked on.
+            :return: Array (..., 2) of pixel coordinates.
+        """
+        width, height = frame_size
+        points = np.asarray(points, dtype=np.float64)
+        return np.stack([points[..., 0] * 100 + width / 2, points[..., 1] * 100 + height], axis=-1)
+
+
+
+# -------------------------------------------------------------
+# GAP FILLING
+# -------------------------------------------------------------
+class GapFilling:
+    @staticmethod
+    def fill(points, visibility, threshold=0.5, method="LINEAR", max_gap=15):
+        """
+            Fills the frames where a landmark was not detected (or detected with low visibility)
+            by interpolating between the surrounding valid frames, for all landmarks at once.
+            :param points: Array (frames, landmarks, 3). NaN marks a missing landmark.
+            :param visibility: Array (frames, landmarks) of visibility from 0 to 1.
+            :param threshold: Landmarks below this visibility are treated as missing.
+            :param method: "NONE", "LINEAR" or "CUBIC" (Hermite spline through the gap borders).
+            :param max_gap: Longest gap (in frames) that is filled. Longer gaps and gaps at the
+                            start or end of the capture are left empty (NaN).
+            :return: (filled points, boolean array (frames, landmarks) of valid landmarks after filling)
+        """
+        points = np.array(points, dtype=np.float64)
+        num_frames, num_points = points.shape[:2]
+        valid = (np.asarray(visibility) >= threshold) & ~np.isnan(points).any(axis=2)
+        points[~valid] = np.nan
+        if method == "NONE" or num_frames == 0:
+            return points, valid
+
+        # --- Previous and next valid frame of every sample ---
+        frame_index = np.arange(num_frames)[:, None]
+        prev_valid = np.maximum.accumulate(np.where(valid, frame_index, -1), axis=0)
+        next_valid = np.minimum.accumulate(np.where(valid, frame_index, num_frames)[::-1], axis=0)[::-1]
+        fillable = (~valid & (prev_valid >= 0) & (next_valid < num_frames)
+                    & (next_valid - prev_valid - 1 <= max_gap))
+        if not fillable.any():
+            return points, valid
+
+        landmark_index = np.broadcast_to(np.arange(num_points), valid.shape)
+        prev_valid = np.clip(prev_valid, 0, num_frames - 1)
+        next_valid = np.clip(next_valid, 0, num_frames - 1)
+        start = points[prev_valid, landmark_index]
+        end = points[next_valid, landmark_index]
+        span = np.maximum(next_valid - prev_valid, 1)[..., None]
+        s = (frame_index - prev_valid)[..., None] / span
+
+        if method == "CUBIC":
+            # Tangents from the valid frames just outside the gap, falling back to the chord
+            before = np.clip(prev_valid - 1, 0, num_frames - 1)
+            after = np.clip(next_valid + 1, 0, num_frames - 1)
+            has_before = ((prev_valid - 1 >= 0) & valid[before, landmark_index])[..., None]
+            has_after = ((next_valid + 1 < num_frames) & valid[after, landmark_index])[..., None]
+            chord = end - start
+            start_tangent = np.where(has_before, (start - points[before, landmark_index]) * span, chord)
+            end_tangent = np.where(has_after, (points[after, landmark_index] - end) * span, chord)
+            s2 = s * s
+            s3 = s2 * s
+            filled = ((2 * s3 - 3 * s2 + 1) * start + (s3 - 2 * s2 + s) * start_tangent
+                      + (3 * s2 - 2 * s3) * end + (s3 - s2) * end_tangent)
+        else:
+            filled = start + (end - start) * s
+
+        points[fillable] = filled[fillable]
+        return points, valid | fillable
+
+
+
+# -------------------------------------------------------------
+# AUTOMATIC SCALE
+# -------------------------------------------------------------
+class AutoScale:
+    # Bones whose length should not change during a capture (pose: limbs, shoulders, hips, torso sides)
+    POSE_BONES = [(11,13), (13,15), (12,14), (14,16), (23,25), (25,27), (24,26), (26,28),
+                  (11,12), (23,24), (11,23), (12,24)]
+    HAND_BONES = [(0,1), (1,2), (2,3), (3,4), (5,6), (6,7), (7,8), (9,10), (10,11), (11,12),
+                  (13,14), (14,15), (15,16), (17,18), (18,19), (19,20), (0,5), (0,9), (0,13), (0,17)]
+    # Segments from eyes to ankles (left and right averaged), about 0.897 of the body height when standing
+    POSE_HEIGHT_CHAIN = [[(39,34)], [(34,33)], [(23,25), (24,26)], [(25,27), (26,28)]]
+    POSE_HEIGHT_RATIO = 0.897
+    # Wrist to middle finger tip, about 0.108 of the body height
+    HAND_HEIGHT_CHAIN = [[(0,9)], [(9,10)], [(10,11)], [(11,12)]]
+    HAND_HEIGHT_RATIO = 0.108
+    Z_SCALES = np.geomspace(0.25, 16.0, 49) #candidate z scales, relative to the tracked z
+
+    @staticmethod
+    def bone_vectors(points, bones):
+        """
+            :param points: Array (frames, landmarks, 3).
+            :param bones: List of (a, b) landmark index pairs.
+            :return: Array (frames, bones, 3) of b - a.
+        """
+        bones = np.asarray(bones)
+        return points[:, bones[:, 1]] - points[:, bones[:, 0]]
+
+    @staticmethod
+    def z_scale(points, bones):
+        """
+            The tracked depth (z) is far less reliable than x and y and comes with an arbitrary divisor.
+            The z scale is chosen so that the bone lengths vary the least over the whole capture
+            (sum of the bones' median absolute deviation relative to their median length), for all
+            candidate scales at once.
+            :param points: Array (frames, landmarks, 3). NaN marks a missing landmark.
+            :param bones: List of (a, b) landmark index pairs.
+            :return: Factor for z.
+        """
+        vectors = AutoScale.bone_vectors(points, bones)
+        planar = (vectors[..., :2] ** 2).sum(axis=-1)
+        depth = vectors[..., 2] ** 2
+        scales = AutoScale.Z_SCALES[:, None, None]
+        lengths = np.sqrt(planar + scales ** 2 * depth) #(scales, frames, bones)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning) #bones never seen give NaN
+            median = np.nanmedian(lengths, axis=1, keepdims=True)
+            spread = np.nanmedian(np.abs(lengths - median), axis=1) / median[:, 0]
+            cost = np.nansum(spread, axis=1)
+        if not np.isfinite(cost).any() or np.ptp(cost[np.isfinite(cost)]) < 1e-9:
+            return 1.0
+        # Ties are broken towards the tracked scale
+        cost = np.where(np.isfinite(cost), cost, np.inf) + 1e-9 * np.abs(np.log(AutoScale.Z_SCALES))
+        return float(AutoScale.Z_SCALES[np.argmin(cost)])
+
+    @staticmethod
+    def estimate(points, target_height):
+        """
+            Estimates the scale of a whole capture from robust (median) bone lengths.
+            :param points: Array (frames, landmarks, 3) of pose (40) or hand (21) landmarks. NaN marks a missing landmark.
+            :param target_height: Height of the performer, in scene units (e.g. 1.75 for meters).
+            :return: (factor for z, uniform factor for x, y and z applied after the z factor)
+        """
+        if points.shape[1] == 40:
+            bones, chain, ratio = AutoScale.POSE_BONES, AutoScale.POSE_HEIGHT_CHAIN, AutoScale.POSE_HEIGHT_RATIO
+        else:
+            bones, chain, ratio = AutoScale.HAND_BONES, AutoScale.HAND_HEIGHT_CHAIN, AutoScale.HAND_HEIGHT_RATIO
+        if len(points) == 0:
+            return 1.0, 1.0
+
+        z_scale = AutoScale.z_scale(points, bones)
+        scaled = points * np.array([1.0, 1.0, z_scale])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            segments = [
+                np.nanmean(np.nanmedian(np.linalg.norm(AutoScale.bone_vectors(scaled, segment), axis=-1), axis=0))
+                for segment in chain
+            ]
+        height = np.sum(segments) / ratio
+        if not np.isfinite(height) or height <= 0:
+            return z_scale, 1.0
+        return z_scale, target_height / height
+
+    @staticmethod
+    def apply(points, z_scale, scale):
+        """:return: Array (..., 3) with z multiplied by z_scale, then everything by scale."""
+        return np.asarray(points) * np.array([scale, scale, scale * z_scale])
+
+
+
+# -------------------------------------------------------------
+# BONE LENGTH CONSTRAINTS
+# -------------------------------------------------------------
+class BoneLengths:
+    @staticmethod
+    def rest_lengths(points, bones):
+        """
+            :param points: Array (frames, landmarks, 3). NaN marks a missing landmark.
+            :param bones: List of (a, b) landmark index pairs.
+            :return: Array (bones,) of the median length of every bone over the capture (NaN if never seen).
+        """
+        bones = np.asarray(bones)
+        lengths = np.linalg.norm(points[:, bones[:, 1]] - points[:, bones[:, 0]], axis=-1)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return np.nanmedian(lengths, axis=0)
+
+    @staticmethod
+    def solve(points, bones, visibility=None, iterations=10):
+        """
+            Projects every frame onto bones of constant (rest) length, so limbs stop stretching between frames.
+            Each iteration moves the two ends of every bone in turn along the bone (Gauss-Seidel), for all frames at once.
+            The less visible end moves more, so well tracked landmarks stay where they were seen.
+            :param points: Array (frames, landmarks, 3). NaN marks a missing landmark.
+            :param bones: List of (a, b) landmark index pairs.
+            :param visibility: Optional array (frames, landmarks) of visibility from 0 to 1.
+            :param iterations: Number of passes over all bones.
+            :return: Array (frames, landmarks, 3) with constant bone lengths.
+        """
+        points = np.array(points, dtype=np.float64)
+        if len(points) == 0:
+            return points
+        rest = BoneLengths.rest_lengths(points, bones)
+        if visibility is None:
+            visibility = np.ones(points.shape[:2])
+        inverse_mass = 1.0 / (np.clip(np.asarray(visibility, dtype=np.float64), 0.0, 1.0) + 0.1)
+
+        for _ in range(iterations):
+            for (a, b), length in zip(bones, rest):
+                if not np.isfinite(length):
+                    continue
+                delta = points[:, b] - points[:, a]
+                current = np.linalg.norm(delta, axis=-1)
+                active = np.isfinite(current) & (current > 1e-9)
+                if not active.any():
+                    continue
+                w_a = inverse_mass[active, a]
+                w_b = inverse_mass[active, b]
+                correction = ((current[active] - length) / current[active])[:, None] * delta[active]
+                points[active, a] += (w_a / (w_a + w_b))[:, None] * correction
+                points[active, b] -= (w_b / (w_a + w_b))[:, None] * correction
+        return points
+
+
+
+# -------------------------------------------------------------
+# FOOT CONTACT AND GROUND LOCKING
+# -------------------------------------------------------------
+class FootContact:
+    FOOT_POINTS = [29, 31, 30, 32] #left heel, left toe, right heel, right toe
+    LEGS = [(23,27), (24,28)] #hip to ankle, the unit of the thresholds so they work at any scale
+    """
+        Works on pose locations as per Blender's convention (z up), e.g. from BlenderUtility.capture_locations.
+    """
+
+    @staticmethod
+    def remove_short(mask, min_frames):
+        """
+            :param mask: Boolean array (frames, columns).
+            :param min_frames: Shortest run of True that is kept.
+            :return: The mask without the shorter runs (single-frame flickers of the classification).
+        """
+        mask = np.array(mask, dtype=bool)
+        for column in range(mask.shape[1]):
+            values = mask[:, column]
+            run = np.concatenate([[0], np.cumsum(values[1:] != values[:-1])])
+            short = np.bincount(run)[run] < min_frames
+            mask[values & short, column] = False
+        return mask
+
+    @staticmethod
+    def detect(points, fps, height_tolerance=0.05, speed_tolerance=0.5, min_frames=3):
+        """
+            Classifies, for all frames at once, which heels and toes are planted on the ground.
+            :param points: Array (frames, 40, 3) of pose locations (z up). NaN marks a missing landmark.
+            :param fps: Frame rate of the capture.
+            :param height_tolerance: Largest height above the ground for a contact, as a fraction of the leg length.
+            :param speed_tolerance: Largest speed for a contact, in leg lengths per second.
+            :param min_frames: Shortest contact phase, in frames.
+            :return: (boolean array (frames, 4) of contacts in FOOT_POINTS order, ground height)
+        """
+        points = np.asarray(points, dtype=np.float64)
+        num_frames = len(points)
+        feet = points[:, FootContact.FOOT_POINTS]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            leg = np.nanmean([np.nanmedian(np.linalg.norm(points[:, b] - points[:, a], axis=-1))
+                              for a, b in FootContact.LEGS])
+            ground = np.nanpercentile(feet[..., 2], 5) if num_frames else np.nan
+        if num_frames < 2 or not np.isfinite(leg) or not np.isfinite(ground):
+            return np.zeros((num_frames, len(FootContact.FOOT_POINTS)), dtype=bool), 0.0
+
+        speed = np.linalg.norm(np.gradient(feet, axis=0), axis=-1) * fps
+        with np.errstate(invalid="ignore"):
+            contact = (feet[..., 2] - ground < height_tolerance * leg) & (speed < speed_tolerance * leg)
+        return FootContact.remove_short(contact, min_frames), float(ground)
+
+    @staticmethod
+    def lock(points, contact, ground):
+        """
+            Removes foot sliding and floating/sinking:
+            1) Root correction: the horizontal slide of the planted heels/toes is subtracted from the whole body
+               (accumulated, so the body moves on while the foot stays put), and the body is moved up or down so
+               the lowest planted point touches the ground (interpolated between contacts).
+            2) Pinning: a planted point stays where its contact phase started, on the ground.
+            :param points: Array (frames, 40, 3) of pose locations (z up).
+            :param contact: Boolean array (frames, 4) from detect.
+            :param ground: Ground height from detect.
+            :return: Corrected array (frames, 40, 3).
+        """
+        points = np.array(points, dtype=np.float64)
+        num_frames = len(points)
+        if num_frames == 0 or not contact.any():
+            return points
+        frame_index = np.arange(num_frames)
+
+        # --- Horizontal root correction ---
+        feet = points[:, FootContact.FOOT_POINTS]
+        step = np.diff(feet[..., :2], axis=0, prepend=feet[:1, :, :2])
+        planted = contact.copy()
+        planted[1:] &= contact[:-1] #in contact on this frame and the one before
+        planted[0] = False
+        step = np.where(planted[..., None], step, np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            slide = np.nan_to_num(np.nanmean(step, axis=1))
+            lowest = np.nanmin(np.where(contact, feet[..., 2], np.nan), axis=1)
+        points[..., :2] -= np.cumsum(slide, axis=0)[:, None]
+
+        # --- Vertical root correction ---
+        touching = np.isfinite(lowest)
+        offset = np.interp(frame_index, frame_index[touching], ground - lowest[touching])
+        points[..., 2] += offset[:, None]
+
+        # --- Pin every contact phase where it started ---
+        feet = points[:, FootContact.FOOT_POINTS]
+        start = contact.copy()
+        start[1:] &= ~contact[:-1]
+        start_index = np.maximum.accumulate(np.where(start, frame_index[:, None], 0), axis=0)
+        anchor = feet[start_index, np.arange(len(FootContact.FOOT_POINTS))]
+        anchor[..., 2] = ground
+        points[:, FootContact.FOOT_POINTS] = np.where(contact[..., None], anchor, feet)
+        return points
+
+
+
+# -------------------------------------------------------------
+# MULTI-CAMERA TRIANGULATION
+# -------------------------------------------------------------
+class Triangulation:
+    @staticmethod
+    def projection_matrix(camera):
+        """
+            :param camera: Camera dict from calibration.CameraRig ("K", "R", "t").
+            :return: 3x4 projection matrix K [R | t].
+        """
+        return np.asarray(camera["K"]) @ np.hstack([np.asarray(camera["R"]), np.reshape(camera["t"], (3, 1))])
+
+    @staticmethod
+    def dlt(pixels, visibility, projections, threshold=0.5):
+        """
+            Weighted linear (DLT) triangulation of every landmark of every frame at once.
+            Each view adds two equations per landmark, scaled by its visibility, and the
+            least-squares solution of all views is taken from a batched SVD.
+            :param pixels: Array (views, frames, landmarks, 2) of pixel coordinates. NaN marks a missing landmark.
+            :param visibility: Array (views, frames, landmarks) of visibility from 0 to 1.
+            :param projections: Array (views, 3, 4) of projection matrices.
+            :param threshold: Views below this visibility are left out for that landmark.
+            :return: (array (frames, landmarks, 3) of 3D points in the calibration's world units,
+                      NaN where fewer than two views saw the landmark,
+                      array (frames, landmarks) of visibility: the second best view's, as two views are needed)
+        """
+        pixels = np.asarray(pixels, dtype=np.float64)
+        projections = np.asarray(projections, dtype=np.float64)
+        num_views, num_frames, num_points = pixels.shape[:3]
+        visibility = np.asarray(visibility, dtype=np.float64)
+        weights = np.where((visibility >= threshold) & ~np.isnan(pixels).any(axis=-1), visibility, 0.0)
+        x = np.nan_to_num(pixels[..., 0])[..., None]
+        y = np.nan_to_num(pixels[..., 1])[..., None]
+
+        # --- Two rows per view: x * P3 - P1 and y * P3 - P2, normalized so views are weighted by visibility only ---
+        P = projections[:, None, None]
+        rows = np.stack([x * P[..., 2, :] - P[..., 0, :], y * P[..., 2, :] - P[..., 1, :]], axis=1)
+        rows /= np.maximum(np.linalg.norm(rows, axis=-1, keepdims=True), 1e-12)
+        rows *= weights[:, None, ..., None]
+        A = rows.transpose(2, 3, 0, 1, 4).reshape(num_frames, num_points, 2 * num_views, 4)
+
+        solution = np.linalg.svd(A)[2][..., -1, :]
+        w = solution[..., 3:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            points = np.where(np.abs(w) > 1e-12, solution[..., :3] / w, np.nan)
+
+        seen = (weights > 0).sum(axis=0)
+        points[seen < 2] = np.nan
+        if num_views < 2:
+            return points, np.zeros((num_frames, num_points))
+        return points, np.sort(weights, axis=0)[-2]
+
+
+
+# -------------------------------------------------------------
+# KEYFRAME REDUCTION
+# -------------------------------------------------------------
+class KeyframeReduction:
+    @staticmethod
+    def rdp_mask(values, tolerance):
+        """
+            Error-bounded keyframe decimation (Ramer-Douglas-Peucker) of many channels at once.
+            Every pass splits all out-of-tolerance segments of all channels at their worst sample,
+            so the number of passes only depends on the depth of the subdivision, not on the number of channels.
+            :param values: Array (frames, channels) with one sample per frame. NaN marks a missing sample.
+            :param tolerance: Maximum deviation between the original samples and the
+                                linearly interpolated kept keys. 0 keeps every sample.
+            :return: Boolean array (frames, channels), True for the samples to keep as keyframes.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        num_frames, num_channels = values.shape
+        valid = ~np.isnan(values)
+        if tolerance <= 0 or num_frames == 0:
+            return valid
+
+        # --- First and last valid samples of a channel are always kept ---
+        keep = np.zeros_like(valid)
+        channels = np.nonzero(valid.any(axis=0))[0]
+        first = np.argmax(valid, axis=0)
+        last = num_frames - 1 - np.argmax(valid[::-1], axis=0)
+        keep[first[channels], channels] = True
+        keep[last[channels], channels] = True
+
+        filled = np.where(valid, values, 0.0)
+        frame_index = np.arange(num_frames)[:, None]
+        channel_index = np.broadcast_to(np.arange(num_channels), values.shape)
+
+        while True:
+            # --- Previous and next kept key of every sample ---
+            prev_key = np.maximum.accumulate(np.where(keep, frame_index, -1), axis=0)
+            next_key = np.minimum.accumulate(np.where(keep, frame_index, num_frames)[::-1], axis=0)[::-1]
+            candidates = valid & ~keep & (prev_key >= 0) & (next_key < num_frames)
+            if not candidates.any():
+                break
+
+            prev_key = np.clip(prev_key, 0, num_frames - 1)
+            next_key = np.clip(next_key, 0, num_frames - 1)
+            prev_value = filled[prev_key, channel_index]
+            next_value = filled[next_key, channel_index]
+            t = (frame_index - prev_key) / np.maximum(next_key - prev_key, 1)
+            error = np.where(candidates, np.abs(filled - (prev_value + (next_value - prev_value) * t)), 0.0)
+
+            rows, cols = np.nonzero(error > tolerance)
+            if len(rows) == 0:
+                break
+
+            # --- Keep the worst sample of every segment that is out of tolerance ---
+            segment = prev_key[rows, cols] * num_channels + cols
+            order = np.lexsort((-error[rows, cols], segment))
+            segment = segment[order]
+            worst = np.ones(len(order), dtype=bool)
+            worst[1:] = segment[1:] != segment[:-1]
+            keep[rows[order[worst]], cols[order[worst]]] = True
+
+        return keep
+
+    @staticmethod
+    def summary(keys_written, samples):
+        """
+            :param keys_written: Number of keyframes written.
+            :param samples: Number of keyframes that would have been written without reduction.
+            :return: Short text for operator reports.
+        """
+        if samples == 0:
+            return "No keyframes written."
+        ratio = keys_written / samples
+        return f"{keys_written} of {samples} keyframes written ({ratio:.1%} kept, {1 / max(ratio, 1e-9):.1f}x reduction)."
+
+
+
+# -------------------------------------------------------------
+# CAPTURE QUALITY REPORT
+# -------------------------------------------------------------
+class QualityReport:
+    """
+        Capture-level statistics of the raw tracked data, computed with whole-capture array operations
+        (no loop over frames), so they are cheap even for hour-long captures:
+            detection rate      share of frames where a landmark was found with enough visibility
+            jitter              RMS of the high-pass residual p[t] - (p[t-1] + p[t+1]) / 2, in landmark units
+            bone length spread  standard deviation / mean of every bone's length (0 for a rigid skeleton)
+            view agreement      RMS difference of the height (y) of a landmark in the front and side views, the one
+                                axis both cameras see, with the per-frame offset between the cameras removed
+            worst ranges        runs of frames with many missing or jumping landmarks, worst first
+    """
+
+    @staticmethod
+    def compute(points, visibility, bones, fps, threshold=0.5, side_points=None, side_visibility=None,
+                outlier=3.0, bad_score=0.25, worst=5):
+        """
+            :param points: Array (frames, landmarks, 3) of tracked positions. NaN marks a missing landmark.
+            :param visibility: Array (frames, landmarks) of visibility from 0 to 1.
+            :param bones: (a, b) landmark index pairs (e.g. POSE_BONE_PAIRS).
+            :param fps: Frame rate of the capture.
+            :param threshold: Landmarks below this visibility count as not detected.
+            :param side_points: Optional array (frames, landmarks, 3) of the side view (e.g. gvar.zlist).
+            :param side_visibility: Visibility of the side view.
+            :param outlier: A landmark jumps in a frame when its residual is above outlier x its jitter.
+            :param bad_score: Frames whose score (missing share + jumping share of the landmarks) reaches this are bad.
+            :param worst: Number of worst frame ranges reported.
+            :return: Dict of plain Python values, ready for JSON (see save). NaN statistics are None.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        num_frames, num_points = points.shape[:2]
+        valid = (np.asarray(visibility) >= threshold) & ~np.isnan(points).any(axis=2)
+        detection = valid.mean(axis=0) if num_frames else np.zeros(num_points)
+
+        # --- Jitter: energy of the second difference, on runs of three detected frames ---
+        residual = np.full((num_frames, num_points), np.nan)
+        if num_frames >= 3:
+            triple = valid[:-2] & valid[1:-1] & valid[2:]
+            step = points[1:-1] - 0.5 * (points[:-2] + points[2:])
+            residual[1:-1] = np.where(triple, np.linalg.norm(step, axis=2), np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning) #all-NaN landmarks
+            jitter = np.sqrt(np.nanmean(residual ** 2, axis=0))
+
+            # --- Bone lengths ---
+            bones = np.asarray(bones, dtype=np.int64).reshape(-1, 2)
+            lengths = np.linalg.norm(points[:, bones[:, 0]] - points[:, bones[:, 1]], axis=2)
+            lengths[~(valid[:, bones[:, 0]] & valid[:, bones[:, 1]])] = np.nan
+            mean_length = np.nanmean(lengths, axis=0)
+            spread = np.nanstd(lengths, axis=0) / mean_length
+
+            # --- Front/side agreement on the shared vertical axis ---
+            agreement, both_views = None, None
+            if side_points is not None and len(side_points):
+                count = min(num_frames, len(side_points))
+                side_points = np.asarray(side_points, dtype=np.float64)[:count]
+                side_valid = ((np.asarray(side_visibility)[:count] >= threshold)
+                              & ~np.isnan(side_points).any(axis=2))
+                both = valid[:count] & side_valid
+                difference = np.where(both, points[:count, :, 1] - side_points[:, :, 1], np.nan)
+                difference -= np.nanmean(difference, axis=1, keepdims=True)
+                agreement = np.sqrt(np.nanmean(difference ** 2, axis=0))
+                both_views = both.mean(axis=0)
+
+        # --- Worst frame ranges: runs of bad frames, ranked by their summed score ---
+        jumping = np.nan_to_num(residual) > outlier * np.nan_to_num(jitter)[None, :]
+        score = (~valid).mean(axis=1) + jumping.mean(axis=1)
+        bad = np.concatenate([[False], score >= bad_score, [False]])
+        starts = np.nonzero(bad[1:] & ~bad[:-1])[0]
+        ends = np.nonzero(~bad[1:] & bad[:-1])[0] #exclusive
+        cumulative = np.concatenate([[0.0], np.cumsum(score)])
+        totals = cumulative[ends] - cumulative[starts]
+        ranges = []
+        for i in np.argsort(-totals)[:worst]:
+            start, end = int(starts[i]), int(ends[i])
+            ranges.append({
+                "frame_start": start + 1, #scene frames, as keyed by Animate
+                "frame_end": end,
+                "score": QualityReport.number(score[start:end].mean()),
+                "detection_rate": QualityReport.number(valid[start:end].mean()),
+            })
+
+        return {
+            "frames": int(num_frames),
+            "fps": float(fps),
+            "duration": float(num_frames / fps) if fps else 0.0,
+            "landmarks": int(num_points),
+            "visibility_threshold": float(threshold),
+            "detection_rate": QualityReport.number(valid.mean()) if valid.size else None,
+            "jitter": QualityReport.number(np.nanmean(jitter)) if np.isfinite(jitter).any() else None,
+            "bone_length_spread": QualityReport.number(np.nanmean(spread)) if np.isfinite(spread).any() else None,
+            "view_agreement": (QualityReport.number(np.nanmean(agreement))
+                               if agreement is not None and np.isfinite(agreement).any() else None),
+            "per_landmark": {
+                "detection_rate": QualityReport.numbers(detection),
+                "jitter": QualityReport.numbers(jitter),
+                "view_agreement": QualityReport.numbers(agreement) if agreement is not None else None,
+                "both_views_rate": QualityReport.numbers(both_views) if both_views is not None else None,
+            },
+            "bones": [
+                {"a": int(a), "b": int(b), "mean_length": QualityReport.number(length),
+                 "spread": QualityReport.number(s)}
+                for (a, b), length, s in zip(bones, mean_length, spread)
+            ],
+            "worst_ranges": ranges,
+        }
+
+    @staticmethod
+    def number(value, digits=6):
+        """:return: value as a rounded Python float, None if it is NaN."""
+        value = float(value)
+        return round(value, digits) if np.isfinite(value) else None
+
+    @staticmethod
+    def numbers(values, digits=6):
+        """:return: List of rounded Python floats, None where NaN."""
+        return [QualityReport.number(value, digits) for value in np.asarray(values, dtype=np.float64).ravel()]
+
+    @staticmethod
+    def summary(report):
+        """
+            :param report: Dict made by QualityReport.compute.
+            :return: Lines of text for the panel and operator reports.
+        """
+        def percent(value):
+            return "-" if value is None else f"{value:.1%}"
+
+        def decimal(value):
+            return "-" if value is None else f"{value:.4f}"
+
+        lines = [
+            f"{report['frames']} frames ({report['duration']:.1f} s), detected {percent(report['detection_rate'])}",
+            f"Jitter {decimal(report['jitter'])}, bone length spread {percent(report['bone_length_spread'])}",
+        ]
+        if report["view_agreement"] is not None:
+            lines.append(f"Front/side disagreement {decimal(report['view_agreement'])}")
+        detection = report["per_landmark"]["detection_rate"]
+        if detection:
+            weakest = sorted(range(len(detection)), key=lambda i: detection[i])[:3]
+            lines.append("Least detected: " + ", ".join(f"#{i} {percent(detection[i])}" for i in weakest))
+        return lines
+
+    @staticmethod
+    def save(path, reports):
+        """
+            :param path: Output .json file path.
+            :param reports: Dict of reports made by QualityReport.compute (e.g. {"pose": ..., "Right": ...}).
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as report_file:
+            json.dump(reports, report_file, indent=2)
+        os.replace(temp_path, path)
+
+
+
+# -------------------------------------------------------------
+# LANDMARK FILES
+# -------------------------------------------------------------
+class LandmarkFile:
+    @staticmethod
+    def save(path, data, fps):
+        """
+            Saves motion data to a compressed .npz file.
+            :param path: Output file path.
+            :param data: Dict of motion data lists named as in globalVariables (e.g. "positionList").
+            :param fps: Frame rate of the source video.
+        """
+        arrays = {name: np.asarray(values, dtype=np.float32) for name, values in data.items()}
+        # Write next to the target and rename, so an interrupted save never leaves a broken file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as landmark_file:
+            np.savez_compressed(landmark_file, fps=np.float64(fps), **arrays)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def load(path):
+        """
+            :param path: File written by LandmarkFile.save.
+            :return: (dict of motion data lists named as in globalVariables, fps)
+        """
+        with np.load(path) as landmark_file:
+            fps = float(landmark_file["fps"])
+            data = {name: landmark_file[name].tolist() for name in landmark_file.files if name != "fps"}
+        return data, fps
@@ -0,0 +1,103 @@
+"""
+    Standalone tracking server: runs pose or hand detection in its own process (plain Python, no Blender),
+    possibly on another machine, and streams the landmarks of every frame over UDP (see streaming.py).
+    In Blender, Network Tracking (Network Streaming panel) receives them, fills the motion data and moves the empties,
+    so heavy inference never competes with the viewport and UI.
+
+    Usage:
+        python server.py --source 0 --kind hand --host 127.0.0.1 --port 9763
+        python server.py --source take01.mp4 --kind pose --realtime --show
+"""
+
+import sys
+import time
+import argparse
+
+try:
+    from . import tracking
+    from . import streaming
+    from . import calibration
+except ImportError:
+    # Run as a script outside of the add-on package
+    import tracking
+    import streaming
+    import calibration
+
+
+
+# -------------------------------------------------------------
+# ARGUMENTS
+# -------------------------------------------------------------
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="server.py", description="Open Mocap tracking server.")
+    parser.add_argument("--source", default="0", help="Camera index or video file.")
+    parser.add_argument("--kind", choices=["pose", "hand"], default="pose", help="Track full-body pose or hands.")
+    parser.add_argument("--num-hands", type=int, choices=[1, 2], default=2, help="Number of hands to track.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address of the Blender receiving the landmarks.")
+    parser.add_argument("--port", type=int, default=9763, help="UDP port of the Blender receiving the landmarks.")
+    parser.add_argument("--protocol", choices=["UDP", "OSC"], default="UDP", help="Packet format.")
+    parser.add_argument("--decoder", choices=["opencv", "ffmpeg"], default="opencv",
+                        help="Video decoder for video files (ffmpeg decodes on all cores, needs ffmpeg on the PATH).")
+    parser.add_argument("--cameras", help="Camera rig JSON (see calibration.py) to remove lens distortion.")
+    parser.add_argument("--view", default="front", help="Name of the camera in the camera rig file.")
+    parser.add_argument("--realtime", action="store_true", help="Video files only: send frames at the video's frame rate.")
+    parser.add_argument("--show", action="store_true", help="Show the tracked image in a window (Esc stops).")
+    return parser.parse_args(argv)
+
+
+
+# -------------------------------------------------------------
+# SERVER LOOP
+# -------------------------------------------------------------
+def serve(args):
+    """
+        Tracks the source frame by frame and sends every frame's landmarks, detected or not,
+        until the video ends, the window is closed or Ctrl+C.
+    """
+    source = int(args.source) if args.source.isdigit() else args.source
+    camera = calibration.CameraRig.find(args.cameras, args.view) if args.cameras else None
+    tracker = tracking.OfflineTracker(source, args.kind, "front", args.num_hands, camera, args.decoder)
+    cap = tracker.open()
+    cv2 = tracking.cv2
+    publisher = streaming.LandmarkPublisher(args.host, args.port, args.protocol)
+    print(f"[Open Mocap] Streaming {args.kind} landmarks ({args.protocol}) to {args.host}:{args.port}")
+
+    frame_index = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            success, img = cap.read()
+            if not success:
+                break
+            img, results = tracker.detect(img)
+            for kind, frame, visibility in results:
+                if frame is None:
+                    frame, visibility = tracking.LandmarkStore.empty(args.kind)
+                publisher.send(kind, frame, visibility, frame_index)
+            frame_index += 1
+
+            if args.show:
+                cv2.imshow("Open Mocap Server", img)
+                if cv2.waitKey(1) == 27:
+                    break
+            if args.realtime and isinstance(source, str):
+                time.sleep(max(start + frame_index / tracker.fps - time.perf_counter(), 0))
+            if frame_index % 100 == 0:
+                print(f"[Open Mocap] {frame_index} frames, {frame_index / (time.perf_counter() - start):.1f} fps")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cap.release()
+        publisher.close()
+        if args.show:
+            cv2.destroyAllWindows()
+    print(f"[Open Mocap] Server stopped after {frame_index} frames")
+
+
+def main(argv):
+    serve(parse_args(argv))
+
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,236 @@
+"""
+    Shared-memory transport between a tracker subprocess and Blender, without pickling or copying frames through pipes.
+    Nothing in here depends on Blender.
+
+    The tracker process writes every decoded frame into a ring of slots in one shared memory block:
+        header = write sequence, read sequence, stop and finished flags, ring and frame sizes
+        slot   = sequence number, source frame index,
+                 preview image (float32 RGBA, bottom row first: the layout of Blender's Image.pixels),
+                 landmarks (float32 [x, y, z, visibility] per landmark, one set per pose or per hand)
+    A slot is marked as being written (-1) until its data is complete, so a reader never takes a torn slot.
+    Video files are tracked with backpressure (the writer waits for Blender instead of overwriting unread frames);
+    cameras never wait, a reader that falls behind skips to the newest frames.
+
+    The tracker process is started by Blender (see utils.ProcessTracking):
+        python sharedring.py track <shared memory name> --source take01.mp4 --kind pose --view front
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+from multiprocessing import shared_memory
+
+try:
+    from . import tracking
+    from . import calibration
+except ImportError:
+    # Run as the tracker process outside of the add-on package
+    import tracking
+    import calibration
+
+
+
+# -------------------------------------------------------------
+# SHARED MEMORY RING BUFFER
+# -------------------------------------------------------------
+class SharedRing:
+    WRITE, READ, STOP, FINISHED, SLOTS, WIDTH, HEIGHT, SETS, POINTS = range(9)
+    HEADER_SIZE = 16 #int64 fields, the unused ones are reserved
+    KINDS = {"pose": ("pose",), "hand": ("Right", "Left")}
+    POINTS_PER_SET = {"pose": 40, "hand": 21}
+
+    def __init__(self, shm):
+        """
+            Use SharedRing.create (owner) or SharedRing.attach (other process) instead.
+            :param shm: The multiprocessing.shared_memory.SharedMemory block.
+        """
+        self.shm = shm
+        self.name = shm.name
+        self.header = np.ndarray((SharedRing.HEADER_SIZE,), dtype=np.int64, buffer=shm.buf)
+        slots, width, height, sets, points = (int(self.header[i]) for i in range(SharedRing.SLOTS, SharedRing.POINTS + 1))
+        self.slots = slots
+
+        # --- Zero-copy views of the slots ---
+        offset = self.header.nbytes
+        self.meta = np.ndarray((slots, 2), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += self.meta.nbytes
+        self.pixels = np.ndarray((slots, height * width * 4), dtype=np.float32, buffer=shm.buf, offset=offset)
+        offset += self.pixels.nbytes
+        self.landmarks = np.ndarray((slots, sets, points, 4), dtype=np.float32, buffer=shm.buf, offset=offset)
+
+    @staticmethod
+    def create(slots, width, height, sets, points):
+        """
+            Creates the shared memory block. The creator unlinks it with close(unlink=True).
+            :param slots: Number of frames the ring holds.
+            :param width: Width of the video frames.
+            :param height: Height of the video frames.
+            :param sets: Number of landmark sets per frame (1 for pose, 2 for hands).
+            :param points: Number of landmarks per set.
+            :return: SharedRing
+        """
+        size = 8 * SharedRing.HEADER_SIZE + slots * (16 + 4 * height * width * 4 + 4 * sets * points * 4)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        header = np.ndarray((SharedRing.HEADER_SIZE,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[SharedRing.SLOTS:SharedRing.POINTS + 1] = [slots, width, height, sets, points]
+        ring = SharedRing(shm)
+        ring.meta[:, 0] = -1
+        return ring
+
+    @staticmethod
+    def attach(name):
+        """
+            :param name: Name of a block made by SharedRing.create in another process.
+            :return: SharedRing
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13 tracks attached blocks too, and would unlink the owner's block on exit
+            shm = shared_memory.SharedMemory(name=name)
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return SharedRing(shm)
+
+    @staticmethod
+    def blender_pixels(img):
+        """
+            :param img: BGR uint8 image (OpenCV).
+            :return: Flat float32 RGBA pixels, bottom row first, ready for Image.pixels.foreach_set.
+        """
+        h, w, _ = img.shape
+        rgba = np.empty((h, w, 4), dtype=np.float32)
+        np.multiply(img[::-1, :, ::-1], 1.0 / 255.0, out=rgba[:, :, :3], casting="unsafe")
+        rgba[:, :, 3] = 1.0
+        return rgba.ravel()
+
+    def write(self, frame_index, pixels, landmarks, block=True):
+        """
+            :param frame_index: Source frame index.
+            :param pixels: Preview pixels (see blender_pixels).
+            :param landmarks: Array (sets, points, 4) of [x, y, z, visibility].
+            :param block: Wait while the ring is full of unread frames instead of overwriting the oldest.
+            :return: False if the reader asked to stop.
+        """
+        seq = int(self.header[SharedRing.WRITE])
+        while block and seq - self.header[SharedRing.READ] >= self.slots and not self.header[SharedRing.STOP]:
+            time.sleep(0.001)
+        if self.header[SharedRing.STOP]:
+            return False
+
+        slot = seq % self.slots
+        self.meta[slot, 0] = -1 #being written
+        self.pixels[slot] = pixels
+        self.landmarks[slot] = landmarks
+        self.meta[slot, 1] = frame_index
+        self.meta[slot, 0] = seq
+        self.header[SharedRing.WRITE] = seq + 1
+        return True
+
+    def written(self):
+        """:return: Sequence number of the next frame to be written (= number of frames written)."""
+        return int(self.header[SharedRing.WRITE])
+
+    def read(self, seq):
+        """
+            :param seq: Sequence number of the frame.
+            :return: (source frame index, zero-copy view of the preview pixels, copy of the landmarks),
+                    or None if the slot holds another frame by now (overwritten, or still being written).
+                    The pixel view stays valid until release() lets the writer reuse the slot.
+        """
+        slot = seq % self.slots
+        if self.meta[slot, 0] != seq:
+            return None
+        frame_index = int(self.meta[slot, 1])
+        landmarks = self.landmarks[slot].copy()
+        if self.meta[slot, 0] != seq:
+            return None
+        return frame_index, self.pixels[slot], landmarks
+
+    def release(self, seq):
+        """:param seq: All frames before this sequence number have been read: the writer may reuse their slots."""
+        self.header[SharedRing.READ] = seq
+
+    def stop(self):
+        self.header[SharedRing.STOP] = 1
+
+    def stopped(self):
+        return bool(self.header[SharedRing.STOP])
+
+    def finish(self):
+        self.header[SharedRing.FINISHED] = 1
+
+    def finished(self):
+        return bool(self.header[SharedRing.FINISHED])
+
+    def close(self, unlink=False):
+        """:param unlink: Also free the block (owner only, once every process has closed it)."""
+        # The numpy views hold the buffer, they must go before the block can be closed
+        self.header = self.meta = self.pixels = self.landmarks = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+
+# -------------------------------------------------------------
+# TRACKER PROCESS
+# -------------------------------------------------------------
+def track(args):
+    """Tracks the source and writes every frame into the ring, until the video ends or Blender stops it."""
+    ring = SharedRing.attach(args.name)
+    cap = None
+    try:
+        source = int(args.source) if args.source.isdigit() else args.source
+        camera = calibration.CameraRig.find(args.cameras, args.view) if args.cameras else None
+        tracker = tracking.OfflineTracker(source, args.kind, args.view, args.num_hands, camera, args.decoder)
+        try:
+            cap = tracker.open()
+        except RuntimeError as error:
+            print(f"[Open Mocap] {error}")
+            return
+
+        kinds = SharedRing.KINDS[args.kind]
+        landmarks = np.empty(ring.landmarks.shape[1:], dtype=np.float32)
+        frame_index = 0
+        while not ring.stopped():
+            success, img = cap.read()
+            if not success:
+                break
+            img, results = tracker.detect(img)
+            landmarks[:, :, :3] = np.nan
+            landmarks[:, :, 3] = 0.0
+            for kind, frame, visibility in results:
+                if frame is not None:
+                    landmarks[kinds.index(kind), :, :3] = np.reshape(frame, (-1, 3))
+                    landmarks[kinds.index(kind), :, 3] = visibility
+            if not ring.write(frame_index, SharedRing.blender_pixels(img), landmarks, block=isinstance(source, str)):
+                break
+            frame_index += 1
+    finally:
+        # Also when tracking fails: no ffmpeg process left running, and Blender sees the end of the ring
+        if cap is not None:
+            cap.release()
+        ring.finish()
+        ring.close()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="sharedring.py", description="Open Mocap tracker process.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    tracker = commands.add_parser("track", help="Track a video or camera into a shared memory ring.")
+    tracker.add_argument("name", help="Name of the shared memory block made by Blender.")
+    tracker.add_argument("--source", required=True, help="Camera index or video file.")
+    tracker.add_argument("--kind", choices=["pose", "hand"], default="pose")
+    tracker.add_argument("--view", default="front", help="front or side.")
+    tracker.add_argument("--num-hands", type=int, choices=[1, 2], default=2)
+    tracker.add_argument("--decoder", choices=["opencv", "ffmpeg"], default="opencv")
+    tracker.add_argument("--cameras", help="Camera rig JSON (see calibration.py) to remove lens distortion.")
+    track(parser.parse_args(argv))
+
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
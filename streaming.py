@@ -0,0 +1,240 @@
+"""
+    Low-latency network output of the tracked landmarks, for other tools on the machine or the network
+    (a game engine, a second Blender, ...). Nothing in here depends on Blender.
+
+    Every frame and every tracked body part (pose, right hand, left hand) is sent as one datagram:
+        UDP: a 24 byte little-endian header followed by float32 [x, y, z, visibility] per landmark
+             header = magic b"OMC1", version, kind (0 pose, 1 right hand, 2 left hand), actor, number of landmarks,
+                      sequence number, source frame index, timestamp (seconds since the epoch, float64)
+        OSC: address /openmocap/<pose|right|left>, arguments (int sequence, int frame, int actor, double timestamp,
+             blob of the same float32 landmark data)
+    Landmarks are normalized as in the motion data (see tracking.MathUtility.normalize_coordinates).
+    Missing landmarks are NaN with visibility 0.
+
+    Test receiver (prints every packet):
+        python streaming.py listen --port 9763
+"""
+
+import sys
+import time
+import socket
+import struct
+import argparse
+import numpy as np
+
+
+
+# -------------------------------------------------------------
+# PACKET FORMAT
+# -------------------------------------------------------------
+class Packet:
+    MAGIC = b"OMC1"
+    VERSION = 1
+    HEADER = struct.Struct("<4sBBBBIId")
+    KINDS = ("pose", "Right", "Left")
+    OSC_NAMES = ("pose", "right", "left")
+
+    @staticmethod
+    def payload(frame, visibility):
+        """
+            :param frame: Flat [x,y,z,...] landmarks, or array (landmarks, 3).
+            :param visibility: Visibility of every landmark, or None for fully visible.
+            :return: (number of landmarks, float32 bytes of [x, y, z, visibility] per landmark)
+        """
+        points = np.asarray(frame, dtype=np.float32).reshape(-1, 3)
+        data = np.empty((len(points), 4), dtype="<f4")
+        data[:, :3] = points
+        data[:, 3] = 1.0 if visibility is None else np.asarray(visibility, dtype=np.float32)
+        return len(points), data.tobytes()
+
+    @staticmethod
+    def pack(kind, frame, visibility, sequence, frame_index, actor=0, timestamp=None):
+        """
+            :param kind: "pose", "Right" or "Left".
+            :return: Bytes of one UDP packet.
+        """
+        num_points, payload = Packet.payload(frame, visibility)
+        header = Packet.HEADER.pack(
+            Packet.MAGIC, Packet.VERSION, Packet.KINDS.index(kind), actor, num_points,
+            sequence & 0xFFFFFFFF, frame_index & 0xFFFFFFFF, time.time() if timestamp is None else timestamp
+        )
+        return header + payload
+
+    @staticmethod
+    def unpack(data):
+        """
+            Anything can arrive on a UDP port: data that is not a complete packet of this version is rejected.
+            :param data: Bytes of one UDP packet or OSC message.
+            :return: Dict with "kind", "actor", "sequence", "frame", "timestamp",
+                     "points" (array (landmarks, 3)) and "visibility" (array (landmarks,)), or None if not a packet.
+        """
+        if data[:1] == b"/":
+            return Packet.unpack_osc(data)
+        if len(data) < Packet.HEADER.size or data[:4] != Packet.MAGIC:
+            return None
+        magic, version, kind, actor, num_points, sequence, frame_index, timestamp = Packet.HEADER.unpack_from(data)
+        if version != Packet.VERSION or kind >= len(Packet.KINDS) or len(data) < Packet.HEADER.size + 16 * num_points:
+            return None
+        values = np.frombuffer(data, dtype="<f4", count=4 * num_points, offset=Packet.HEADER.size).reshape(-1, 4)
+        return {
+            "kind": Packet.KINDS[kind], "actor": actor, "sequence": sequence, "frame": frame_index,
+            "timestamp": timestamp, "points": values[:, :3], "visibility": values[:, 3],
+        }
+
+    @staticmethod
+    def unpack_osc(data):
+        """
+            :param data: Bytes of one OSC message made by pack_osc.
+            :return: Packet dict as from unpack, or None if not a landmark message.
+        """
+        address_end = data.find(b"\0")
+        if address_end < 0 or not data.startswith(b"/openmocap/"):
+            return None
+        name = data[len(b"/openmocap/"):address_end].decode("ascii", "replace")
+        offset = address_end + 1 + (-(address_end + 1) % 4)
+        tags = Packet.osc_string(",iiidb")
+        if name not in Packet.OSC_NAMES or data[offset:offset + len(tags)] != tags:
+            return None
+        offset += len(tags)
+        if len(data) < offset + 24:
+            return None
+        sequence, frame_index, actor, timestamp, size = struct.unpack_from(">iiidi", data, offset)
+        offset += 24
+        if size < 0 or size % 16 or len(data) < offset + size:
+            return None
+        values = np.frombuffer(data, dtype="<f4", count=size // 4, offset=offset).reshape(-1, 4)
+        return {
+            "kind": Packet.KINDS[Packet.OSC_NAMES.index(name)], "actor": actor, "sequence": sequence,
+            "frame": frame_index, "timestamp": timestamp, "points": values[:, :3], "visibility": values[:, 3],
+        }
+
+    @staticmethod
+    def osc_string(text):
+        """:return: OSC string: ASCII, null terminated, padded to 4 bytes."""
+        data = text.encode("ascii") + b"\0"
+        return data + b"\0" * (-len(data) % 4)
+
+    @staticmethod
+    def pack_osc(kind, frame, visibility, sequence, frame_index, actor=0, timestamp=None):
+        """:return: Bytes of one OSC message."""
+        _, payload = Packet.payload(frame, visibility)
+        address = f"/openmocap/{Packet.OSC_NAMES[Packet.KINDS.index(kind)]}"
+        return (
+            Packet.osc_string(address) + Packet.osc_string(",iiidb")
+            + struct.pack(">iiid", sequence & 0x7FFFFFFF, frame_index & 0x7FFFFFFF, actor,
+                          time.time() if timestamp is None else timestamp)
+            + struct.pack(">i", len(payload)) + payload + b"\0" * (-len(payload) % 4)
+        )
+
+
+
+# -------------------------------------------------------------
+# PUBLISHER AND RECEIVER
+# -------------------------------------------------------------
+class LandmarkPublisher:
+    """
+        Sends landmark packets over UDP (fire and forget: a slow or missing consumer never blocks tracking).
+    """
+
+    def __init__(self, host="127.0.0.1", port=9763, protocol="UDP"):
+        """
+            :param host: Address of the consumer (a broadcast or multicast address also works).
+            :param port: UDP port of the consumer.
+            :param protocol: "UDP" (compact binary packets) or "OSC".
+        """
+        self.address = (host, port)
+        self.protocol = protocol
+        self.sequence = 0
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+
+    def send(self, kind, frame, visibility=None, frame_index=0, actor=0):
+        """
+            :param kind: "pose", "Right" or "Left".
+            :param frame: Flat [x,y,z,...] landmarks of one frame.
+            :param visibility: Visibility of every landmark, or None for fully visible.
+            :param frame_index: Source frame index.
+            :param actor: Actor number (multi-actor pose tracking).
+        """
+        pack = Packet.pack_osc if self.protocol == "OSC" else Packet.pack
+        try:
+            self.socket.sendto(pack(kind, frame, visibility, self.sequence, frame_index, actor), self.address)
+        except (BlockingIOError, OSError):
+            pass #dropped, like any late UDP packet
+        self.sequence += 1
+
+    def close(self):
+        self.socket.close()
+
+
+class LandmarkReceiver:
+    """
+        Receives the UDP packets or OSC messages of a LandmarkPublisher (e.g. in a game engine bridge or in tests).
+    """
+
+    def __init__(self, port=9763, host="127.0.0.1"):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.last_sequence = None
+        self.dropped = 0 #packets lost, from the gaps in the sequence numbers
+        self.reordered = 0 #packets that arrived after a newer one
+
+    def receive(self, timeout=None):
+        """
+            :param timeout: Seconds to wait for a packet (None waits forever, 0 does not wait).
+            :return: Packet dict (see Packet.unpack), or None if nothing arrived.
+        """
+        self.socket.settimeout(timeout)
+        try:
+            data, _ = self.socket.recvfrom(65536)
+        except (socket.timeout, BlockingIOError, ConnectionResetError):
+            # ConnectionResetError: Windows reports an ICMP "port unreachable" of an earlier send on the next receive
+            return None
+        packet = Packet.unpack(data)
+        if packet is not None:
+            if self.last_sequence is None:
+                self.last_sequence = packet["sequence"]
+                return packet
+            gap = (packet["sequence"] - self.last_sequence - 1) & 0xFFFFFFFF
+            if gap < 0x80000000:
+                self.dropped += gap
+                self.last_sequence = packet["sequence"]
+            else:
+                # Late: it was counted as dropped by the gap it left
+                self.reordered += 1
+                self.dropped = max(self.dropped - 1, 0)
+        return packet
+
+    def close(self):
+        self.socket.close()
+
+
+
+# -------------------------------------------------------------
+# COMMAND LINE
+# -------------------------------------------------------------
+def main(argv):
+    parser = argparse.ArgumentParser(prog="streaming.py", description="Open Mocap landmark stream receiver.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    listen = commands.add_parser("listen", help="Print the packets of a UDP landmark stream.")
+    listen.add_argument("--port", type=int, default=9763)
+    listen.add_argument("--host", default="127.0.0.1")
+
+    args = parser.parse_args(argv)
+    receiver = LandmarkReceiver(args.port, args.host)
+    print(f"[Open Mocap] Listening on {args.host}:{args.port}")
+    try:
+        while True:
+            packet = receiver.receive()
+            if packet is None:
+                continue
+            latency = (time.time() - packet["timestamp"]) * 1000
+            print(f"#{packet['sequence']} frame {packet['frame']} {packet['kind']} (actor {packet['actor']}): "
+                  f"{len(packet['points'])} landmarks, {latency:.1f} ms, {receiver.dropped} dropped")
+    except KeyboardInterrupt:
+        receiver.close()
+
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The add-on modules are flat files in the repository root, importable without Blender
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
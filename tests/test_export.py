@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from export import MotionExport
+
+
+def rotation_zxy(z, x, y):
+    """:return: Rz @ Rx @ Ry of angles in degrees, arrays (frames,)."""
+    z, x, y = np.radians(z), np.radians(x), np.radians(y)
+    cz, sz, cx, sx, cy, sy = np.cos(z), np.sin(z), np.cos(x), np.sin(x), np.cos(y), np.sin(y)
+    one, zero = np.ones_like(z), np.zeros_like(z)
+    Rz = np.stack([np.stack([cz, -sz, zero], -1), np.stack([sz, cz, zero], -1), np.stack([zero, zero, one], -1)], -2)
+    Rx = np.stack([np.stack([one, zero, zero], -1), np.stack([zero, cx, -sx], -1), np.stack([zero, sx, cx], -1)], -2)
+    Ry = np.stack([np.stack([cy, zero, sy], -1), np.stack([zero, one, zero], -1), np.stack([-sy, zero, cy], -1)], -2)
+    return Rz @ Rx @ Ry
+
+
+def test_euler_zxy_round_trip():
+    rng = np.random.default_rng(0)
+    angles = np.stack([rng.uniform(-179, 179, 500), rng.uniform(-89, 89, 500), rng.uniform(-179, 179, 500)], axis=1)
+    np.testing.assert_allclose(MotionExport.euler_zxy(rotation_zxy(*angles.T)), angles, atol=1e-6)
+
+
+def test_arc_is_the_rotation_from_u_to_v():
+    rng = np.random.default_rng(1)
+    u = rng.normal(size=3)
+    u /= np.linalg.norm(u)
+    v = rng.normal(size=(200, 3))
+    v /= np.linalg.norm(v, axis=1, keepdims=True)
+    v[0] = u
+    v[1] = -u #half turn
+    rotation = MotionExport.arc(u, v)
+    np.testing.assert_allclose(rotation @ u, v, atol=1e-9)
+    np.testing.assert_allclose(rotation @ np.swapaxes(rotation, 1, 2), np.broadcast_to(np.eye(3), rotation.shape), atol=1e-9)
+    np.testing.assert_allclose(np.linalg.det(rotation), 1.0)
+    np.testing.assert_allclose(rotation[0], np.eye(3), atol=1e-12)
+    # Shortest rotation: the axis u x v is left in place
+    axis = np.cross(u, v[2])
+    np.testing.assert_allclose(rotation[2] @ axis, axis, atol=1e-9)
+    # As written to the BVH and read back
+    np.testing.assert_allclose(rotation_zxy(*MotionExport.euler_zxy(rotation).T), rotation, atol=1e-6)
+
+
+def pose_capture(num_frames):
+    rng = np.random.default_rng(2)
+    points = rng.normal(size=(40, 3)) + rng.normal(0, 0.02, size=(num_frames, 40, 3))
+    points[3, 20] = np.nan #a missing landmark is held
+    return points
+
+
+@pytest.mark.parametrize("kind, num_landmarks", [("pose", 40), ("hand", 21)])
+def test_bvh_header_and_frames(tmp_path, kind, num_landmarks):
+    export = MotionExport(kind)
+    points = pose_capture(25)[:, :num_landmarks]
+    path = tmp_path / "take.bvh"
+    assert export.write(str(path), points, fps=25.0, chunk=7) == 25
+
+    text = path.read_text()
+    header, motion = text.split("MOTION\n")
+    lines = motion.splitlines()
+    assert lines[0] == "Frames: 25"
+    assert lines[1] == "Frame Time: 0.040000"
+    rows = np.loadtxt(lines[2:])
+    num_channels = 3 + 3 * len(export.order)
+    assert rows.shape == (25, num_channels) and np.isfinite(rows).all()
+    # The CHANNELS of the hierarchy match the columns of the motion rows
+    assert sum(int(line.split()[1]) for line in header.splitlines() if "CHANNELS" in line) == num_channels
+    assert header.count("{") == header.count("}") == len(export.joints)
+    assert header.count("End Site") == len(export.joints) - len(export.order)
+
+    # Chunks do not change the result
+    export.write(str(tmp_path / "whole.bvh"), points, fps=25.0)
+    assert (tmp_path / "whole.bvh").read_text() == text
+
+
+def test_csv_and_binary_have_the_bvh_channels(tmp_path):
+    export = MotionExport("pose")
+    points = pose_capture(10)
+    export.write(str(tmp_path / "take.bvh"), points, fps=30.0, scale=100.0)
+    export.write(str(tmp_path / "take.csv"), points, fps=30.0, file_format="CSV", scale=100.0)
+    export.write(str(tmp_path / "take.npy"), points, fps=30.0, file_format="BINARY", scale=100.0)
+
+    bvh = np.loadtxt((tmp_path / "take.bvh").read_text().split("MOTION\n")[1].splitlines()[2:])
+    with open(tmp_path / "take.csv") as csv_file:
+        assert csv_file.readline().strip().split(",")[1:] == export.channel_names()
+    csv = np.loadtxt(tmp_path / "take.csv", delimiter=",", skiprows=1)
+    np.testing.assert_array_equal(csv[:, 0], np.arange(1, 11))
+    np.testing.assert_allclose(csv[:, 1:], bvh, atol=1e-6)
+    np.testing.assert_allclose(np.load(tmp_path / "take.npy"), bvh, atol=1e-4)
@@ -0,0 +1,97 @@
+import os
+import multiprocessing
+
+import pytest
+
+import jobs
+import processing
+
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                                reason="the workers must inherit the stub tracker")
+
+
+class StubTracker:
+    """
+        Stands in for tracking.OfflineTracker in the worker processes, driven by the name of the video:
+        "crash*" kills its worker, "broken*" always raises, "flaky*" raises on its first attempt only,
+        anything else tracks 10 frames at once.
+    """
+    FRAMES = 10
+
+    def __init__(self, video, kind, view, num_hands, camera, decoder):
+        name = os.path.basename(video)
+        if name.startswith("crash"):
+            os._exit(1)
+        if name.startswith("broken"):
+            raise RuntimeError(f"Failed to open video: {video}")
+        if name.startswith("flaky") and not os.path.exists(f"{video}.failed"):
+            open(f"{video}.failed", "w").close()
+            raise RuntimeError(f"Failed to open video: {video}")
+        self.fps = 30.0
+        self.frames_total = self.FRAMES
+        self.data = {"positionList": [], "visibilityList": []}
+
+    def run(self, progress, start_frame=0):
+        for frame_index in range(start_frame, self.FRAMES):
+            self.data["positionList"].append([float(frame_index)] * 120)
+            self.data["visibilityList"].append([1.0] * 40)
+            progress(frame_index + 1)
+        return self.data
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs.tracking, "OfflineTracker", StubTracker)
+    return jobs.JobQueue(str(tmp_path / "queue.json"))
+
+
+def test_job_resumes_from_its_checkpoint(queue, tmp_path):
+    job = queue.add(str(tmp_path / "take.mp4"))
+    checkpoint = {"positionList": [[-1.0] * 120] * 4, "visibilityList": [[1.0] * 40] * 4}
+    processing.LandmarkFile.save(jobs.checkpoint_path(job), checkpoint, 30.0)
+
+    jobs.run_queue(queue.path)
+
+    job = jobs.JobQueue(queue.path).jobs[0]
+    assert job["status"] == "done" and job["attempts"] == 1
+    assert job["frames_done"] == StubTracker.FRAMES
+    assert not os.path.exists(jobs.checkpoint_path(job))
+    data, fps = processing.LandmarkFile.load(job["output"])
+    # The frames of the checkpoint are kept, tracking went on from frame 4
+    assert [frame[0] for frame in data["positionList"]] == [-1.0] * 4 + [float(i) for i in range(4, 10)]
+    assert fps == 30.0
+
+
+def test_failed_jobs_are_retried_until_max_attempts(queue, tmp_path):
+    queue.add(str(tmp_path / "flaky.mp4"))
+    queue.add(str(tmp_path / "broken.mp4"))
+
+    jobs.run_queue(queue.path, workers=2, max_attempts=3)
+
+    flaky, broken = jobs.JobQueue(queue.path).jobs
+    assert flaky["status"] == "done" and flaky["attempts"] == 2 and flaky["error"] == ""
+    assert broken["status"] == "failed" and broken["attempts"] == 3
+    assert "Failed to open video" in broken["error"]
+
+    # A later run only retries failed jobs that have attempts left
+    jobs.run_queue(queue.path, workers=2, max_attempts=4)
+    flaky, broken = jobs.JobQueue(queue.path).jobs
+    assert flaky["attempts"] == 2 and broken["attempts"] == 4
+
+
+def test_crashing_worker_does_not_fail_the_other_jobs(queue, tmp_path):
+    queue.add(str(tmp_path / "crash.mp4"))
+    for take in range(2, 13):
+        queue.add(str(tmp_path / f"take{take:02d}.mp4"))
+
+    jobs.run_queue(queue.path, workers=2, max_attempts=3)
+
+    result = {job["id"]: job for job in jobs.JobQueue(queue.path).jobs}
+    assert result[1]["status"] == "failed" and result[1]["attempts"] == 3
+    for job_id in range(2, 13):
+        job = result[job_id]
+        assert job["status"] == "done", job
+        assert job["frames_done"] == StubTracker.FRAMES
+        assert os.path.exists(job["output"])
+    # Only a job running next to one of the two crashes that were not isolated is charged for it
+    assert sum(result[job_id]["attempts"] for job_id in range(2, 13)) <= 11 + 2
@@ -0,0 +1,215 @@
+import numpy as np
+import pytest
+
+from processing import (BoneLengths, FootContact, GapFilling, KeyframeReduction, QualityReport, Triangulation,
+                        HAND_BONE_PAIRS)
+
+
+# -------------------------------------------------------------
+# KEYFRAME REDUCTION
+# -------------------------------------------------------------
+def interpolate_keys(values, keep):
+    """:return: The channels linearly interpolated between the kept keys, as Blender plays them back."""
+    frames = np.arange(len(values))
+    return np.stack([np.interp(frames, frames[keep[:, c]], values[keep[:, c], c])
+                     for c in range(values.shape[1])], axis=1)
+
+
+def test_rdp_mask_stays_within_tolerance():
+    rng = np.random.default_rng(0)
+    frames = np.arange(200)
+    values = np.stack([np.sin(frames / 10), np.cumsum(rng.normal(0, 0.05, 200)), frames * 0.01], axis=1)
+    for tolerance in (0.001, 0.01, 0.1):
+        keep = KeyframeReduction.rdp_mask(values, tolerance)
+        assert keep[0].all() and keep[-1].all()
+        assert np.abs(interpolate_keys(values, keep) - values).max() <= tolerance + 1e-12
+    # A straight line only needs its ends
+    assert KeyframeReduction.rdp_mask(values, 0.01)[:, 2].sum() == 2
+
+
+def test_rdp_mask_zero_tolerance_keeps_every_sample():
+    values = np.random.default_rng(1).normal(size=(30, 2))
+    assert KeyframeReduction.rdp_mask(values, 0).all()
+
+
+def test_rdp_mask_never_keeps_nan_rows():
+    values = np.sin(np.arange(50) / 5)[:, None].repeat(2, axis=1)
+    values[:5, 0] = np.nan
+    values[20:25] = np.nan
+    values[:, 1] = np.nan
+    keep = KeyframeReduction.rdp_mask(values, 0.01)
+    assert not keep[np.isnan(values)].any()
+    assert keep[5, 0] and keep[-1, 0]
+    assert not keep[:, 1].any()
+
+
+# -------------------------------------------------------------
+# GAP FILLING
+# -------------------------------------------------------------
+def gap_capture(num_frames=20, gap=slice(5, 9)):
+    frames = np.arange(num_frames, dtype=np.float64)
+    points = np.stack([frames, frames ** 2, np.zeros(num_frames)], axis=1)[:, None]
+    visibility = np.ones((num_frames, 1))
+    visibility[gap] = 0.0
+    return points, visibility
+
+
+def test_linear_fill_interpolates_between_gap_borders():
+    points, visibility = gap_capture()
+    filled, valid = GapFilling.fill(points, visibility, method="LINEAR")
+    assert valid.all()
+    np.testing.assert_allclose(filled[5:9, 0, 0], [5, 6, 7, 8])
+    np.testing.assert_allclose(filled[5:9, 0, 1], 16 + (81 - 16) * np.arange(1, 5) / 5)
+
+
+def test_cubic_fill_follows_the_curve():
+    points, visibility = gap_capture()
+    filled, valid = GapFilling.fill(points, visibility, method="CUBIC")
+    assert valid.all()
+    # Tangents from the neighbouring frames: a parabola is reproduced far better than by a straight line
+    exact = np.arange(5, 9) ** 2
+    linear = GapFilling.fill(points, visibility, method="LINEAR")[0][5:9, 0, 1]
+    assert np.abs(filled[5:9, 0, 1] - exact).max() < 0.5 * np.abs(linear - exact).max()
+
+
+def test_fill_leaves_long_gaps_and_capture_ends_empty():
+    points, visibility = gap_capture(gap=slice(5, 15))
+    visibility[:2] = 0.0
+    filled, valid = GapFilling.fill(points, visibility, method="LINEAR", max_gap=9)
+    assert np.isnan(filled[5:15]).all() and not valid[5:15].any()
+    assert np.isnan(filled[:2]).all()
+    filled, valid = GapFilling.fill(points, visibility, method="LINEAR", max_gap=10)
+    assert valid[5:15].all()
+
+
+# -------------------------------------------------------------
+# TRIANGULATION
+# -------------------------------------------------------------
+def look_at(position):
+    """:return: Camera dict at position, looking at the origin."""
+    forward = -np.asarray(position, dtype=np.float64) / np.linalg.norm(position)
+    right = np.cross(forward, [0.0, 0.0, 1.0])
+    right /= np.linalg.norm(right)
+    down = np.cross(forward, right)
+    R = np.stack([right, down, forward])
+    K = np.array([[800.0, 0, 640], [0, 800.0, 360], [0, 0, 1]])
+    return {"K": K, "R": R, "t": -R @ position}
+
+
+def project(projection, points):
+    homogeneous = np.concatenate([points, np.ones(points.shape[:-1] + (1,))], axis=-1) @ projection.T
+    return homogeneous[..., :2] / homogeneous[..., 2:]
+
+
+def test_dlt_recovers_points_from_synthetic_cameras():
+    cameras = [look_at(np.array(p)) for p in ([0, -4, 1], [4, 0, 1.5], [-3, -3, 0.5])]
+    projections = np.stack([Triangulation.projection_matrix(camera) for camera in cameras])
+    points = np.random.default_rng(4).uniform(-0.5, 0.5, size=(6, 5, 3))
+    pixels = np.stack([project(P, points) for P in projections])
+    visibility = np.ones(pixels.shape[:3])
+    visibility[0, 2, 3] = 0.1 #left out, the two other views remain
+    visibility[1:, 4, 1] = 0.0 #seen by one view only
+
+    result, seen = Triangulation.dlt(pixels, visibility, projections)
+    expected = points.copy()
+    expected[4, 1] = np.nan
+    np.testing.assert_allclose(result, expected, atol=1e-6)
+    assert seen[4, 1] == 0 and seen[0, 0] == 1
+
+
+# -------------------------------------------------------------
+# BONE LENGTHS
+# -------------------------------------------------------------
+def test_bone_lengths_become_constant():
+    rng = np.random.default_rng(2)
+    rest = rng.normal(size=(21, 3))
+    points = rest + rng.normal(0, 0.05, size=(40, 21, 3))
+    solved = BoneLengths.solve(points, HAND_BONE_PAIRS, iterations=50)
+    bones = np.asarray(HAND_BONE_PAIRS)
+
+    def spread(p):
+        lengths = np.linalg.norm(p[:, bones[:, 1]] - p[:, bones[:, 0]], axis=-1)
+        return (lengths.std(axis=0) / lengths.mean(axis=0)).max()
+
+    assert spread(solved) < 0.1 * spread(points)
+
+
+def test_bone_lengths_keep_missing_landmarks_missing():
+    points = np.random.default_rng(3).normal(size=(10, 21, 3))
+    points[4, 7] = np.nan
+    solved = BoneLengths.solve(points, HAND_BONE_PAIRS)
+    assert np.isnan(solved[4, 7]).all()
+    assert np.isfinite(np.delete(solved.reshape(-1, 3), 4 * 21 + 7, axis=0)).all()
+    assert BoneLengths.solve(np.empty((0, 21, 3)), HAND_BONE_PAIRS).shape == (0, 21, 3)
+
+
+# -------------------------------------------------------------
+# FOOT CONTACT
+# -------------------------------------------------------------
+def walking_pose(num_frames=60):
+    """:return: Pose (frames, 40, 3) standing on z = 0; the left foot is planted, the right foot steps."""
+    points = np.zeros((num_frames, 40, 3))
+    points[:, [23, 24], 2] = 1.0 #hips, legs are one unit long
+    points[:, [24, 28, 30, 32], 0] = 0.3
+    t = np.arange(num_frames)
+    swing = (t // 10) % 2 == 1
+    points[swing, 30, 2] = points[swing, 32, 2] = 0.3
+    points[:, [30, 32], 1] = np.cumsum(swing)[:, None] * 0.05
+    return points
+
+
+def test_foot_contact_detects_planted_feet():
+    points = walking_pose()
+    contact, ground = FootContact.detect(points, fps=30)
+    assert ground == pytest.approx(0.0)
+    assert contact[:, :2].all() #left heel and toe never move
+    swing = (np.arange(60) // 10) % 2 == 1
+    assert not contact[swing, 2:].any()
+
+
+def test_foot_lock_pins_planted_feet_to_the_ground():
+    points = walking_pose()
+    points[:, [29, 31], 1] += np.arange(60)[:, None] * 0.002 #the planted foot slides slowly
+    points[20:30, [29, 31], 2] += 0.01 #and floats a little
+    contact, ground = FootContact.detect(points, fps=30)
+    assert contact[:, :2].all()
+    locked = FootContact.lock(points, contact, ground)
+    planted = locked[:, FootContact.FOOT_POINTS][contact]
+    np.testing.assert_allclose(planted[:, 2], ground)
+    np.testing.assert_allclose(locked[:, 29], np.broadcast_to(locked[0, 29], (60, 3)))
+
+
+def test_foot_contact_without_legs_finds_nothing():
+    contact, ground = FootContact.detect(np.full((5, 40, 3), np.nan), fps=30)
+    assert contact.shape == (5, 4) and not contact.any()
+
+
+# -------------------------------------------------------------
+# QUALITY REPORT
+# -------------------------------------------------------------
+@pytest.mark.parametrize("num_frames", [0, 1, 30])
+def test_quality_report_of_any_length(num_frames):
+    rng = np.random.default_rng(5)
+    points = rng.normal(size=(num_frames, 21, 3))
+    visibility = np.ones((num_frames, 21))
+    report = QualityReport.compute(points, visibility, HAND_BONE_PAIRS, fps=30,
+                                   side_points=points, side_visibility=visibility)
+    assert report["frames"] == num_frames
+    assert len(report["per_landmark"]["detection_rate"]) == 21
+    assert len(report["bones"]) == len(HAND_BONE_PAIRS)
+    if num_frames == 0:
+        assert report["detection_rate"] is None and report["worst_ranges"] == []
+    else:
+        assert report["detection_rate"] == 1.0
+        assert report["view_agreement"] == 0.0
+    assert (report["jitter"] is None) == (num_frames < 3)
+
+
+def test_quality_report_finds_missing_frames():
+    points = np.zeros((30, 21, 3))
+    visibility = np.ones((30, 21))
+    visibility[10:15] = 0.0
+    report = QualityReport.compute(points, visibility, HAND_BONE_PAIRS, fps=30)
+    assert report["detection_rate"] == pytest.approx(25 / 30)
+    assert report["worst_ranges"][0]["frame_start"] == 11
+    assert report["worst_ranges"][0]["frame_end"] == 15
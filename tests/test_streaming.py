@@ -0,0 +1,83 @@
+import struct
+
+import numpy as np
+import pytest
+
+from streaming import LandmarkPublisher, LandmarkReceiver, Packet
+
+
+@pytest.fixture
+def receiver():
+    receiver = LandmarkReceiver(port=0, host="127.0.0.1")
+    yield receiver
+    receiver.close()
+
+
+def hand_frame():
+    points = np.arange(63, dtype=np.float32).reshape(21, 3) / 10
+    points[5] = np.nan
+    visibility = np.ones(21, dtype=np.float32)
+    visibility[5] = 0.0
+    return points, visibility
+
+
+@pytest.mark.parametrize("protocol", ["UDP", "OSC"])
+def test_round_trip_over_local_socket(receiver, protocol):
+    publisher = LandmarkPublisher("127.0.0.1", receiver.socket.getsockname()[1], protocol)
+    points, visibility = hand_frame()
+    publisher.send("Left", points.ravel().tolist(), visibility, frame_index=42, actor=0)
+    packet = receiver.receive(timeout=2.0)
+    publisher.close()
+
+    assert packet is not None
+    assert packet["kind"] == "Left"
+    assert packet["frame"] == 42
+    assert packet["sequence"] == 0
+    assert np.isnan(packet["points"][5]).all()
+    assert packet["visibility"][5] == 0.0
+    mask = ~np.isnan(points)
+    np.testing.assert_array_equal(packet["points"][mask], points[mask])
+
+
+@pytest.mark.parametrize("protocol", ["UDP", "OSC"])
+def test_dropped_counts_every_lost_packet(receiver, protocol):
+    publisher = LandmarkPublisher("127.0.0.1", receiver.socket.getsockname()[1], protocol)
+    points, visibility = hand_frame()
+    publisher.send("Right", points.ravel(), visibility)
+    publisher.sequence += 4 #4 packets lost on the way
+    publisher.send("Right", points.ravel(), visibility)
+    publisher.send("Right", points.ravel(), visibility)
+    for _ in range(3):
+        assert receiver.receive(timeout=2.0) is not None
+    publisher.close()
+    assert receiver.dropped == 4
+    assert receiver.reordered == 0
+
+
+def test_late_packet_counts_as_reordered(receiver):
+    sender = LandmarkPublisher("127.0.0.1", receiver.socket.getsockname()[1])
+    points, visibility = hand_frame()
+    for sequence in (0, 2, 1):
+        sender.socket.sendto(Packet.pack("pose", np.zeros((40, 3)), None, sequence, sequence), sender.address)
+        assert receiver.receive(timeout=2.0) is not None
+    sender.close()
+    assert receiver.dropped == 0
+    assert receiver.reordered == 1
+
+
+def test_unpack_rejects_malformed_packets():
+    data = Packet.pack("pose", np.zeros((40, 3)), None, 7, 3)
+    assert Packet.unpack(data)["sequence"] == 7
+    assert Packet.unpack(data[:-1]) is None #truncated landmarks
+    assert Packet.unpack(data[:10]) is None #truncated header
+    assert Packet.unpack(b"XXXX" + data[4:]) is None #magic
+    assert Packet.unpack(data[:4] + bytes([Packet.VERSION + 1]) + data[5:]) is None #version
+    assert Packet.unpack(data[:5] + bytes([len(Packet.KINDS)]) + data[6:]) is None #kind
+    assert Packet.unpack(b"") is None
+
+    osc = Packet.pack_osc("Right", np.zeros((21, 3)), None, 1, 1)
+    assert Packet.unpack(osc)["kind"] == "Right"
+    assert Packet.unpack(osc[:-8]) is None
+    assert Packet.unpack(osc.replace(b"/openmocap/right", b"/openmocap/other")) is None
+    assert Packet.unpack(b"/openmocap/pose\0") is None
+    assert Packet.unpack(osc[:48] + struct.pack(">i", -16) + osc[52:]) is None
@@ -0,0 +1,102 @@
+import itertools
+
+import numpy as np
+
+from tracking import Assignment, HandIdentityTracker, LandmarkStore
+
+WIDTH = 1000
+
+
+def hand(x, y, hand_type, score=0.95):
+    """:return: cvzone hand dict with the palm centered on pixel (x, y)."""
+    return {'lmList': [[x, y, 0]] * 21, 'type': hand_type, 'score': score}
+
+
+def identities(result):
+    return [identity for identity, _ in result]
+
+
+def test_hand_identity_is_kept_when_handedness_flips():
+    tracker = HandIdentityTracker()
+    assert identities(tracker.update([hand(200, 500, "Right")], WIDTH)) == ["Right"]
+    # MediaPipe flips the label of the same hand, with little movement: the tracked identity wins
+    for x in (210, 220, 230):
+        assert identities(tracker.update([hand(x, 500, "Left", score=0.6)], WIDTH)) == ["Right"]
+
+
+def test_two_hands_keep_their_identities():
+    tracker = HandIdentityTracker()
+    result = dict(tracker.update([hand(200, 500, "Right"), hand(800, 500, "Left")], WIDTH))
+    assert result["Right"]['lmList'][0][0] == 200
+    # Both labels flip: the hands are still matched by position
+    result = dict(tracker.update([hand(790, 500, "Right"), hand(210, 500, "Left")], WIDTH))
+    assert result["Right"]['lmList'][0][0] == 210
+    assert result["Left"]['lmList'][0][0] == 790
+
+
+def test_fast_single_hand_does_not_swap_labels():
+    tracker = HandIdentityTracker()
+    tracker.update([hand(100, 500, "Right")], WIDTH)
+    # Jumps further than the search radius: not started as a new left hand, only dropped
+    assert tracker.update([hand(400, 500, "Right")], WIDTH) == []
+    assert "Left" not in tracker.tracks
+    # The search radius grows while the hand is missed, and catches it again
+    assert identities(tracker.update([hand(380, 500, "Right")], WIDTH)) == ["Right"]
+    assert identities(tracker.update([hand(440, 500, "Right")], WIDTH)) == ["Right"]
+
+
+def test_unsure_handedness_still_starts_a_new_hand():
+    tracker = HandIdentityTracker()
+    tracker.update([hand(100, 500, "Right")], WIDTH)
+    # A far detection the detector is not sure of may be the other hand
+    assert identities(tracker.update([hand(900, 500, "Right", score=0.5)], WIDTH)) == ["Left"]
+
+
+def test_lost_hand_is_forgotten_after_max_missed():
+    tracker = HandIdentityTracker(max_missed=2)
+    tracker.update([hand(100, 500, "Right")], WIDTH)
+    for _ in range(3):
+        tracker.update([], WIDTH)
+    assert tracker.tracks == {}
+    assert identities(tracker.update([hand(900, 500, "Left")], WIDTH)) == ["Left"]
+
+
+def test_landmark_store_pads_skipped_frames():
+    store = []
+    empty, hidden = LandmarkStore.empty("hand")
+    LandmarkStore.put(store, 3, [1.0] * 63, empty)
+    assert len(store) == 4
+    assert all(np.isnan(frame).all() for frame in store[:3])
+    LandmarkStore.put(store, 1, [2.0] * 63, empty) #late frame replaces its padding
+    LandmarkStore.put(store, 4, [3.0] * 63, empty)
+    assert len(store) == 5
+    assert store[1][0] == 2.0 and np.isnan(store[2][0]) and store[3][0] == 1.0 and store[4][0] == 3.0
+    # Padding rows are copies, not the shared EMPTY constant
+    store[0][0] = 0.0
+    assert np.isnan(LandmarkStore.EMPTY_HAND[0]) and np.isnan(store[2][0])
+    assert hidden == [0.0] * 21
+
+
+def brute_force(cost):
+    """:return: Lowest total cost of a complete assignment of the smaller side."""
+    rows, cols = cost.shape
+    if rows <= cols:
+        return min(sum(cost[r, c] for r, c in enumerate(p)) for p in itertools.permutations(range(cols), rows))
+    return brute_force(cost.T)
+
+
+def test_hungarian_matches_brute_force():
+    rng = np.random.default_rng(6)
+    for shape in [(1, 1), (3, 3), (4, 6), (6, 4), (5, 5)]:
+        cost = rng.uniform(0, 10, size=shape)
+        pairs = Assignment.hungarian(cost)
+        assert len(pairs) == min(shape)
+        assert len({r for r, _ in pairs}) == len({c for _, c in pairs}) == len(pairs)
+        assert np.isclose(sum(cost[pair] for pair in pairs), brute_force(cost))
+
+
+def test_hungarian_leaves_forbidden_pairs_out():
+    cost = np.array([[1.0, np.inf], [np.inf, np.inf], [np.inf, 2.0]])
+    assert Assignment.hungarian(cost) == [(0, 0), (2, 1)]
+    assert Assignment.hungarian(np.full((2, 2), np.inf)) == []
+    assert Assignment.hungarian(np.zeros((0, 3))) == []
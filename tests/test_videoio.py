@@ -0,0 +1,103 @@
+import pytest
+
+import videoio
+from videoio import CAP_PROP_POS_FRAMES, FrameIndex, FrameReader
+
+
+class StubCapture:
+    """
+        Reader with the cv2.VideoCapture interface over numbered frames. Like OpenCV on many videos,
+        a seek is only exact to a keyframe: other targets land a few frames off.
+    """
+
+    def __init__(self, frame_count, keyframes):
+        self.frame_count = frame_count
+        self.keyframes = set(keyframes)
+        self.position = 0
+        self.seeks = []
+        self.decoded = 0
+
+    def set(self, prop, value):
+        assert prop == CAP_PROP_POS_FRAMES
+        frame = int(value)
+        self.seeks.append(frame)
+        self.position = frame if frame in self.keyframes else frame + 2
+        return True
+
+    def get(self, prop):
+        assert prop == CAP_PROP_POS_FRAMES
+        return float(self.position)
+
+    def grab(self):
+        return self.read()[0]
+
+    def read(self):
+        if self.position >= self.frame_count:
+            return False, None
+        self.decoded += 1
+        self.position += 1
+        return True, self.position - 1
+
+    def release(self):
+        pass
+
+
+def test_keyframe_before():
+    index = FrameIndex([i / 30 for i in range(100)], [0, 30, 60])
+    assert [index.keyframe_before(frame) for frame in (0, 29, 30, 59, 99)] == [0, 0, 30, 30, 60]
+    assert FrameIndex([0.0, 0.1]).keyframe_before(1) is None
+
+
+def test_seek_decodes_forward_from_the_keyframe_before():
+    index = FrameIndex([i / 30 for i in range(100)], [0, 30, 60])
+    cap = StubCapture(100, [0, 30, 60])
+    index.seek(cap, 45)
+    assert cap.seeks == [30] and cap.decoded == 15
+    assert cap.read() == (True, 45)
+
+
+def test_seek_goes_on_from_the_current_position():
+    index = FrameIndex([i / 30 for i in range(100)], [0, 30, 60])
+    cap = StubCapture(100, [0, 30, 60])
+    index.seek(cap, 40)
+    cap.read()
+    index.seek(cap, 50) #no seek back to 30
+    assert cap.seeks == [30]
+    assert cap.read() == (True, 50)
+    index.seek(cap, 10) #behind the reader: seek to the keyframe
+    assert cap.seeks == [30, 0] and cap.read() == (True, 10)
+
+
+@pytest.fixture
+def reader(monkeypatch):
+    """:return: function (keyframes) -> FrameReader over a stub video of 100 frames."""
+    def make(keyframes):
+        cap = StubCapture(100, range(100) if keyframes is None else keyframes)
+        monkeypatch.setattr(videoio, "open_video", lambda path, decoder="opencv": cap)
+        monkeypatch.setattr(FrameIndex, "load", staticmethod(lambda path: FrameIndex([i / 30 for i in range(100)], keyframes)))
+        return FrameReader("take.mp4")
+    return make
+
+
+def test_frame_reader_plays_forward_without_seeking(reader):
+    frames = reader([0, 30, 60])
+    assert [frames.frame(frame) for frame in range(0, 40)] == list(range(0, 40))
+    assert frames.cap.seeks == [] and frames.cap.decoded == 40
+    # Skipping a few frames ahead decodes through them
+    assert frames.frame(50) == 50 and frames.cap.seeks == []
+
+
+def test_frame_reader_seeks_back_and_past_a_keyframe(reader):
+    frames = reader([0, 30, 60])
+    assert frames.frame(65) == 65 and frames.cap.seeks == [60]
+    assert frames.frame(20) == 20 and frames.cap.seeks == [60, 0]
+    assert frames.frame(20) == 20 and frames.cap.seeks == [60, 0] #same frame again: not decoded again
+    assert frames.frame(-1) is None and frames.frame(100) is None
+
+
+def test_frame_reader_without_keyframes_decodes_forward_a_little(reader):
+    frames = reader(None)
+    frames.frame(0)
+    assert frames.frame(FrameReader.MAX_FORWARD) == FrameReader.MAX_FORWARD and frames.cap.seeks == []
+    assert frames.frame(FrameReader.MAX_FORWARD * 3) == FrameReader.MAX_FORWARD * 3
+    assert frames.cap.seeks == [FrameReader.MAX_FORWARD * 3]
@@ -0,0 +1,891 @@
+"""
+    Frame-by-frame tracking helpers.
+    Nothing in here depends on Blender, so it can also be used by plain Python tools
+    (see cli.py for tracking videos without opening Blender).
+"""
+
+import itertools
+import threading
+import numpy as np
+
+try:
+    from . import videoio
+    from . import libraries
+except ImportError:
+    # Used by a plain Python tool outside of the add-on package
+    import videoio
+    import libraries
+
+
+
+# -------------------------------------------------------------
+# IMPORTING EXTERNAL LIBRARIES
+# -------------------------------------------------------------
+# Imported on first use (see libraries.py), not when the add-on is loaded
+cv2 = libraries.cv2
+mp = libraries.mp
+PoseDetector = libraries.PoseDetector
+HandDetector = libraries.HandDetector
+
+
+
+# -------------------------------------------------------------
+# SOME USEFUL MATH UTILITIES
+# -------------------------------------------------------------
+class MathUtility:
+    @staticmethod
+    def centroid(list_of_points):
+        """
+            :param list_of_points: List of points whose centroid is to be calculated.
+            :return: Centroid of the points in the list.
+        """
+        avg_x = sum(p[0] for p in list_of_points) / len(list_of_points)
+        avg_y = sum(p[1] for p in list_of_points) / len(list_of_points)
+        avg_z = sum(p[2] for p in list_of_points) / len(list_of_points)
+        return [avg_x,avg_y,avg_z]
+    
+    @staticmethod
+    def normalize_coordinates(coordinates,height,width,scale):
+        """
+            :param coordinates: Original [x,y,z] (Unnormalized)
+            :param height: Height of the video. 
+            :param width: Width of the video.
+            :param scale: Scales z to cover up for inaccuracy in z value tracked by the tracker.
+            :return: Normalized [x,y,z] 
+        """
+        x = (coordinates[0] - (width/2))/100 #centre x
+        y = (coordinates[1]-height)/100 #translate y up
+        z = coordinates[2]/scale
+        return [x,y,z]
+    
+    @staticmethod
+    def cv2blender_coordinates(cv_coordinates):
+        """
+            :param cv_coordinates: [x,y,z] as per Opencv's convention.
+            :return: [x,y,z] as per Blender's convention.
+        """
+        x = cv_coordinates[0]       #blender.x = cv2.x
+        y = cv_coordinates[2]       #blender.y = cv2.z
+        z = -cv_coordinates[1]      #blender.z = cv2.(-y)
+        return [x,y,z]
+
+
+
+# -------------------------------------------------------------
+# LENS UNDISTORTION UTILITY
+# -------------------------------------------------------------
+class LensUndistortion:
+    """
+        Removes lens distortion from the detected landmarks instead of from the video frames:
+        undistorting ~40 points per frame costs next to nothing, undistorting every frame does not.
+        Needs a camera calibrated with calibration.py (intrinsics "K", distortion "dist", video "size").
+    """
+
+    @staticmethod
+    def check(camera, width, height):
+        """
+            :param camera: Camera dict, or None.
+            :return: The camera if it was calibrated at this video size, else None (calibration does not apply).
+        """
+        if camera is None:
+            return None
+        if list(camera["size"]) != [width, height]:
+            print(f"Camera '{camera['name']}' was calibrated at {camera['size'][0]}x{camera['size'][1]}, "
+                  f"not {width}x{height}. Skipping lens undistortion.")
+            return None
+        return camera
+
+    @staticmethod
+    def points(points, camera):
+        """
+            :param points: Array (..., 3) of normalized landmarks (see MathUtility.normalize_coordinates). NaN marks a missing landmark.
+            :param camera: Camera dict with "size", "K" and "dist".
+            :return: Array (..., 3) with undistorted x and y. z is left as it is.
+        """
+        points = np.array(points, dtype=np.float64)
+        flat = points.reshape(-1, 3)
+        valid = ~np.isnan(flat).any(axis=1)
+        if not valid.any():
+            return points
+
+        # --- Back to pixels (inverse of normalize_coordinates), undistort, and normalize again ---
+        width, height = camera["size"]
+        pixels = np.stack([flat[valid, 0] * 100 + width / 2, flat[valid, 1] * 100 + height], axis=-1)
+        K = np.asarray(camera["K"], dtype=np.float64)
+        undistorted = cv2.undistortPoints(pixels.reshape(-1, 1, 2), K, np.asarray(camera["dist"], dtype=np.float64), P=K)
+        undistorted = undistorted.reshape(-1, 2)
+        flat[valid, 0] = (undistorted[:, 0] - width / 2) / 100
+        flat[valid, 1] = (undistorted[:, 1] - height) / 100
+        return flat.reshape(points.shape)
+
+    @staticmethod
+    def frame(frame, camera):
+        """
+            :param frame: Flat [x,y,z,...] list of normalized landmarks of one frame.
+            :param camera: Camera dict with "size", "K" and "dist".
+            :return: Flat list of the undistorted landmarks.
+        """
+        return LensUndistortion.points(np.reshape(frame, (-1, 3)), camera).ravel().tolist()
+
+
+
+# -------------------------------------------------------------
+# LANDMARK STORAGE UTILITY
+# -------------------------------------------------------------
+class LandmarkStore:
+    EMPTY_POSE = [np.nan] * 120 #40 landmarks not detected
+    HIDDEN_POSE = [0.0] * 40
+    EMPTY_HAND = [np.nan] * 63 #21 landmarks not detected
+    HIDDEN_HAND = [0.0] * 21
+    """
+        The motion data lists in globalVariables are indexed by source video frame:
+        element n always belongs to frame n of the video, so pose, right hand and left hand share one timeline.
+    """
+
+    @staticmethod
+    def put(store, frame_index, values, empty):
+        """
+            :param store: Motion data list (e.g. gvar.R_hand_positionList).
+            :param frame_index: Source video frame index of the values.
+            :param values: Data of this frame.
+            :param empty: Data used for skipped frames before frame_index.
+        """
+        while len(store) < frame_index:
+            store.append(list(empty))
+        if frame_index < len(store):
+            store[frame_index] = list(values)
+        else:
+            store.append(list(values))
+
+    @staticmethod
+    def empty(kind):
+        """
+            :param kind: "pose" or "hand".
+            :return: (landmarks, visibility) of a frame where nothing was detected.
+        """
+        if kind == "pose":
+            return LandmarkStore.EMPTY_POSE, LandmarkStore.HIDDEN_POSE
+        return LandmarkStore.EMPTY_HAND, LandmarkStore.HIDDEN_HAND
+
+    @staticmethod
+    def names(kind, view):
+        """
+            :param kind: "pose", "Right" or "Left".
+            :param view: "front" or "side".
+            :return: Names of the (positions, visibility) lists in globalVariables.
+        """
+        prefix = "" if kind == "pose" else f"{kind[0]}_hand_"
+        if view == "front":
+            return f"{prefix}positionList", f"{prefix}visibilityList"
+        return f"{prefix}zlist", f"{prefix}zvisibilityList"
+
+    @staticmethod
+    def find(data, kind):
+        """
+            Motion data of one camera may be stored under either view's names (e.g. a job tracked as "side").
+            :param data: Dict of motion data lists (e.g. from processing.LandmarkFile.load).
+            :param kind: "pose", "Right" or "Left".
+            :return: (positions list, visibility list) of the first view found, or ([], []) if there is none.
+        """
+        for view in ("front", "side"):
+            positions, visibility = LandmarkStore.names(kind, view)
+            if data.get(positions):
+                return data[positions], data.get(visibility, [])
+        return [], []
+
+
+
+# -------------------------------------------------------------
+# LANDMARK EXTRACTION
+# -------------------------------------------------------------
+class PoseLandmarks:
+    # --- Custom points (centroids) ---
+    CENTROID_PAIRS = [
+        (23, 24),  # hips           (point 33)
+        (11, 12),  # shoulders      (point 34)
+        (18, 20),  # right hand     (point 35)
+        (17, 19),  # left hand      (point 36)
+        (7, 8),    # ears           (point 37)
+        (9, 10),   # mouth          (point 38)
+        (1, 4)     # eyes           (point 39)
+    ]
+
+    @staticmethod
+    def create_detector(detection_confidence=0.5):
+        """
+            :param detection_confidence: Minimum confidence (0 to 1) of a person detection.
+            :return: A new cvzone PoseDetector.
+        """
+        return PoseDetector(detectionCon=detection_confidence)
+
+    @staticmethod
+    def extract(detector, img):
+        """
+            :param detector: cvzone PoseDetector.
+            :param img: Image on which pose dectection is to be performed.
+            :return: (image with landmarks drawn on it,
+                      flat [x,y,z,...] list of 40 normalized landmarks or None if nothing was detected,
+                      visibility (0 to 1) of the 40 landmarks or None if nothing was detected)
+        """
+        img = detector.findPose(img)
+        height, width = img.shape[:2]
+        landmarksList, boundingBoxInfo = detector.findPosition(img)
+
+        if not boundingBoxInfo:
+            return img, None, None
+
+        # --- Visibility of the 33 MediaPipe landmarks ---
+        visibility = [lm.visibility for lm in detector.results.pose_landmarks.landmark]
+        frame, visibility = PoseLandmarks.from_pixels(landmarksList, visibility, height, width)
+        return img, frame, visibility
+
+    @staticmethod
+    def from_pixels(landmarksList, visibility, height, width):
+        """
+            :param landmarksList: 33 MediaPipe landmarks as [x,y,z] in pixels.
+            :param visibility: Visibility (0 to 1) of the 33 landmarks.
+            :param height: Height of the video.
+            :param width: Width of the video.
+            :return: (flat [x,y,z,...] list of 40 normalized landmarks including the custom points, visibility of the 40 landmarks)
+        """
+        visibility = list(visibility)
+        extra_points = []
+        for a, b in PoseLandmarks.CENTROID_PAIRS:
+            centroid = MathUtility.centroid([landmarksList[a], landmarksList[b]])
+            normalized = MathUtility.normalize_coordinates(centroid, height, width, 400)
+            extra_points.append(normalized)
+            visibility.append(min(visibility[a], visibility[b]))
+
+        frame = []
+        for landmark in landmarksList:
+            normalized = MathUtility.normalize_coordinates(landmark, height, width, 400)
+            frame.extend(normalized)
+
+        for point in extra_points:
+            frame.extend(point)
+
+        return frame, visibility
+
+
+class MultiPoseLandmarks:
+    """
+        Multi-person pose detection with MediaPipe's PoseLandmarker task (cvzone's PoseDetector only finds one person).
+        Needs a pose landmarker model file (e.g. pose_landmarker_full.task from the MediaPipe website).
+    """
+
+    @staticmethod
+    def create_detector(num_poses, model_path):
+        """
+            :param num_poses: Maximum number of people to detect per frame.
+            :param model_path: Path of the .task model file.
+            :return: A MediaPipe PoseLandmarker in video mode.
+        """
+        from mediapipe.tasks.python import BaseOptions
+        from mediapipe.tasks.python import vision
+        options = vision.PoseLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.VIDEO,
+            num_poses=num_poses
+        )
+        return vision.PoseLandmarker.create_from_options(options)
+
+    @staticmethod
+    def extract(detector, img, timestamp_ms):
+        """
+            :param detector: PoseLandmarker from create_detector.
+            :param img: Image on which pose dectection is to be performed.
+            :param timestamp_ms: Timestamp of the frame in the video (must increase from frame to frame).
+            :return: (image with landmarks drawn on it,
+                      list of (flat list of 40 normalized landmarks, visibility of the 40 landmarks,
+                      hips/shoulders centroid as fraction of image width) for every detected person)
+        """
+        height, width = img.shape[:2]
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        result = detector.detect_for_video(image, int(timestamp_ms))
+
+        people = []
+        for landmarks in result.pose_landmarks:
+            # Same pixel convention as cvzone: z is scaled like x
+            landmarksList = [[lm.x * width, lm.y * height, lm.z * width] for lm in landmarks]
+            visibility = [lm.visibility if lm.visibility is not None else 1.0 for lm in landmarks]
+            frame, visibility = PoseLandmarks.from_pixels(landmarksList, visibility, height, width)
+            torso = np.asarray([landmarksList[i][:2] for i in (11, 12, 23, 24)]).mean(axis=0) / width
+            people.append((frame, visibility, torso))
+
+            for x, y, _ in landmarksList:
+                cv2.circle(img, (int(x), int(y)), 4, (255, 0, 255), cv2.FILLED)
+        return img, people
+
+
+class HandLandmarks:
+    @staticmethod
+    def create_detector(num_hands, detection_confidence=0.8):
+        """
+            :param detection_confidence: Minimum confidence (0 to 1) of a palm detection.
+            :return: A new cvzone HandDetector tracking up to num_hands hands.
+        """
+        # Stream mode: MediaPipe only runs palm detection again when landmark tracking is lost
+        return HandDetector(staticMode=False, maxHands=num_hands, detectionCon=detection_confidence, minTrackCon=0.5)
+
+    @staticmethod
+    def extract(detector, identity_tracker, img):
+        """
+            :param detector: cvzone HandDetector.
+            :param identity_tracker: HandIdentityTracker deciding which hand is 'Right' and which is 'Left'.
+            :param img: Image on which hand dectection is to be performed.
+            :return: (image with landmarks drawn on it,
+                      dict 'Right'/'Left' -> list of 21 normalized [x,y,z] for every detected hand)
+        """
+        height, width = img.shape[:2]
+        hands, img = detector.findHands(img)
+        if hands and detector.results.multi_handedness:
+            # cvzone keeps the label only, the identity tracker also needs how sure MediaPipe is of it
+            for hand, handedness in zip(hands, detector.results.multi_handedness):
+                hand['score'] = handedness.classification[0].score
+
+        # --- Landmarks of every detected hand, by tracked identity ---
+        detected = {}
+        for handType, hand in identity_tracker.update(hands, width):  # 'Right' or 'Left'
+            normalized_landmarks = []
+            for landmark in hand['lmList']:
+                normalized = MathUtility.normalize_coordinates(landmark, height, width, 40)
+                normalized_landmarks.append(normalized)
+            detected[handType] = normalized_landmarks
+        return img, detected
+
+
+
+# -------------------------------------------------------------
+# DETECTOR POOL
+# -------------------------------------------------------------
+class DetectorPool:
+    free = {} #settings key -> list of idle detectors
+    keys = {} #id of a handed out detector -> its settings key
+    lock = threading.Lock()
+    """
+        Keeps cvzone pose and hand detectors between tracking sessions: building a MediaPipe graph and loading
+        its model takes far longer than resetting one. A released detector is reset (its tracking and smoothing
+        state is cleared, as for a new video) and handed out again to the next session with the same settings.
+    """
+
+    @staticmethod
+    def key(kind, num_hands=2, detection_confidence=None):
+        """:return: Settings key: detectors are only shared between sessions with the same settings."""
+        return (kind, num_hands if kind == "hand" else 0, detection_confidence)
+
+    @staticmethod
+    def create(key):
+        kind, num_hands, detection_confidence = key
+        settings = {} if detection_confidence is None else {"detection_confidence": detection_confidence}
+        if kind == "pose":
+            return PoseLandmarks.create_detector(**settings)
+        return HandLandmarks.create_detector(num_hands, **settings)
+
+    @staticmethod
+    def reset(detector):
+        """Clears the state MediaPipe keeps from the previous frames."""
+        for name in ("pose", "hands"):
+            solution = getattr(detector, name, None)
+            if solution is not None and hasattr(solution, "reset"):
+                solution.reset()
+
+    @classmethod
+    def acquire(cls, kind, num_hands=2, detection_confidence=None):
+        """
+            :param kind: "pose" or "hand".
+            :param num_hands: Numbers of hands to track (1 or 2), hand tracking only.
+            :param detection_confidence: Optional minimum detection confidence, instead of the detector's default.
+            :return: An idle detector with these settings, or a new one.
+        """
+        key = DetectorPool.key(kind, num_hands, detection_confidence)
+        with cls.lock:
+            detector = cls.free[key].pop() if cls.free.get(key) else None
+        if detector is None:
+            detector = DetectorPool.create(key)
+        with cls.lock:
+            cls.keys[id(detector)] = key
+        return detector
+
+    @classmethod
+    def release(cls, detector):
+        """:param detector: A detector from acquire, which must not be used by the caller anymore."""
+        with cls.lock:
+            key = cls.keys.pop(id(detector), None)
+        if key is None:
+            return
+        DetectorPool.reset(detector)
+        with cls.lock:
+            cls.free.setdefault(key, []).append(detector)
+
+    @classmethod
+    def clear(cls):
+        """Closes the idle detectors (e.g. when the add-on is disabled)."""
+        with cls.lock:
+            detectors = [detector for idle in cls.free.values() for detector in idle]
+            cls.free.clear()
+        for detector in detectors:
+            for name in ("pose", "hands"):
+                solution = getattr(detector, name, None)
+                if solution is not None and hasattr(solution, "close"):
+                    solution.close()
+
+    @classmethod
+    def warm_up(cls, kinds=("pose", "hand")):
+        """
+            Creates a detector of each kind (default settings) in a background thread and runs one blank frame
+            through it, so that the model and runtime are loaded before the first tracking session.
+            :return: The started thread.
+        """
+        def work():
+            blank = np.zeros((256, 256, 3), dtype=np.uint8)
+            for kind in kinds:
+                try:
+                    detector = cls.acquire(kind)
+                    if kind == "pose":
+                        detector.findPose(blank, draw=False)
+                    else:
+                        detector.findHands(blank, draw=False)
+                    cls.release(detector)
+                except Exception as error:
+                    print(f"[Open Mocap] Detector warm-up failed ({kind}): {error}")
+
+        thread = threading.Thread(target=work, daemon=True)
+        thread.start()
+        return thread
+
+
+
+# -------------------------------------------------------------
+# REGION OF INTEREST UTILITY
+# -------------------------------------------------------------
+class RegionOfInterest:
+    """
+        Detection on a part of the frame only (e.g. to keep a second person or a reflection out of a re-tracked range).
+        The landmarks are moved back to the coordinates of the whole frame, so they match the rest of the capture.
+    """
+
+    @staticmethod
+    def crop(img, roi):
+        """
+            :param img: The whole frame.
+            :param roi: (min x, min y, max x, max y) as fractions (0 to 1) of the frame size.
+            :return: (contiguous copy of the region, (x offset, y offset, region width, region height) in pixels)
+        """
+        height, width = img.shape[:2]
+        x0, x1 = sorted((int(round(roi[0] * width)), int(round(roi[2] * width))))
+        y0, y1 = sorted((int(round(roi[1] * height)), int(round(roi[3] * height))))
+        x0, y0 = min(max(x0, 0), width - 1), min(max(y0, 0), height - 1)
+        x1, y1 = max(min(x1, width), x0 + 1), max(min(y1, height), y0 + 1)
+        return np.ascontiguousarray(img[y0:y1, x0:x1]), (x0, y0, x1 - x0, y1 - y0)
+
+    @staticmethod
+    def to_frame(frame, box, width, height):
+        """
+            :param frame: Flat [x,y,z,...] landmarks normalized in the region (see MathUtility.normalize_coordinates).
+            :param box: (x offset, y offset, region width, region height) from crop.
+            :param width: Width of the whole frame.
+            :param height: Height of the whole frame.
+            :return: Flat list of the landmarks normalized in the whole frame.
+        """
+        x0, y0, region_width, region_height = box
+        points = np.asarray(frame, dtype=np.float64).reshape(-1, 3)
+        points[:, 0] += (region_width / 2 + x0 - width / 2) / 100
+        points[:, 1] += (region_height + y0 - height) / 100
+        points[:, 2] *= width / region_width #z is in pixels of the image width
+        return points.ravel().tolist()
+
+
+
+# -------------------------------------------------------------
+# HAND IDENTITY TRACKING UTILITY
+# -------------------------------------------------------------
+class HandIdentityTracker:
+    PALM = [0, 5, 9, 13, 17] #wrist and finger bases
+    IDENTITIES = ("Right", "Left")
+    """
+        Keeps the identity ('Right' or 'Left') of each hand stable across frames.
+        MediaPipe's per-frame handedness often flips, so each detection is instead matched to the hands
+        tracked on the previous frames (constant velocity prediction of the palm centroid) with a
+        minimum-cost assignment. The detector's handedness is only a small tie-breaker, and decides
+        the identity when a hand (re)appears. A lone hand the detector is sure of never starts the other
+        identity: a fast hand leaving its search radius is dropped until the radius catches up, instead of
+        swapping labels for good.
+    """
+
+    def __init__(self, max_distance=0.15, handedness_weight=0.2, new_hand_cost=0.5, max_missed=5,
+                 min_handedness_score=0.8):
+        """
+            :param max_distance: Largest palm movement between two frames (fraction of image width) still matched to a hand.
+            :param handedness_weight: Extra cost when the detector's handedness disagrees with the tracked identity.
+            :param new_hand_cost: Cost of starting a hand that is not tracked yet.
+            :param max_missed: Number of frames a hand is kept (predicted) while not detected.
+            :param min_handedness_score: Handedness score (0 to 1) from which the detector's handedness is trusted.
+        """
+        self.max_distance = max_distance
+        self.handedness_weight = handedness_weight
+        self.new_hand_cost = new_hand_cost
+        self.max_missed = max_missed
+        self.min_handedness_score = min_handedness_score
+        self.tracks = {} #identity -> {"position", "velocity", "missed"}
+
+    def reset(self):
+        """Forgets all tracked hands (e.g. at the start of a new video)."""
+        self.tracks.clear()
+
+    def predict(self, identity):
+        """:return: Predicted palm centroid of a tracked hand on the current frame."""
+        track = self.tracks[identity]
+        return track["position"] + track["velocity"] * (track["missed"] + 1)
+
+    def cost(self, identity, position, hand_type):
+        """
+            :param identity: 'Right' or 'Left'.
+            :param position: Palm centroid of the detection (fraction of image width).
+            :param hand_type: Handedness reported by the detector.
+            :return: Cost of giving the detection this identity (inf if impossible).
+        """
+        penalty = self.handedness_weight if hand_type != identity else 0.0
+        if identity not in self.tracks:
+            return self.new_hand_cost + 2 * penalty
+        # The search radius grows while a hand is not detected
+        radius = self.max_distance * (self.tracks[identity]["missed"] + 1)
+        distance = np.linalg.norm(self.predict(identity) - position)
+        if distance > radius:
+            return np.inf
+        return distance / radius + penalty
+
+    def update(self, hands, width):
+        """
+            :param hands: Hands detected on the current frame (cvzone dicts with 'lmList', 'type' and optionally
+                          'score', how sure the detector is of the type).
+            :param width: Width of the frame, used to make distances resolution independent.
+            :return: List of (identity, hand) pairs. Hands that cannot be matched are left out.
+        """
+        hands = list(hands)[:len(self.IDENTITIES)]
+        positions = [
+            np.asarray([hand['lmList'][i][:2] for i in self.PALM], dtype=np.float64).mean(axis=0) / width
+            for hand in hands
+        ]
+        costs = np.array([
+            [self.cost(identity, position, hand['type']) for identity in self.IDENTITIES]
+            for hand, position in zip(hands, positions)
+        ]).reshape(len(hands), len(self.IDENTITIES))
+        if len(hands) == 1 and hands[0].get('score', 0.0) >= self.min_handedness_score:
+            for i, identity in enumerate(self.IDENTITIES):
+                if identity != hands[0]['type'] and identity not in self.tracks:
+                    costs[0, i] = np.inf
+
+        # --- Minimum cost assignment (exhaustive search is exact for at most two hands) ---
+        best, best_cost = [], np.inf
+        for identities in itertools.permutations(range(len(self.IDENTITIES)), len(hands)):
+            total = sum(costs[d, i] for d, i in enumerate(identities))
+            if total < best_cost:
+                best, best_cost = list(enumerate(identities)), total
+        if not np.isfinite(best_cost):
+            # Some detection is too far from every hand: match the ones that can be matched
+            best = [(d, int(np.argmin(costs[d]))) for d in range(len(hands)) if np.isfinite(costs[d]).any()]
+            if len({i for _, i in best}) < len(best):
+                best = [min(best, key=lambda pair: costs[pair])]
+
+        # --- Update the tracks ---
+        matched = {}
+        for d, i in best:
+            identity = self.IDENTITIES[i]
+            position = positions[d]
+            track = self.tracks.get(identity)
+            if track is None:
+                self.tracks[identity] = {"position": position, "velocity": np.zeros(2), "missed": 0}
+            else:
+                velocity = (position - track["position"]) / (track["missed"] + 1)
+                track["velocity"] = 0.5 * track["velocity"] + 0.5 * velocity
+                track["position"] = position
+                track["missed"] = 0
+            matched[identity] = hands[d]
+
+        for identity in list(self.tracks):
+            if identity not in matched:
+                self.tracks[identity]["missed"] += 1
+                if self.tracks[identity]["missed"] > self.max_missed:
+                    del self.tracks[identity]
+
+        return list(matched.items())
+
+
+
+# -------------------------------------------------------------
+# ACTOR IDENTITY TRACKING UTILITY
+# -------------------------------------------------------------
+class Assignment:
+    @staticmethod
+    def hungarian(cost):
+        """
+            Minimum cost assignment (Hungarian algorithm with potentials, O(n^2 m)).
+            :param cost: Array (rows, columns). Infinite entries are forbidden pairs.
+            :return: List of (row, column) pairs. Rows that can only be given a forbidden column are left out.
+        """
+        cost = np.asarray(cost, dtype=np.float64)
+        rows, cols = cost.shape
+        if rows == 0 or cols == 0:
+            return []
+        transposed = rows > cols
+        if transposed:
+            cost = cost.T
+            rows, cols = cols, rows
+
+        # Forbidden pairs get a cost larger than any full assignment, and are dropped afterwards
+        finite = cost[np.isfinite(cost)]
+        forbidden = (np.abs(finite).sum() + 1.0) * 2 if finite.size else 1.0
+        matrix = np.where(np.isfinite(cost), cost, forbidden)
+
+        u = np.zeros(rows + 1)
+        v = np.zeros(cols + 1)
+        match = np.zeros(cols + 1, dtype=int) #column -> row (1-based, 0 = free)
+        way = np.zeros(cols + 1, dtype=int)
+        for row in range(1, rows + 1):
+            match[0] = row
+            col0 = 0
+            min_v = np.full(cols + 1, np.inf)
+            used = np.zeros(cols + 1, dtype=bool)
+            while True:
+                used[col0] = True
+                row0 = match[col0]
+                reduced = matrix[row0 - 1] - u[row0] - v[1:]
+                free = ~used[1:]
+                better = free & (reduced < min_v[1:])
+                min_v[1:][better] = reduced[better]
+                way[1:][better] = col0
+                candidates = np.where(free, min_v[1:], np.inf)
+                col1 = int(np.argmin(candidates)) + 1
+                delta = candidates[col1 - 1]
+                u[match[used]] += delta
+                v[used] -= delta
+                min_v[1:][free] -= delta
+                col0 = col1
+                if match[col0] == 0:
+                    break
+            while col0:
+                col1 = way[col0]
+                match[col0] = match[col1]
+                col0 = col1
+
+        pairs = [(int(match[col]) - 1, col - 1) for col in range(1, cols + 1) if match[col]]
+        if transposed:
+            pairs = [(col, row) for row, col in pairs]
+        original = np.asarray(cost.T if transposed else cost)
+        return sorted(pair for pair in pairs if np.isfinite(original[pair]))
+
+
+class ActorTracker:
+    """
+        Gives every person detected by MultiPoseLandmarks a stable actor number across frames.
+        Detections are matched to the actors of the previous frames (constant velocity prediction of the
+        torso centroid) with an exact minimum-cost assignment; unmatched detections take the lowest free number.
+    """
+
+    def __init__(self, max_actors, max_distance=0.1, max_missed=10):
+        """
+            :param max_actors: Number of actors (0 to max_actors - 1).
+            :param max_distance: Largest torso movement between two frames (fraction of image width) still matched to an actor.
+            :param max_missed: Number of frames an actor is kept (predicted) while not detected.
+        """
+        self.max_actors = max_actors
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.tracks = {} #actor -> {"position", "velocity", "missed"}
+
+    def reset(self):
+        """Forgets all tracked actors (e.g. at the start of a new video)."""
+        self.tracks.clear()
+
+    def update(self, positions):
+        """
+            :param positions: Torso centroids (fraction of image width) of the people detected on the current frame.
+            :return: List of (actor, detection index) pairs. Detections that cannot be given an actor are left out.
+        """
+        actors = sorted(self.tracks)
+        costs = np.full((len(positions), len(actors)), np.inf)
+        for a, actor in enumerate(actors):
+            track = self.tracks[actor]
+            predicted = track["position"] + track["velocity"] * (track["missed"] + 1)
+            # The search radius grows while an actor is not detected
+            radius = self.max_distance * (track["missed"] + 1)
+            for d, position in enumerate(positions):
+                distance = np.linalg.norm(predicted - np.asarray(position))
+                if distance <= radius:
+                    costs[d, a] = distance / radius
+
+        matched = {actors[a]: d for d, a in Assignment.hungarian(costs)}
+
+        # --- New actors for the unmatched detections, left to right ---
+        unmatched = sorted(set(range(len(positions))) - set(matched.values()), key=lambda d: positions[d][0])
+        free = [actor for actor in range(self.max_actors) if actor not in self.tracks]
+        for d, actor in zip(unmatched, free):
+            matched[actor] = d
+
+        # --- Update the tracks ---
+        for actor, d in matched.items():
+            position = np.asarray(positions[d], dtype=np.float64)
+            track = self.tracks.get(actor)
+            if track is None:
+                self.tracks[actor] = {"position": position, "velocity": np.zeros(2), "missed": 0}
+            else:
+                velocity = (position - track["position"]) / (track["missed"] + 1)
+                track["velocity"] = 0.5 * track["velocity"] + 0.5 * velocity
+                track["position"] = position
+                track["missed"] = 0
+
+        for actor in list(self.tracks):
+            if actor not in matched:
+                self.tracks[actor]["missed"] += 1
+                if self.tracks[actor]["missed"] > self.max_missed:
+                    del self.tracks[actor]
+
+        return sorted(matched.items())
+
+
+
+# -------------------------------------------------------------
+# OFFLINE VIDEO TRACKING UTILITY
+# -------------------------------------------------------------
+class OfflineTracker:
+    """
+        Tracks a whole video file in one go, without Blender, windows or timers.
+        The result uses the names and layout of globalVariables (e.g. "positionList", "R_hand_zlist"),
+        so it can be saved with processing.LandmarkFile and loaded straight into the add-on.
+    """
+
+    def __init__(self, path, kind="pose", view="front", num_hands=2, camera=None, decoder="opencv",
+                 roi=None, detection_confidence=None):
+        """
+            :param path: Path of the video file.
+            :param kind: "pose" or "hand".
+            :param view: "front" or "side".
+            :param num_hands: Numbers of hands to track (1 or 2), hand tracking only.
+            :param camera: Optional calibrated camera dict (see calibration.py) to remove lens distortion from the landmarks.
+            :param decoder: "opencv" or "ffmpeg" (see videoio.open_video).
+            :param roi: Optional (min x, min y, max x, max y) fractions of the frame to detect in (see RegionOfInterest).
+            :param detection_confidence: Optional minimum detection confidence, instead of the detector's default.
+        """
+        self.path = path
+        self.decoder = decoder
+        self.roi = roi
+        self.detection_confidence = detection_confidence
+        self.kind = kind
+        self.view = view
+        self.num_hands = num_hands
+        self.camera = camera
+        self.fps = 30.0
+        self.frames_total = 0
+        self.detector = None
+        self.identity_tracker = None
+        self.lens = None #the camera, if calibrated at the video's size
+        self.data = {} #may be preloaded with the motion data of earlier frames (e.g. from a checkpoint)
+
+    def open(self, start_frame=0):
+        """
+            Opens the video (or camera) and creates the detector.
+            :param start_frame: Source frame index to start tracking from (earlier frames are skipped).
+            :return: The opened video reader (cv2.VideoCapture or videoio.FFmpegCapture).
+        """
+        if libraries.missing("cv2", "mediapipe", "cvzone"):
+            raise RuntimeError("OpenCV (cv2) and cvzone are not installed!")
+
+        cap = videoio.open_video(self.path, self.decoder)
+        if not cap.isOpened():
+            raise RuntimeError(f"Failed to open video: {self.path}")
+        try:
+            self.fps = cap.get(cv2.CAP_PROP_FPS)
+            if not self.fps or self.fps <= 0:
+                self.fps = 30.0
+            self.frames_total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            if start_frame:
+                # Exact seek through the video's frame index (VideoCapture's own seek can land on another frame)
+                videoio.FrameIndex.load(self.path).seek(cap, start_frame)
+            self.lens = LensUndistortion.check(
+                self.camera, int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            )
+            # Loading the model may fail too (e.g. a broken MediaPipe install)
+            self.detector = DetectorPool.acquire(self.kind, self.num_hands, self.detection_confidence)
+        except BaseException:
+            cap.release()
+            raise
+
+        if self.kind == "hand":
+            self.identity_tracker = HandIdentityTracker()
+        return cap
+
+    def detect(self, img):
+        """
+            :param img: Decoded video frame.
+            :return: (image with the landmarks drawn on it, list of (kind, frame, visibility)):
+                    kind is "pose", or "Right" and "Left" for hand tracking;
+                    frame is a flat [x,y,z,...] list, or None if nothing was detected.
+        """
+        if self.roi is not None:
+            height, width = img.shape[:2]
+            region, box = RegionOfInterest.crop(img, self.roi)
+            region, results = self.detect_in(region)
+            img[box[1]:box[1] + box[3], box[0]:box[0] + box[2]] = region
+            results = [(kind, None if frame is None else RegionOfInterest.to_frame(frame, box, width, height), visibility)
+                       for kind, frame, visibility in results]
+        else:
+            img, results = self.detect_in(img)
+
+        if self.lens is not None:
+            results = [(kind, None if frame is None else LensUndistortion.frame(frame, self.lens), visibility)
+                       for kind, frame, visibility in results]
+        return img, results
+
+    def detect_in(self, img):
+        """:return: detect() on an image, without lens undistortion or region of interest."""
+        if self.kind == "pose":
+            img, frame, visibility = PoseLandmarks.extract(self.detector, img)
+            results = [("pose", frame, visibility)]
+        else:
+            img, detected = HandLandmarks.extract(self.detector, self.identity_tracker, img)
+            results = []
+            for handType in ("Right", "Left"):
+                landmarks = detected.get(handType)
+                frame = None if landmarks is None else [value for point in landmarks for value in point]
+                results.append((handType, frame, [1.0] * 21))
+        return img, results
+
+    def run(self, progress=None, start_frame=0, end_frame=None):
+        """
+            :param progress: Optional callable, called with the index of the next frame after every frame.
+            :param start_frame: Source frame index to start tracking from (earlier frames are skipped).
+            :param end_frame: Source frame index to stop before (None tracks to the end), e.g. for a chunk of the video.
+            :return: Dict of motion data lists named as in globalVariables.
+        """
+        cap = self.open(start_frame)
+        frame_index = start_frame
+        try:
+            while end_frame is None or frame_index < end_frame:
+                success, img = cap.read()
+                if not success:
+                    break
+                _, results = self.detect(img)
+                for kind, frame, visibility in results:
+                    self.store(LandmarkStore.names(kind, self.view), frame_index, frame, visibility)
+                frame_index += 1
+                if progress is not None:
+                    progress(frame_index)
+        finally:
+            # Also on errors and Ctrl+C: no ffmpeg process left running, no detector lost to the pool
+            cap.release()
+            DetectorPool.release(self.detector)
+            self.detector = None
+        return self.data
+
+    def store(self, names, frame_index, frame, visibility):
+        """
+            :param names: (positions name, visibility name) from LandmarkStore.names.
+            :param frame_index: Source video frame index.
+            :param frame: Flat [x,y,z,...] landmarks, or None if nothing was detected.
+            :param visibility: Per-landmark visibility of the frame.
+        """
+        empty, hidden = LandmarkStore.empty(self.kind)
+        if frame is None:
+            frame, visibility = empty, hidden
+        LandmarkStore.put(self.data.setdefault(names[0], []), frame_index, frame, empty)
+        LandmarkStore.put(self.data.setdefault(names[1], []), frame_index, visibility, hidden)
@@ -1,5 +1,17 @@
+import os
+import sys
 import bpy
+import math
+import subprocess
 import numpy as np
+from . import processing
+from . import tracking
+from . import calibration
+from . import streaming
+from . import sharedring
+from . import videoio
+from . import libraries
+from .tracking import LandmarkStore
 from . import globalVariables as gvar
 
 
@@ -7,56 +19,10 @@ from . import globalVariables as gvar
 # -------------------------------------------------------------
 # IMPORTING EXTERNAL LIBRARIES
 # -------------------------------------------------------------
-try:
-    import cv2
-    from cvzone.PoseModule import PoseDetector
-    from cvzone.HandTrackingModule import HandDetector
-except ModuleNotFoundError:
-    cv2 = None
-    PoseDetector = None
-    HandDetector = None
-
-
-
-# -------------------------------------------------------------
-# SOME USEFUL MATH UTILITIES
-# -------------------------------------------------------------
-class MathUtility:
-    @staticmethod
-    def centroid(list_of_points):
-        """
-            :param list_of_points: List of points whose centroid is to be calculated.
-            :return: Centroid of the points in the list.
-        """
-        avg_x = sum(p[0] for p in list_of_points) / len(list_of_points)
-        avg_y = sum(p[1] for p in list_of_points) / len(list_of_points)
-        avg_z = sum(p[2] for p in list_of_points) / len(list_of_points)
-        return [avg_x,avg_y,avg_z]
-    
-    @staticmethod
-    def normalize_coordinates(coordinates,height,width,scale):
-        """
-            :param coordinates: Original [x,y,z] (Unnormalized)
-            :param height: Height of the video. 
-            :param width: Width of the video.
-            :param scale: Scales z to cover up for inaccuracy in z value tracked by the tracker.
-            :return: Normalized [x,y,z] 
-        """
-        x = (coordinates[0] - (width/2))/100 #centre x
-        y = (coordinates[1]-height)/100 #translate y up
-        z = coordinates[2]/scale
-        return [x,y,z]
-    
-    @staticmethod
-    def cv2blender_coordinates(cv_coordinates):
-        """
-            :param cv_coordinates: [x,y,z] as per Opencv's convention.
-            :return: [x,y,z] as per Blender's convention.
-        """
-        x = cv_coordinates[0]       #blender.x = cv2.x
-        y = cv_coordinates[2]       #blender.y = cv2.z
-        z = -cv_coordinates[1]      #blender.z = cv2.(-y)
-        return [x,y,z]
+# Imported on first use (see libraries.py), not when the add-on is loaded
+cv2 = libraries.cv2
+PoseDetector = libraries.PoseDetector
+HandDetector = libraries.HandDetector
 
 
 
@@ -64,6 +30,8 @@ class MathUtility:
 # SOME USEFUL BLENDER UTILITIES
 # -------------------------------------------------------------
 class BlenderUtility:   
+    LINEAR = 1 #value of the 'LINEAR' keyframe interpolation for foreach_set
+
     @staticmethod
     def create_collection(context,Name):
         collection_name = Name
@@ -77,7 +45,147 @@ class BlenderUtility:
             named_collection = bpy.data.collections.new(collection_name)
             context.scene.collection.children.link(named_collection)
         return named_collection
-    
+
+    @staticmethod
+    def lens_camera(context, mode, cap):
+        """
+            :param mode: Tracking mode (e.g. "front_pose", "side_hand", "rt_pose"). Realtime uses the "front" camera.
+            :param cap: The opened video reader (cv2.VideoCapture or videoio.FFmpegCapture).
+            :return: The calibrated camera of this view from the scene's camera rig file, if Lens Undistortion
+                    is enabled and the camera was calibrated at the video's size, else None.
+        """
+        if not context.scene.undistort_landmarks:
+            return None
+        path = bpy.path.abspath(context.scene.camera_rig_path)
+        camera = calibration.CameraRig.find(path, "side" if mode.startswith("side") else "front")
+        if camera is None:
+            print(f"No calibrated camera for {mode} in {path}. Skipping lens undistortion.")
+            return None
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return tracking.LensUndistortion.check(camera, width, height)
+
+    @staticmethod
+    def landmark_publisher(context):
+        """
+            :return: A streaming.LandmarkPublisher to the scene's Network Output address, or None if disabled.
+        """
+        scene = context.scene
+        if not scene.network_output:
+            return None
+        print(f"Streaming landmarks ({scene.network_protocol}) to {scene.network_host}:{scene.network_port}.")
+        return streaming.LandmarkPublisher(scene.network_host, scene.network_port, scene.network_protocol)
+
+    @staticmethod
+    def capture_locations(context, position_list, visibility_list, num_points, whole_capture=True):
+        """
+            Turns tracked motion data into landmark locations ready for keyframing,
+            applying the capture cleanup settings of the scene.
+            :param position_list: Tracked motion data (e.g. gvar.positionList).
+            :param visibility_list: Matching visibility data (e.g. gvar.visibilityList).
+            :param num_points: Number of landmarks per frame (40 for pose, 21 for a hand).
+            :param whole_capture: False when the data is only part of the capture (see KeyframeStream):
+                                    the settings that need statistics of the whole capture are skipped.
+            :return: Array (frames, num_points, 3) as per Blender's convention. NaN where no data is left.
+        """
+        scene = context.scene
+        points = processing.LandmarkArray.from_position_list(position_list, num_points)
+        visibility = processing.LandmarkArray.from_visibility_list(visibility_list, num_points, len(points))
+        points, _ = processing.GapFilling.fill(
+            points, visibility, scene.visibility_threshold, scene.gap_fill_method, scene.max_gap
+        )
+        if scene.auto_scale and whole_capture:
+            z_scale, scale = processing.AutoScale.estimate(points, scene.target_height)
+            points = processing.AutoScale.apply(points, z_scale, scale)
+            print(f"Auto scale: z x{z_scale:.2f}, overall x{scale:.3f}")
+        if scene.constant_bone_lengths and whole_capture:
+            bones = processing.POSE_BONE_PAIRS if num_points == 40 else processing.HAND_BONE_PAIRS
+            points = processing.BoneLengths.solve(points, bones, visibility, scene.bone_length_iterations)
+        return processing.LandmarkArray.cv2blender(points)
+
+    @staticmethod
+    def keyframe_locations(objects, locations, frames, tolerance=0.0, splice=False):
+        """
+            Writes the location F-curves of many objects in one batched pass
+            (keyframe_points.add + foreach_set instead of one keyframe_insert per frame).
+            :param objects: Objects to animate, one per landmark.
+            :param locations: Array (frames, len(objects), 3) of local locations. NaN samples get no keyframe.
+            :param frames: Scene frame number of every sample.
+            :param tolerance: Keyframe reduction tolerance. 0 keeps a keyframe on every frame.
+            :param splice: Keep the existing keys outside the range of frames (e.g. to append a batch, or to re-key
+                            part of the capture) instead of replacing the whole curve. Keys inside the range are replaced,
+                            a batch after the last key is appended without rewriting the curve.
+            :return: (keyframes written, keyframes without reduction)
+        """
+        num_frames = locations.shape[0]
+        channels = locations.reshape(num_frames, -1)
+        keep = processing.KeyframeReduction.rdp_mask(channels, tolerance)
+        frames = np.asarray(frames, dtype=np.float32)
+        first, last = (frames.min(), frames.max()) if len(frames) else (0.0, -1.0)
+        written = 0
+
+        for i, obj in enumerate(objects):
+            if obj.animation_data is None:
+                obj.animation_data_create()
+            action = obj.animation_data.action
+            if action is None:
+                action = bpy.data.actions.new(f"{obj.name}Action")
+                obj.animation_data.action = action
+
+            for axis in range(3):
+                column = 3 * i + axis
+                rows = np.nonzero(keep[:, column])[0]
+                fcurve = action.fcurves.find("location", index=axis)
+                points = fcurve.keyframe_points if fcurve is not None else None
+
+                # --- A batch after the last key (streamed keyframes) is appended, the older keys stay untouched ---
+                if splice and points and points[-1].co[0] < first:
+                    count = len(points)
+                    points.add(len(rows))
+                    for point, frame, value in zip(points[count:], frames[rows], channels[rows, column]):
+                        point.co = (frame, value)
+                        if tolerance > 0:
+                            point.interpolation = 'LINEAR'
+                    fcurve.update()
+                    written += len(rows)
+                    continue
+
+                # --- Otherwise replace old keys of this channel (only those in the range of frames when splicing) ---
+                old = np.empty((0, 2), dtype=np.float32)
+                old_interpolation = np.empty(0, dtype=np.int32)
+                if fcurve is not None:
+                    if splice and len(points):
+                        old = np.empty(2 * len(points), dtype=np.float32)
+                        old_interpolation = np.empty(len(points), dtype=np.int32)
+                        points.foreach_get("co", old)
+                        points.foreach_get("interpolation", old_interpolation)
+                        old = old.reshape(-1, 2)
+                        outside = (old[:, 0] < first) | (old[:, 0] > last)
+                        old, old_interpolation = old[outside], old_interpolation[outside]
+                    action.fcurves.remove(fcurve)
+                fcurve = action.fcurves.new("location", index=axis, action_group="Object Transforms")
+                points = fcurve.keyframe_points
+
+                co = np.empty((len(old) + len(rows), 2), dtype=np.float32)
+                co[:len(old)] = old
+                co[len(old):, 0] = frames[rows]
+                co[len(old):, 1] = channels[rows, column]
+                order = np.argsort(co[:, 0], kind="stable")
+                points.add(len(co))
+                points.foreach_set("co", co[order].ravel())
+                if len(old) or tolerance > 0:
+                    # Kept keys keep their interpolation. The tolerance is only guaranteed between linearly interpolated keys
+                    interpolation = np.empty(len(co), dtype=np.int32)
+                    points.foreach_get("interpolation", interpolation)
+                    interpolation[:len(old)] = old_interpolation
+                    if tolerance > 0:
+                        interpolation[len(old):] = BlenderUtility.LINEAR
+                    points.foreach_set("interpolation", interpolation[order])
+                fcurve.update()
+                written += len(rows)
+
+        return written, int(np.count_nonzero(~np.isnan(channels)))
+
 
 
 # -------------------------------------------------------------
@@ -172,7 +280,7 @@ class VideoPlaneManager:
     def update_frame(cls, frame):
         """:param image: Frame from the video to be displayed in the plane."""
 
-        if cv2 is None:
+        if libraries.missing("cv2"):
             print("OpenCV is not installed. Cannot update video plane.")
             return
         
@@ -185,15 +293,70 @@ class VideoPlaneManager:
         rgba = np.concatenate(
             [frame_rgb, np.ones((h, w, 1), dtype=np.uint8) * 255], axis=2
         ).astype(np.float32).ravel() / 255.0
+        cls.update_pixels(rgba, w, h)
 
-        if cls.image.size[0] != w or cls.image.size[1] != h:
-            cls.image.scale(w, h)
+    @classmethod
+    def update_pixels(cls, pixels, width, height):
+        """
+            :param pixels: Flat float32 RGBA pixels, bottom row first (e.g. a view of a sharedring.SharedRing slot).
+            :param width: Width of the frame.
+            :param height: Height of the frame.
+        """
+        if cls.image is None:
+            return
+        if cls.image.size[0] != width or cls.image.size[1] != height:
+            cls.image.scale(width, height)
 
-        cls.image.pixels.foreach_set(rgba)
+        cls.image.pixels.foreach_set(pixels)
         cls.image.update()
 
 
 
+# -------------------------------------------------------------
+# SOURCE VIDEO PREVIEW WHILE SCRUBBING
+# -------------------------------------------------------------
+class PreviewScrubber:
+    reader = None
+    """
+        Shows the source video frame of the current scene frame on the video plane, while scrubbing or playing
+        the timeline (scene frame n = source frame n - 1, as in the motion data).
+        :param reader: videoio.FrameReader of the video, None when not running.
+    """
+
+    @classmethod
+    def running(cls):
+        return cls.reader is not None
+
+    @classmethod
+    def start(cls, context, path):
+        """:param path: Path of the video file."""
+        cls.stop()
+        cls.reader = videoio.FrameReader(path, context.scene.video_decoder.lower())
+        width = int(cls.reader.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cls.reader.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        VideoPlaneManager.create_plane(context, width=width, height=height)
+        bpy.app.handlers.frame_change_post.append(PreviewScrubber.on_frame_change)
+        PreviewScrubber.on_frame_change(context.scene)
+
+    @classmethod
+    def stop(cls):
+        if PreviewScrubber.on_frame_change in bpy.app.handlers.frame_change_post:
+            bpy.app.handlers.frame_change_post.remove(PreviewScrubber.on_frame_change)
+        if cls.reader is not None:
+            cls.reader.release()
+            cls.reader = None
+            VideoPlaneManager.remove_plane()
+
+    @staticmethod
+    def on_frame_change(scene, depsgraph=None):
+        if PreviewScrubber.reader is None:
+            return
+        img = PreviewScrubber.reader.frame(scene.frame_current - 1)
+        if img is not None:
+            VideoPlaneManager.update_frame(img)
+
+
+
 # -------------------------------------------------------------
 # POSE TRACKING UTILITY
 # -------------------------------------------------------------
@@ -202,10 +365,19 @@ class PoseTracking:
         self.detector = None
         self.mode = mode
         self.running = False
+        self.frame_index = 0 #source video frame index of the next decoded frame
+        self.frames_total = 0 #frame count of the video (0 for a camera)
+        self.missed = 0 #frames without a detection
+        self.num_actors = bpy.context.scene.num_actors if mode != "side_pose" else 1
+        self.actor_tracker = tracking.ActorTracker(self.num_actors)
+        self.camera = None #calibrated camera used to undistort the landmarks
+        self.stream = None #KeyframeStream keying the rig while tracking
+        self.publisher = None #streaming.LandmarkPublisher sending the landmarks to other tools
         """
             It uses cvzone.PoseModule (uses mediapipe) to do pose tracking.
+            With more than one actor it uses MediaPipe's PoseLandmarker task instead (see tracking.MultiPoseLandmarks).
         """
-        if cv2 is None:
+        if libraries.missing("cv2"):
             print("OpenCV (cv2) is not installed! Install via the Addon Preferences first.")
             return
 
@@ -223,6 +395,8 @@ class PoseTracking:
             if not self.cap.isOpened():
                 print("Failed to open camera.")
                 return
+            self.camera = BlenderUtility.lens_camera(bpy.context, self.mode, self.cap)
+            self.publisher = BlenderUtility.landmark_publisher(bpy.context)
 
             gvar.fps = self.cap.get(cv2.CAP_PROP_FPS)
             if not gvar.fps or gvar.fps <= 0:
@@ -245,12 +419,21 @@ class PoseTracking:
 
         # --- Handle video-based tracking ---
         if self.path:
-            self.cap = cv2.VideoCapture(self.path)
+            self.cap = videoio.open_video(self.path, bpy.context.scene.video_decoder.lower())
+            self.camera = BlenderUtility.lens_camera(bpy.context, self.mode, self.cap)
+            if self.mode == "front_pose":
+                self.publisher = BlenderUtility.landmark_publisher(bpy.context)
+            self.frames_total = max(int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
             gvar.fps = self.cap.get(cv2.CAP_PROP_FPS)
             if not gvar.fps or gvar.fps <= 0:
                 gvar.fps = 30
             gvar.delay = 1.0 / gvar.fps
 
+            # Key the rig while tracking (front view only: the side view is combined afterwards)
+            scene = bpy.context.scene
+            if self.mode == "front_pose" and scene.stream_keyframes and self.num_actors == 1:
+                self.stream = KeyframeStream(bpy.context, scene.stream_batch)
+
             # Create OpenCV window
             cv2.namedWindow("Pose Tracking", cv2.WINDOW_NORMAL)
             cv2.resizeWindow("Pose Tracking", 640, 480)
@@ -265,66 +448,94 @@ class PoseTracking:
             :param img: Image on which pose dectection is to be performed.
             :return: Image with pose landmarks and lines connecting the landmarks drawn on it.
         """
-        if PoseDetector is None:
+        if libraries.missing("cvzone", "mediapipe"):
             print("cvzone.PoseModule not installed. Install via the Addon Preferences first. Skipping pose detection.")
             return img
         
+        if self.num_actors > 1:
+            img = self.detect_actors(img)
+            self.frame_index += 1
+            return img
+
         if self.detector is None:
-            self.detector = PoseDetector()
+            self.detector = tracking.DetectorPool.acquire("pose")
 
-        img = self.detector.findPose(img)
-        height, width = img.shape[:2]
-        landmarksList, boundingBoxInfo = self.detector.findPosition(img)
+        # A frame without detection still keeps its slot, so later frames stay in sync with the video
+        img, frame, visibility = tracking.PoseLandmarks.extract(self.detector, img)
+        self.store_frame(frame, visibility)
+        self.frame_index += 1
+        return img
 
-        if not boundingBoxInfo:
-            return img
+    @staticmethod
+    def actor_store(actor):
+        """
+            :param actor: Actor number (1 or more).
+            :return: The actor's dict in gvar.actors, created if needed.
+        """
+        return gvar.actors.setdefault(actor, {
+            "positionList": [], "visibilityList": [], "contactList": [], "object_list": [], "bones_list": [], "root": None
+        })
+
+    def detect_actors(self, img):
+        """
+            Multi-actor version of detect_pose: every detected person is given a stable actor number
+            and stored in that actor's own motion data lists.
+            :param img: Image on which pose dectection is to be performed.
+            :return: Image with the landmarks of all people drawn on it.
+        """
+        if self.detector is None:
+            model_path = bpy.path.abspath(bpy.context.scene.pose_model_path)
+            self.detector = tracking.MultiPoseLandmarks.create_detector(self.num_actors, model_path)
+
+        img, people = tracking.MultiPoseLandmarks.extract(self.detector, img, self.frame_index * 1000.0 / gvar.fps)
+        matched = dict(self.actor_tracker.update([position for _, _, position in people]))
+
+        # Actor 0 always keeps its slot, other actors once they have been seen
+        for actor in range(self.num_actors):
+            if actor in matched:
+                frame, visibility, _ = people[matched[actor]]
+                self.store_frame(frame, visibility, actor)
+            elif actor == 0 or actor in gvar.actors:
+                self.store_frame(None, None, actor)
+        return img
 
-        # --- Calculate custom points (centroids) ---
-        point_pairs = [
-            (23, 24),  # hips           (point 32)
-            (11, 12),  # shoulders      (point 33)
-            (18, 20),  # right hand     (point 34)
-            (17, 19),  # left hand      (point 35)
-            (7, 8),    # ears           (point 36)
-            (9, 10),   # mouth          (point 37)
-            (1, 4)     # eyes           (point 38)
-        ]
-
-        extra_points = []
-        for a, b in point_pairs:
-            centroid = MathUtility.centroid([landmarksList[a], landmarksList[b]])
-            normalized = MathUtility.normalize_coordinates(centroid, height, width, 400)
-            extra_points.append(normalized)
+    def store_frame(self, frame, visibility, actor=0):
+        """
+            Stores the landmarks of one decoded frame against its source frame index.
+            A frame without detection still takes a slot (NaN landmarks, zero visibility),
+            so frame n of the motion data is always frame n of the video.
+            :param frame: Flat [x,y,z,...] list of 40 landmarks, or None if nothing was detected.
+            :param visibility: Visibility (0 to 1) of each of the 40 landmarks, or None if nothing was detected.
+            :param actor: Actor number. Actor 0 is stored in gvar.positionList, the others in gvar.actors.
+        """
+        if frame is None:
+            frame = LandmarkStore.EMPTY_POSE
+            visibility = LandmarkStore.HIDDEN_POSE
+            if actor == 0:
+                self.missed += 1
+        elif self.camera is not None:
+            frame = tracking.LensUndistortion.frame(frame, self.camera)
 
         # --- Handle mode: front, side, or realtime ---
         if self.mode in ["front_pose", "rt_pose"]:
-            listOf32Landmarks = []
-            for landmark in landmarksList:
-                normalized = MathUtility.normalize_coordinates(landmark, height, width, 400)
-                listOf32Landmarks.extend(normalized)
-
-            for point in extra_points:
-                listOf32Landmarks.extend(point)
-
-            gvar.positionList.append(listOf32Landmarks)
+            if actor == 0:
+                position_list, visibility_list = gvar.positionList, gvar.visibilityList
+            else:
+                store = PoseTracking.actor_store(actor)
+                position_list, visibility_list = store["positionList"], store["visibilityList"]
+            LandmarkStore.put(position_list, self.frame_index, frame, LandmarkStore.EMPTY_POSE)
+            LandmarkStore.put(visibility_list, self.frame_index, visibility, LandmarkStore.HIDDEN_POSE)
+            if self.publisher is not None:
+                self.publisher.send("pose", frame, visibility, self.frame_index, actor)
 
         elif self.mode == "side_pose" and gvar.positionList:
-            zframe = []
-            for landmark in landmarksList:
-                normalized = MathUtility.normalize_coordinates(landmark, height, width, 400)
-                zframe.extend(normalized)
-
-            for point in extra_points:
-                zframe.extend(point)
-
-            gvar.zlist.append(zframe)
-
-        return img
+            LandmarkStore.put(gvar.zlist, self.frame_index, frame, LandmarkStore.EMPTY_POSE)
+            LandmarkStore.put(gvar.zvisibilityList, self.frame_index, visibility, LandmarkStore.HIDDEN_POSE)
 
     def update_frame(self):
         """Updates the image in the CV window or Plane in the Blender Scene."""
 
-        if cv2 is None:
+        if libraries.missing("cv2"):
             print("OpenCV (cv2) is not installed! Install via the Addon Preferences first.")
             return
         
@@ -344,6 +555,8 @@ class PoseTracking:
             return None
 
         img = self.detect_pose(img)
+        if self.stream is not None:
+            self.stream.update(bpy.context)
 
         # --- Realtime: show on video plane ---
         if self.mode == "rt_pose":
@@ -361,6 +574,21 @@ class PoseTracking:
             print("Pose tracking stopped.")
         self.running = False
 
+        # Key the frames that are left
+        if self.stream is not None:
+            self.stream.update(bpy.context, final=True)
+            self.stream = None
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
+
+        # The PoseLandmarker task holds native resources until closed, single-person detectors go back to the pool
+        if self.num_actors > 1 and self.detector is not None:
+            self.detector.close()
+        elif self.detector is not None:
+            tracking.DetectorPool.release(self.detector)
+        self.detector = None
+
         if hasattr(self, 'cap') and self.cap.isOpened():
             self.cap.release()
 
@@ -389,13 +617,19 @@ class HandTracking:
         self.num_hands = num_hands
         self.mode = mode
         self.running = False
+        self.frame_index = 0 #source video frame index of the next decoded frame
+        self.frames_total = 0 #frame count of the video (0 for a camera)
+        self.missed = 0 #frames without any hand detected
+        self.identity_tracker = tracking.HandIdentityTracker() #keeps 'Right' and 'Left' from swapping between frames
+        self.camera = None #calibrated camera used to undistort the landmarks
+        self.publisher = None #streaming.LandmarkPublisher sending the landmarks to other tools
         """
             It uses cvzone.HandTrackingModule (uses mediapipe) to do hand tracking.
             :param num_hands: Numbers of hands to track (1 or 2).
             :param mode: Different modes like realtime, offline: (front view / side view).
         """
 
-        if cv2 is None:
+        if libraries.missing("cv2"):
             print("OpenCV (cv2) is not installed! Install via the Addon Preferences first.")
             return
 
@@ -405,6 +639,8 @@ class HandTracking:
             if not self.cap.isOpened():
                 print("Camera failed to open.")
                 return
+            self.camera = BlenderUtility.lens_camera(bpy.context, self.mode, self.cap)
+            self.publisher = BlenderUtility.landmark_publisher(bpy.context)
             gvar.fps = self.cap.get(cv2.CAP_PROP_FPS)
             if not gvar.fps or gvar.fps <= 0:
                 gvar.fps = 30
@@ -424,7 +660,11 @@ class HandTracking:
             self.path = ""
 
         if self.path:
-            self.cap = cv2.VideoCapture(self.path)
+            self.cap = videoio.open_video(self.path, bpy.context.scene.video_decoder.lower())
+            self.camera = BlenderUtility.lens_camera(bpy.context, self.mode, self.cap)
+            if self.mode == "front_hand":
+                self.publisher = BlenderUtility.landmark_publisher(bpy.context)
+            self.frames_total = max(int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
             gvar.fps = self.cap.get(cv2.CAP_PROP_FPS)
             if not gvar.fps or gvar.fps <= 0:
                 gvar.fps = 30
@@ -441,56 +681,64 @@ class HandTracking:
             :return: Image with hand landmarks and lines connecting the landmarks drawn on it.
         """
         
-        if HandDetector is None:
+        if libraries.missing("cvzone", "mediapipe"):
             print("cvzone.HandTrackingModule not installed. Install via the Addon Preferences first. Skipping hand detection.")
             return img
         
         if self.detector is None:
-            self.detector = HandDetector(maxHands=self.num_hands, detectionCon=0.8)
+            self.detector = tracking.DetectorPool.acquire("hand", self.num_hands)
 
-        height, width = img.shape[:2]
-        hands, img = self.detector.findHands(img)
-        if not hands:
-            return img
+        img, detected = tracking.HandLandmarks.extract(self.detector, self.identity_tracker, img)
+        if not detected:
+            self.missed += 1
+        if self.camera is not None:
+            detected = {handType: tracking.LensUndistortion.points(landmarks, self.camera).tolist()
+                        for handType, landmarks in detected.items()}
 
-        for hand in hands:
-            handType = hand['type']  # 'Right' or 'Left'
-            landmarksList = hand['lmList']
+        # --- Both hands are stored against the source frame index, detected or not ---
+        for handType in ("Right", "Left"):
             if handType == "Right":
                 position_list = gvar.R_hand_positionList
+                visibility_list = gvar.R_hand_visibilityList
                 z_list = gvar.R_hand_zlist
+                zvisibility_list = gvar.R_hand_zvisibilityList
                 rt_hand_lmlist = gvar.rt_hand_lmlist_R
 
             else:
                 position_list = gvar.L_hand_positionList
+                visibility_list = gvar.L_hand_visibilityList
                 z_list = gvar.L_hand_zlist
+                zvisibility_list = gvar.L_hand_zvisibilityList
                 rt_hand_lmlist = gvar.rt_hand_lmlist_L
 
-            normalized_landmarks = []
-            for landmark in landmarksList:
-                normalized = MathUtility.normalize_coordinates(landmark, height, width, 40)
-                normalized_landmarks.append(normalized)
+            normalized_landmarks = detected.get(handType)
+            if normalized_landmarks is None:
+                flat_list = LandmarkStore.EMPTY_HAND
+                visibility = LandmarkStore.HIDDEN_HAND
+            else:
+                flat_list = [value for normalized in normalized_landmarks for value in normalized]
+                visibility = [1.0] * 21
 
             if self.mode in ["front_hand", "rt_hand"]:
-                flat_list = []
-                rt_hand_lmlist.clear()
-                for normalized in normalized_landmarks:
-                    rt_hand_lmlist.append(normalized)
-                    flat_list.extend(normalized)
-                position_list.append(flat_list)
+                if normalized_landmarks is not None:
+                    rt_hand_lmlist.clear()
+                    rt_hand_lmlist.extend(normalized_landmarks)
+                LandmarkStore.put(position_list, self.frame_index, flat_list, LandmarkStore.EMPTY_HAND)
+                LandmarkStore.put(visibility_list, self.frame_index, visibility, LandmarkStore.HIDDEN_HAND)
+                if self.publisher is not None:
+                    self.publisher.send(handType, flat_list, visibility, self.frame_index)
 
             elif self.mode == "side_hand" and position_list:
-                zframe = []
-                for normalized in normalized_landmarks:
-                    zframe.extend(normalized)
-                z_list.append(zframe)
+                LandmarkStore.put(z_list, self.frame_index, flat_list, LandmarkStore.EMPTY_HAND)
+                LandmarkStore.put(zvisibility_list, self.frame_index, visibility, LandmarkStore.HIDDEN_HAND)
 
+        self.frame_index += 1
         return img
 
     def update_frame(self):
         """Updates the image in the CV window."""
 
-        if cv2 is None:
+        if libraries.missing("cv2"):
             print("OpenCV (cv2) is not installed! Install via the Addon Preferences first.")
             return
 
@@ -520,6 +768,12 @@ class HandTracking:
         if self.running:
             print("Hand tracking stopped.")
         self.running = False
+        if self.detector is not None:
+            tracking.DetectorPool.release(self.detector)
+            self.detector = None
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
         if hasattr(self, 'cap') and self.cap.isOpened():
             self.cap.release()
         if self.mode != "rt_hand":
@@ -531,6 +785,265 @@ class HandTracking:
 
 
 
+# -------------------------------------------------------------
+# NETWORK TRACKING UTILITY
+# -------------------------------------------------------------
+class NetworkTracking:
+    """
+        Applies the landmarks streamed by a tracking server (server.py, or a second Blender with Network Output):
+        detection runs in another process or on another machine, Blender only stores the frames and moves the empties.
+        Frames are stored in the same lists as local tracking (against the sender's frame index),
+        so Animate works on the received capture as usual.
+    """
+
+    def __init__(self, context):
+        scene = context.scene
+        self.receiver = streaming.LandmarkReceiver(scene.network_port, scene.network_bind_address)
+        self.view = "front"
+        self.latest = {} #(kind, actor) -> landmarks of the newest frame with a detection
+        self.running = True
+        bpy.app.timers.register(self.update_frame, first_interval=0.0)
+        print(f"Receiving landmarks on {scene.network_bind_address}:{scene.network_port}.")
+
+    def store_packet(self, packet):
+        """
+            :param packet: Packet dict from streaming.LandmarkReceiver.
+            :return: False if the packet was skipped (wrong number of landmarks for its kind).
+        """
+        kind, actor = packet["kind"], packet["actor"]
+        if len(packet["points"]) != (40 if kind == "pose" else 21):
+            return False
+        frame = packet["points"].ravel().tolist()
+        visibility = packet["visibility"].tolist()
+        empty, hidden = LandmarkStore.empty("pose" if kind == "pose" else "hand")
+        if kind == "pose" and actor > 0:
+            store = PoseTracking.actor_store(actor)
+            position_list, visibility_list = store["positionList"], store["visibilityList"]
+        else:
+            names = LandmarkStore.names(kind, self.view)
+            position_list, visibility_list = getattr(gvar, names[0]), getattr(gvar, names[1])
+        LandmarkStore.put(position_list, packet["frame"], frame, empty)
+        LandmarkStore.put(visibility_list, packet["frame"], visibility, hidden)
+
+        if np.any(packet["visibility"] > 0):
+            self.latest[(kind, actor)] = packet["points"]
+            if kind != "pose":
+                rt_hand_lmlist = gvar.rt_hand_lmlist_R if kind == "Right" else gvar.rt_hand_lmlist_L
+                rt_hand_lmlist.clear()
+                rt_hand_lmlist.extend(packet["points"].tolist())
+        return True
+
+    def targets(self, kind, actor):
+        """
+            :return: (list of empties, root empty) driven by the landmarks of this kind and actor, or (None, None).
+        """
+        if kind == "Right":
+            return gvar.R_hand_object_list, gvar.R_hand_root
+        if kind == "Left":
+            return gvar.L_hand_object_list, gvar.L_hand_root
+        store = PoseRig.actor_lists(actor)
+        return store["object_list"], store["root"]
+
+    def update_frame(self):
+        """Stores the packets that arrived since the last call and moves the empties to the newest landmarks."""
+        if not self.running:
+            return None
+
+        # --- Drain the socket without blocking the UI ---
+        updated = set()
+        for _ in range(1024):
+            packet = self.receiver.receive(timeout=0)
+            if packet is None:
+                break
+            if self.store_packet(packet):
+                updated.add((packet["kind"], packet["actor"]))
+        self.move_empties(updated)
+        return 0.005
+
+    def move_empties(self, updated):
+        """
+            :param updated: Set of (kind, actor) that received new landmarks.
+        """
+        for kind, actor in updated:
+            if (kind, actor) not in self.latest:
+                continue
+            object_list, root = self.targets(kind, actor)
+            if not object_list or root is None:
+                continue
+            points = self.latest[(kind, actor)]
+            locations = np.stack([points[:, 0], points[:, 2], -points[:, 1]], axis=1) - np.array(root.location)
+            for obj, location in zip(object_list, locations):
+                if np.all(np.isfinite(location)):
+                    obj.location = location
+
+    def stop(self):
+        """Stops receiving."""
+        if self.running:
+            print(f"Network tracking stopped ({self.receiver.dropped} packets dropped).")
+        self.running = False
+        self.receiver.close()
+        return None
+
+
+class ProcessTracking(NetworkTracking):
+    """
+        Runs the tracking of StartTracking in a subprocess (sharedring.py): frames are decoded and tracked there,
+        and reach Blender through a shared memory ring. The preview is uploaded to the video plane straight from
+        the shared slot and the landmarks are stored as by PoseTracking / HandTracking, without pickling.
+        Has the same stop() as the in-process trackers, so StopTracking tears it down the same way.
+    """
+    SLOTS = 8
+
+    def __init__(self, context, mode):
+        """
+            :param mode: Tracking mode (e.g. "front_pose", "side_hand", "rt_hand").
+        """
+        scene = context.scene
+        self.mode = mode
+        self.kind = "pose" if mode.endswith("pose") else "hand"
+        self.view = "side" if mode.startswith("side") else "front"
+        self.kinds = sharedring.SharedRing.KINDS[self.kind]
+        self.latest = {}
+        self.running = False
+        self.ring = None
+        self.process = None
+        self.next_seq = 0 #sequence number of the next frame to read from the ring
+        self.dropped = 0
+        self.frame_index = 0 #source frame index after the newest stored frame
+        self.frames_total = 0 #frame count of the video (0 for a camera)
+        self.missed = 0 #frames without a detection
+        self.error = "" #why the tracker process ended early, if it crashed
+
+        if libraries.missing("cv2"):
+            print("OpenCV (cv2) is not installed! Install via the Addon Preferences first.")
+            return
+        source = ProcessTracking.source(context, mode)
+        if source == "":
+            return
+
+        # --- The ring is sized to the frames, so the video is probed here ---
+        decoder = scene.video_decoder.lower()
+        cap = videoio.open_video(source, decoder)
+        if not cap.isOpened():
+            print(f"Failed to open {source}.")
+            return
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if isinstance(source, str):
+            self.frames_total = max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+        gvar.fps = cap.get(cv2.CAP_PROP_FPS)
+        if not gvar.fps or gvar.fps <= 0:
+            gvar.fps = 30
+        gvar.delay = 1.0 / gvar.fps
+        cap.release()
+
+        self.ring = sharedring.SharedRing.create(
+            ProcessTracking.SLOTS, width, height, len(self.kinds), sharedring.SharedRing.POINTS_PER_SET[self.kind]
+        )
+        command = [sys.executable, os.path.join(os.path.dirname(__file__), "sharedring.py"), "track", self.ring.name,
+                   "--source", str(source), "--kind", self.kind, "--view", self.view, "--num-hands", str(scene.num_hands),
+                   "--decoder", decoder]
+        if scene.undistort_landmarks:
+            command += ["--cameras", bpy.path.abspath(scene.camera_rig_path)]
+        self.process = subprocess.Popen(command)
+
+        self.width, self.height = width, height
+        VideoPlaneManager.create_plane(context, width=width, height=height)
+        if mode.startswith("rt") and not context.screen.is_animation_playing:
+            bpy.ops.screen.animation_play()
+        self.running = True
+        bpy.app.timers.register(self.update_frame, first_interval=0.0)
+        print(f"Tracking {source} in a subprocess.")
+
+    @staticmethod
+    def source(context, mode):
+        """:return: Video path or camera index tracked in this mode ("" if no video was selected)."""
+        if mode == "rt_pose":
+            return 0
+        if mode == "rt_hand":
+            return context.scene.cam_index
+        return {"front_pose": gvar.front_video_path, "side_pose": gvar.side_video_path,
+                "front_hand": gvar.hand_front_video_path, "side_hand": gvar.hand_side_video_path}[mode]
+
+    def read_ring(self):
+        """
+            Stores the landmarks of every frame written since the last call.
+            :return: (set of (kind, actor) that received landmarks, sequence number of the newest frame or None)
+        """
+        written = self.ring.written()
+        if written - self.next_seq > self.ring.slots:
+            # Camera frames are overwritten when Blender falls behind
+            self.dropped += written - self.ring.slots - self.next_seq
+            self.next_seq = written - self.ring.slots
+
+        updated = set()
+        newest = None
+        while self.next_seq < written:
+            entry = self.ring.read(self.next_seq)
+            if entry is None:
+                self.dropped += 1
+            else:
+                frame_index, _, landmarks = entry
+                self.frame_index = frame_index + 1
+                if not np.any(landmarks[:, :, 3] > 0):
+                    self.missed += 1
+                for i, kind in enumerate(self.kinds):
+                    self.store_packet({"kind": kind, "actor": 0, "frame": frame_index,
+                                       "points": landmarks[i, :, :3], "visibility": landmarks[i, :, 3]})
+                    updated.add((kind, 0))
+                newest = self.next_seq
+            self.next_seq += 1
+        return updated, newest
+
+    def update_frame(self):
+        """Applies the frames the tracker process has written and shows the newest one on the video plane."""
+        if not self.running:
+            return None
+
+        updated, newest = self.read_ring()
+        if self.mode.startswith("rt"):
+            self.move_empties(updated)
+        if newest is not None:
+            entry = self.ring.read(newest)
+            if entry is not None:
+                VideoPlaneManager.update_pixels(entry[1], self.width, self.height)
+        # The slots are only handed back once the preview has been uploaded from them
+        self.ring.release(self.next_seq)
+
+        # A tracker process that crashed (e.g. in MediaPipe or ffmpeg) may never finish the ring: stop() keeps what it wrote
+        if (self.ring.finished() and self.next_seq >= self.ring.written()) or self.process.poll() is not None:
+            self.stop()
+            return None
+        return 0.005
+
+    def stop(self):
+        """Stops the tracker process, keeps the frames it has tracked and frees the shared memory."""
+        if self.ring is None:
+            return None
+        if self.running:
+            print(f"Subprocess tracking stopped ({self.dropped} frames dropped).")
+        self.running = False
+
+        self.ring.stop()
+        if self.process is not None:
+            try:
+                if self.process.wait(timeout=5) != 0:
+                    self.error = f"The tracker process exited with code {self.process.returncode}."
+                    print(self.error)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        self.read_ring()
+        self.ring.close(unlink=True)
+        self.ring = None
+
+        VideoPlaneManager.remove_plane()
+        if bpy.context.screen.is_animation_playing:
+            bpy.ops.screen.animation_play()
+        return None
+
+
+
 # -----------------------------------------------------------------------
 # A CUSTOM UTILITY TO CREATE A VIRTUAL SKELETON FROM TRACKED MOTION DATA
 # Custom method developed by the author (Larenju Rai)
@@ -538,19 +1051,27 @@ class HandTracking:
 # -----------------------------------------------------------------------
 class Skeleton:
     @staticmethod
-    def create_skeleton(context, bone_pairs, mode):
+    def create_skeleton(context, bone_pairs, mode, actor=0):
         """
         Creates bones.
         Bone = Line (with skin modifier) between specified pair of empties 'empty_a' and 'empty_b'.
         Each bone has a DAMPED_TRACK constraint to its target 'empty_b' with default Y-axis tracking. This is head of the bone.
         Each bone is paranted to other empty: 'empty_a'. This is tail of the bone.
         :param bone_pairs: It is a list of tuples (a,b) where a and b are index of 'empty_a' and 'empty_b'.
+        :param actor: Actor number for multi-actor pose tracking (mode "pose" only).
         :return: A list of (a, b, obj) tuples for further configuration. obj is the bone object.
         """
         bones_created = []
 
         for a, b in bone_pairs:
-            if mode == "pose":
+            if mode == "pose" and actor:
+                store = PoseTracking.actor_store(actor)
+                empty_a = store["object_list"][a]
+                empty_b = store["object_list"][b]
+                bone_list = store["bones_list"]
+                # --- Get or create collection ---
+                skeleton_collection = BlenderUtility.create_collection(context,f"PoseSkeleton_A{actor}")
+            elif mode == "pose":
                 empty_a = gvar.object_list[a]
                 empty_b = gvar.object_list[b]
                 bone_list = gvar.bones_list
@@ -618,3 +1139,173 @@ class Skeleton:
             bones_created.append((a, b, obj))
 
         return bones_created
+
+
+
+# -------------------------------------------------------------
+# POSE RIG UTILITY
+# -------------------------------------------------------------
+class PoseRig:
+    """
+        Root empty, 40 pose empties and skeleton of an actor. Used by AnimatePose and by
+        KeyframeStream, which needs the rig before tracking has finished.
+        Actor 0 uses the single-actor names (RigRoot, 0 ... 39, PoseEmpties, PoseSkeleton),
+        other actors get their own (RigRoot_A1, A1_0 ... A1_39, PoseEmpties_A1, PoseSkeleton_A1).
+    """
+
+    @staticmethod
+    def actor_names(actor):
+        """
+            :param actor: Actor number (0 for single-actor tracking).
+            :return: (root empty name, function giving the name of empty i, name suffix of the collections)
+        """
+        if actor == 0:
+            return "RigRoot", str, ""
+        return f"RigRoot_A{actor}", lambda i: f"A{actor}_{i}", f"_A{actor}"
+
+    @staticmethod
+    def actor_lists(actor):
+        """
+            :param actor: Actor number (0 for single-actor tracking).
+            :return: The actor's dict of motion data lists, objects and root (gvar.actors layout).
+        """
+        if actor == 0:
+            return {"positionList": gvar.positionList, "visibilityList": gvar.visibilityList,
+                    "contactList": gvar.contactList, "object_list": gvar.object_list,
+                    "bones_list": gvar.bones_list, "root": gvar.root}
+        return PoseTracking.actor_store(actor)
+
+    @staticmethod
+    def exists(actor=0):
+        """Check if the root empty (RigRoot) and the 40 pose empties (0 ... 39) exist."""
+        root_name, empty_name, _ = PoseRig.actor_names(actor)
+        if root_name not in bpy.data.objects:
+            return False
+        return all(empty_name(i) in bpy.data.objects for i in range(40))
+
+    @staticmethod
+    def get(context, actor=0, reuse=False):
+        """
+            :param actor: Actor number (0 for single-actor tracking).
+            :param reuse: Use the actor's empties already in the scene, if they exist, instead of creating a new rig.
+            :return: (root empty, list of the 40 empties), also stored in gvar.
+        """
+        root_name, empty_name, _ = PoseRig.actor_names(actor)
+        if reuse and PoseRig.exists(actor):
+            root = bpy.data.objects[root_name]
+            object_list = [bpy.data.objects[empty_name(i)] for i in range(40)]
+        else:
+            root, object_list = PoseRig.create(context, actor)
+
+        if actor == 0:
+            gvar.root = root
+            gvar.object_list[:] = object_list
+        else:
+            store = PoseTracking.actor_store(actor)
+            store["root"] = root
+            store["object_list"][:] = object_list
+        return root, object_list
+
+    @staticmethod
+    def create(context, actor=0):
+        """
+            Creates the root empty, the 40 pose empties and the skeleton.
+            :param actor: Actor number (0 for single-actor tracking).
+            :return: (root empty, list of the 40 empties)
+        """
+        root_name, empty_name, suffix = PoseRig.actor_names(actor)
+        store = PoseRig.actor_lists(actor)
+        store["bones_list"].clear()
+        store["object_list"].clear()
+        # --- Get or create collection ---
+        pose_empties_collection = BlenderUtility.create_collection(context,f"PoseEmpties{suffix}")
+        root_collection = BlenderUtility.create_collection(context,"RootEmpties")
+
+        # --- Create root empty ---
+        root = bpy.data.objects.new(root_name, None)
+        root.empty_display_type = 'SPHERE'
+        root.empty_display_size = 1
+        root_collection.objects.link(root)
+
+        # --- Create empties ---
+        for i in range(40):
+            empty = bpy.data.objects.new(name=empty_name(i), object_data=None)
+            empty.empty_display_size = 0.1
+            empty.empty_display_type = 'SPHERE'
+            pose_empties_collection.objects.link(empty)
+            empty.parent = root
+            store["object_list"].append(empty)
+
+        # --- Create skeleton (with default Y tracking) ---
+        bones_created = Skeleton.create_skeleton(context, processing.POSE_BONE_PAIRS, "pose", actor)
+        # --- Apply configuration-specific adjustments ---
+        # --- These adjustments help in smooth motion retargeting for specific bones---
+        track_x_pairs = {(7,8), (11,12), (23,24)}
+        rotate_y_pairs = {(12,14),(11,13),(13,15),(14,16), (16,35), (15,36),}
+        for a, b, obj in bones_created:
+            #Adjust tracking axis for specific pairs
+            if (a, b) in track_x_pairs:
+                for constraint in obj.constraints:
+                    if constraint.type == 'DAMPED_TRACK':
+                        constraint.track_axis = 'TRACK_NEGATIVE_X'
+                        break
+            # Rotate if needed
+            if (a, b) in rotate_y_pairs:
+                obj.rotation_euler.rotate_axis('Y', math.radians(180))
+
+        return root, list(store["object_list"])
+
+
+class KeyframeStream:
+    """
+        Keys the pose rig while offline tracking is still running: every `batch` new frames are
+        turned into locations and appended to the F-curves, so the animation grows in the timeline
+        and no separate Animate step is needed afterwards.
+        Gap filling gives the same result as on the whole capture (frames are only keyed once no later
+        frame can change them). Auto Scale, Constant Bone Lengths and Foot Locking need the whole
+        capture, so they are only applied by Animate.
+    """
+
+    def __init__(self, context, batch=256):
+        """
+            :param batch: Number of tracked frames keyed at once.
+        """
+        self.batch = batch
+        self.next_frame = 0 #first source frame index not keyed yet
+        self.root, self.object_list = PoseRig.get(context, 0, reuse=True)
+
+        # --- Start from empty location curves ---
+        for obj in self.object_list:
+            action = obj.animation_data.action if obj.animation_data else None
+            if action is not None:
+                for fcurve in [fc for fc in action.fcurves if fc.data_path == "location"]:
+                    action.fcurves.remove(fcurve)
+
+        context.scene.frame_start = 1
+        context.scene.render.fps = int(gvar.fps)
+
+    def update(self, context, final=False):
+        """
+            Keys the tracked frames that are ready, once a whole batch of them is.
+            :param final: Tracking has finished: key everything that is left.
+            :return: Number of keyframes written.
+        """
+        scene = context.scene
+        end = len(gvar.positionList)
+        # A later frame can still close a gap of up to max_gap frames, so those frames wait
+        ready = end if final else end - scene.max_gap - 1
+        if ready - self.next_frame < (1 if final else self.batch):
+            return 0
+
+        # Include the frames gap filling looks back at (gap start and the cubic tangent before it)
+        start = max(self.next_frame - scene.max_gap - 2, 0)
+        locations = BlenderUtility.capture_locations(
+            context, gvar.positionList[start:end], gvar.visibilityList[start:end], 40, whole_capture=False
+        )
+        locations = locations[self.next_frame - start:ready - start] - np.array(self.root.location)
+        written, _ = BlenderUtility.keyframe_locations(
+            self.object_list, locations, np.arange(self.next_frame, ready) + 1, scene.keyframe_tolerance, splice=True
+        )
+        self.next_frame = ready
+        scene.frame_end = max(ready, 1)
+        return written
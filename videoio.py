@@ -0,0 +1,359 @@
+"""
+    Video readers for the trackers. Nothing in here depends on Blender.
+
+    FFmpegCapture decodes with an ffmpeg subprocess into a pipe: decoding runs on all cores (ffmpeg's frame and
+    slice threads, good for H.264/H.265) and in parallel with detection, and frames can be scaled or converted
+    by ffmpeg on the way. It has the interface of cv2.VideoCapture that the trackers use
+    (isOpened, read, get, set, release), so open_video can hand out either reader.
+
+    FrameIndex holds the timestamp of every frame and the keyframes of a video (built once, cached per video),
+    for exact seeks to any frame with the least decoding; FrameReader uses it for random access (e.g. scrubbing).
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import subprocess
+import numpy as np
+
+try:
+    from .libraries import cv2
+except ImportError:
+    # Used by a plain Python tool outside of the add-on package
+    from libraries import cv2
+
+# Same values as cv2.CAP_PROP_*, so callers can pass either
+CAP_PROP_POS_MSEC = 0
+CAP_PROP_POS_FRAMES = 1
+CAP_PROP_FRAME_WIDTH = 3
+CAP_PROP_FRAME_HEIGHT = 4
+CAP_PROP_FPS = 5
+CAP_PROP_FRAME_COUNT = 7
+
+
+
+# -------------------------------------------------------------
+# FFMPEG PIPE READER
+# -------------------------------------------------------------
+class FFmpegCapture:
+    CHANNELS = {"bgr24": 3, "rgb24": 3, "gray": 1}
+
+    def __init__(self, path, width=0, height=0, pix_fmt="bgr24", threads=0):
+        """
+            :param path: Path of the video file.
+            :param width: Output width (0 keeps the video's width, or follows height keeping the aspect ratio).
+            :param height: Output height (0 keeps the video's height, or follows width keeping the aspect ratio).
+                        Note: the landmarks are normalized in pixels, so a scaled video gives smaller motion data.
+            :param pix_fmt: "bgr24" (as OpenCV), "rgb24" or "gray".
+            :param threads: ffmpeg decoding threads (0 = all cores).
+        """
+        self.path = path
+        self.pix_fmt = pix_fmt
+        self.threads = threads
+        self.index = None #FrameIndex of the video, set by FrameIndex.seek for seeks by exact timestamps
+        self.process = None
+        self.position = 0 #index of the next frame read() returns
+
+        info = FFmpegCapture.probe(path)
+        self.fps = info["fps"]
+        self.frame_count = info["frame_count"]
+        if width and not height:
+            height = round(info["height"] * width / info["width"] / 2) * 2
+        elif height and not width:
+            width = round(info["width"] * height / info["height"] / 2) * 2
+        self.width = width or info["width"]
+        self.height = height or info["height"]
+        self.scaled = (self.width, self.height) != (info["width"], info["height"])
+        self.frame_bytes = self.width * self.height * FFmpegCapture.CHANNELS[pix_fmt]
+        self.start(0)
+
+    @staticmethod
+    def available():
+        """:return: True if ffmpeg and ffprobe are on the PATH."""
+        return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+    @staticmethod
+    def probe(path):
+        """
+            :param path: Path of the video file.
+            :return: Dict with "width", "height", "fps" and "frame_count" of the first video stream.
+        """
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "v:0",
+             "-show_entries", "stream=width,height,avg_frame_rate,r_frame_rate,nb_frames:format=duration",
+             "-of", "json", path],
+            capture_output=True, check=True, text=True
+        ).stdout
+        data = json.loads(output)
+        if not data.get("streams"):
+            raise RuntimeError(f"No video stream in {path}")
+        stream = data["streams"][0]
+
+        fps = 0.0
+        for rate in (stream.get("avg_frame_rate"), stream.get("r_frame_rate")):
+            numerator, _, denominator = (rate or "0/0").partition("/")
+            if float(denominator or 0) > 0 and float(numerator) > 0:
+                fps = float(numerator) / float(denominator)
+                break
+        frame_count = int(stream.get("nb_frames") or 0)
+        if not frame_count:
+            frame_count = int(round(float(data.get("format", {}).get("duration") or 0) * fps))
+        return {"width": int(stream["width"]), "height": int(stream["height"]), "fps": fps or 30.0,
+                "frame_count": frame_count}
+
+    def start(self, frame):
+        """
+            (Re)starts decoding at a frame. The seek is by timestamp before the input, which ffmpeg makes
+            frame accurate by decoding from the preceding keyframe and dropping the frames before the target.
+            :param frame: Index of the first frame to decode.
+        """
+        self.release()
+        command = ["ffmpeg", "-v", "error", "-nostdin", "-threads", str(self.threads)]
+        if frame > 0:
+            if self.index is not None and frame < self.index.frame_count:
+                # Just before the frame's own timestamp (relative to the first frame): exact for variable frame rates
+                seconds = max(self.index.pts[frame] - self.index.pts[0] - 0.0001, 0.0)
+            else:
+                seconds = frame / self.fps
+            command += ["-ss", f"{seconds:.6f}"]
+        command += ["-i", self.path, "-map", "0:v:0", "-an", "-sn"]
+        if self.scaled:
+            command += ["-vf", f"scale={self.width}:{self.height}"]
+        command += ["-f", "rawvideo", "-pix_fmt", self.pix_fmt, "-"]
+        self.process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=self.frame_bytes * 4
+        )
+        self.position = frame
+
+    def isOpened(self):
+        return self.process is not None
+
+    def grab(self):
+        """:return: True if a frame was skipped (as cv2.VideoCapture.grab)."""
+        return self.read()[0]
+
+    def read(self):
+        """:return: (success, image) as cv2.VideoCapture.read: a writable uint8 array (height, width[, 3])."""
+        if self.process is None:
+            return False, None
+        buffer = bytearray(self.frame_bytes)
+        view = memoryview(buffer)
+        received = 0
+        while received < self.frame_bytes:
+            count = self.process.stdout.readinto(view[received:])
+            if not count:
+                return False, None
+            received += count
+        self.position += 1
+        shape = (self.height, self.width) if self.pix_fmt == "gray" else (self.height, self.width, 3)
+        return True, np.frombuffer(buffer, dtype=np.uint8).reshape(shape)
+
+    def get(self, prop):
+        """:param prop: One of the CAP_PROP_* constants above (or cv2's)."""
+        return {
+            CAP_PROP_POS_MSEC: self.position * 1000.0 / self.fps,
+            CAP_PROP_POS_FRAMES: float(self.position),
+            CAP_PROP_FRAME_WIDTH: float(self.width),
+            CAP_PROP_FRAME_HEIGHT: float(self.height),
+            CAP_PROP_FPS: self.fps,
+            CAP_PROP_FRAME_COUNT: float(self.frame_count),
+        }.get(prop, 0.0)
+
+    def set(self, prop, value):
+        """
+            Seeks with CAP_PROP_POS_FRAMES or CAP_PROP_POS_MSEC.
+            :return: True if the property is supported.
+        """
+        if prop == CAP_PROP_POS_FRAMES:
+            frame = int(value)
+        elif prop == CAP_PROP_POS_MSEC:
+            frame = int(round(value * self.fps / 1000.0))
+        else:
+            return False
+        if frame != self.position:
+            self.start(max(frame, 0))
+        return True
+
+    def release(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.stdout.close()
+            self.process.wait()
+            self.process = None
+
+
+
+# -------------------------------------------------------------
+# FRAME INDEX AND RANDOM ACCESS
+# -------------------------------------------------------------
+class FrameIndex:
+    """
+        Presentation timestamp (pts) of every frame of a video and the frames that are keyframes.
+        A seek only has to decode from the keyframe before the target, so any frame is reached exactly
+        without decoding from the start. Built once per video and cached (keyed by path, size and modification time).
+        :param pts: Array of the timestamps (seconds) of all frames, in presentation order.
+        :param keyframes: Sorted array of the keyframe indices, or None if unknown (OpenCV fallback).
+    """
+    CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "open_mocap", "frame_index")
+
+    def __init__(self, pts, keyframes=None):
+        self.pts = np.asarray(pts, dtype=np.float64)
+        self.keyframes = None if keyframes is None else np.asarray(keyframes, dtype=np.int64)
+
+    @property
+    def frame_count(self):
+        return len(self.pts)
+
+    @staticmethod
+    def cache_path(path):
+        stat = os.stat(path)
+        key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return os.path.join(FrameIndex.CACHE_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".npz")
+
+    @staticmethod
+    def load(path):
+        """
+            :param path: Path of the video file.
+            :return: The video's FrameIndex, from the cache or built (and cached) now.
+        """
+        cache = FrameIndex.cache_path(path)
+        if os.path.exists(cache):
+            with np.load(cache) as data:
+                keyframes = data["keyframes"] if data["keyframes"].size else None
+                return FrameIndex(data["pts"], keyframes)
+
+        index = FrameIndex.probe(path) if FFmpegCapture.available() else FrameIndex.scan(path)
+        try:
+            os.makedirs(FrameIndex.CACHE_DIR, exist_ok=True)
+            temp_path = f"{cache}.tmp.npz"
+            keyframes = index.keyframes if index.keyframes is not None else np.empty(0, dtype=np.int64)
+            np.savez(temp_path, pts=index.pts, keyframes=keyframes)
+            os.replace(temp_path, cache)
+        except OSError as error:
+            print(f"[Open Mocap] Cannot cache the frame index of {path}: {error}")
+        return index
+
+    @staticmethod
+    def probe(path):
+        """Reads the packet headers with ffprobe (nothing is decoded, so this is fast)."""
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=pts_time,flags",
+             "-of", "csv=p=0", path],
+            capture_output=True, check=True, text=True
+        ).stdout
+        pts, key = [], []
+        for line in output.splitlines():
+            pts_time, _, flags = line.partition(",")
+            if pts_time in ("", "N/A"):
+                continue
+            pts.append(float(pts_time))
+            key.append(flags.startswith("K"))
+
+        # Packets come in decode order, frames are numbered in presentation order
+        pts = np.array(pts, dtype=np.float64)
+        order = np.argsort(pts, kind="stable")
+        keyframes = np.flatnonzero(np.array(key, dtype=bool)[order])
+        if keyframes.size == 0 or keyframes[0] != 0:
+            keyframes = np.concatenate([[0], keyframes])
+        return FrameIndex(pts[order], keyframes)
+
+    @staticmethod
+    def scan(path):
+        """OpenCV fallback when ffprobe is missing: decodes the video once, keyframes stay unknown."""
+        cap = cv2.VideoCapture(path)
+        pts = []
+        while cap.grab():
+            pts.append(cap.get(CAP_PROP_POS_MSEC) / 1000.0)
+        cap.release()
+        return FrameIndex(pts)
+
+    def keyframe_before(self, frame):
+        """:return: Index of the last keyframe at or before the frame (None if keyframes are unknown)."""
+        if self.keyframes is None:
+            return None
+        return int(self.keyframes[np.searchsorted(self.keyframes, frame, side="right") - 1])
+
+    def seek(self, cap, frame):
+        """
+            Positions a reader so that its next read() returns exactly this frame.
+            :param cap: cv2.VideoCapture or FFmpegCapture of the video.
+            :param frame: Frame index.
+        """
+        if isinstance(cap, FFmpegCapture):
+            cap.index = self
+            cap.set(CAP_PROP_POS_FRAMES, frame)
+            return
+
+        keyframe = self.keyframe_before(frame)
+        if keyframe is None:
+            cap.set(CAP_PROP_POS_FRAMES, frame)
+            return
+        # Seeking to a keyframe is exact, the rest is decoded forward (unless the reader is already on the way)
+        position = int(cap.get(CAP_PROP_POS_FRAMES))
+        if not keyframe <= position <= frame:
+            cap.set(CAP_PROP_POS_FRAMES, keyframe)
+            position = keyframe
+        for _ in range(frame - position):
+            cap.grab()
+
+
+class FrameReader:
+    """
+        Random access to the frames of a video, e.g. to show the source frame while scrubbing the timeline:
+        frames just ahead are decoded forward, others are reached with an exact seek.
+    """
+    MAX_FORWARD = 30 #frames decoded forward at most when keyframes are unknown
+
+    def __init__(self, path, decoder="opencv"):
+        self.cap = open_video(path, decoder)
+        self.index = FrameIndex.load(path)
+        self.position = 0 #index of the frame the next read() returns
+        self.last = (None, None) #(frame index, image) of the last frame returned
+
+    def frame(self, frame):
+        """
+            :param frame: Frame index.
+            :return: The decoded image, or None if the frame is outside the video.
+        """
+        if frame == self.last[0]:
+            return self.last[1]
+        if frame < 0 or frame >= self.index.frame_count:
+            return None
+
+        keyframe = self.index.keyframe_before(frame)
+        forward = frame - self.position
+        if forward < 0 or forward > (self.MAX_FORWARD if keyframe is None else frame - keyframe):
+            self.index.seek(self.cap, frame)
+        else:
+            for _ in range(forward):
+                self.cap.grab()
+        success, img = self.cap.read()
+        self.position = frame + 1
+        self.last = (frame, img) if success else (None, None)
+        return self.last[1]
+
+    def release(self):
+        self.cap.release()
+
+
+
+# -------------------------------------------------------------
+# READER SELECTION
+# -------------------------------------------------------------
+def open_video(source, decoder="opencv", **options):
+    """
+        :param source: Video path or camera index.
+        :param decoder: "opencv" or "ffmpeg". Cameras, and videos when ffmpeg is not installed, use OpenCV.
+        :param options: Options of FFmpegCapture (width, height, pix_fmt, threads).
+        :return: An opened reader with the cv2.VideoCapture interface.
+    """
+    if decoder == "ffmpeg" and isinstance(source, str):
+        if FFmpegCapture.available():
+            try:
+                return FFmpegCapture(source, **options)
+            except (RuntimeError, subprocess.CalledProcessError, KeyError, ValueError) as error:
+                print(f"[Open Mocap] ffmpeg cannot read {source} ({error}). Using OpenCV.")
+        else:
+            print("[Open Mocap] ffmpeg/ffprobe not found on the PATH. Using OpenCV.")
+    return cv2.VideoCapture(source)